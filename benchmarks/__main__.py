@@ -0,0 +1,105 @@
+import argparse
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+
+import voluptuous
+
+from benchmarks.cases import cases, memory_cases
+
+
+def measure(func, repeat):
+    """Seconds per call: the best of `repeat` runs of as many calls as take at least 0.2 s"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def retained(func):
+    """Bytes allocated by `func` and still held by its result"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()  # noqa: F841 - kept alive while measuring
+        return tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def run(args):
+    results = {}
+    for name, setup in sorted(cases.items()):
+        if args.filter and args.filter not in name:
+            continue
+        func = setup()
+        if func is None:
+            print('{:<40} skipped (missing requirements)'.format(name), file=sys.stderr)
+            continue
+        seconds = measure(func, args.repeat)
+        results[name] = {'seconds_per_call': seconds}
+        print('{:<40} {:>12.3f} us'.format(name, seconds * 1e6), file=sys.stderr)
+    for name, setup in sorted(memory_cases.items()):
+        if args.filter and args.filter not in name:
+            continue
+        func = setup()
+        if func is None:
+            print('{:<40} skipped (missing requirements)'.format(name), file=sys.stderr)
+            continue
+        size = retained(func)
+        results[name] = {'bytes': size}
+        print('{:<40} {:>12.1f} KiB'.format(name, size / 1024), file=sys.stderr)
+
+    report = {
+        'python': platform.python_version(),
+        'voluptuous': voluptuous.__version__,
+        'results': results,
+    }
+    with open(args.output, 'w') as fp:
+        json.dump(report, fp, indent=2, sort_keys=True)
+
+
+def compare(args):
+    with open(args.baseline) as fp:
+        baseline = json.load(fp)['results']
+    with open(args.current) as fp:
+        current = json.load(fp)['results']
+
+    regressions = 0
+    for name in sorted(baseline.keys() & current.keys()):
+        metric = 'bytes' if 'bytes' in current[name] else 'seconds_per_call'
+        ratio = current[name][metric] / baseline[name][metric]
+        regressed = ratio > 1 + args.threshold
+        regressions += regressed
+        print('{:<40} {:>8.2f}x{}'.format(name, ratio, '  REGRESSION' if regressed else ''))
+    for name in sorted(baseline.keys() - current.keys()):
+        print('{:<40} missing'.format(name))
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    run_parser = subparsers.add_parser('run', help='run the benchmarks and write the results as json')
+    run_parser.add_argument('-o', '--output', default='benchmark-results.json')
+    run_parser.add_argument('-k', '--filter', help='only run the benchmarks with names containing this string')
+    run_parser.add_argument('-r', '--repeat', type=int, default=5)
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser('compare',
+                                           help='compare results with a baseline, exit with 1 on regressions')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('-t', '--threshold', type=float, default=0.2,
+                                help='relative slowdown considered a regression (default: 0.2, i.e. 20%%)')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
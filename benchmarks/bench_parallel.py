@@ -0,0 +1,39 @@
+# Compares validating the items of a huge array in one process and in the processes of a process pool
+import concurrent.futures
+import os
+import sys
+import timeit
+
+import opulent_schema
+
+schema = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'id': {'type': 'integer', 'minimum': 0},
+            'name': {'type': 'string', 'maxLength': 100},
+            'email': {'type': 'string', 'pattern': '^[^@]+@[^@]+$'},
+            'scores': {'type': 'array', 'items': {'type': 'number', 'minimum': 0}},
+            'status': {'enum': ['active', 'inactive']},
+        },
+        'required': ['id', 'name'],
+    },
+    'maxItems': 10 ** 7,
+}
+items = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+instance = [{'id': ind, 'name': 'name {}'.format(ind), 'email': 'a@b', 'scores': [1, 2.5], 'status': 'active'}
+            for ind in range(items)]
+
+if __name__ == '__main__':
+    sequential = opulent_schema.convert(schema)
+    workers = os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        parallel = opulent_schema.SchemaConverter.with_parallel_items(executor, threshold=1).convert(schema)
+        assert sequential(instance) == parallel(instance)
+        sequential_time = min(timeit.repeat(lambda: sequential(instance), number=1, repeat=3))
+        parallel_time = min(timeit.repeat(lambda: parallel(instance), number=1, repeat=3))
+    print('{} items, {} worker processes'.format(items, workers))
+    print('one process:          {:.3f} s'.format(sequential_time))
+    print('process pool:         {:.3f} s'.format(parallel_time))
+    print('speedup:              {:.2f}x'.format(sequential_time / parallel_time))
@@ -0,0 +1,60 @@
+# Compares validating a patched document as a whole with `opulent_schema.patch` validating only the changed parts
+import copy
+import timeit
+
+import opulent_schema
+from opulent_schema import patch
+
+schema = {
+    'type': 'object',
+    'properties': {
+        'id': {'type': 'string'},
+        'records': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'name': {'type': 'string', 'maxLength': 100},
+                    'value': {'type': 'number', 'minimum': 0},
+                    'tags': {'type': 'array', 'items': {'type': 'string'}},
+                },
+                'required': ['name', 'value'],
+            },
+        },
+    },
+    'required': ['id', 'records'],
+}
+document = {
+    'id': 'doc',
+    'records': [{'name': 'record {}'.format(ind), 'value': ind, 'tags': ['a', 'b']} for ind in range(5000)],
+}
+operations = [
+    {'op': 'replace', 'path': '/records/2500/value', 'value': 1.5},
+    {'op': 'add', 'path': '/records/-', 'value': {'name': 'new', 'value': 0}},
+    {'op': 'remove', 'path': '/records/10/tags'},
+]
+
+full = opulent_schema.convert(schema)
+partial = patch.patch_convert(schema)
+document = full(document)
+
+
+def full_revalidation():
+    patched = patch.PatchedDocument(copy.deepcopy(document))
+    for operation in operations:
+        patched.apply(operation)
+    return full(patched.document)
+
+
+def partial_revalidation():
+    return partial(document, operations)
+
+
+if __name__ == '__main__':
+    assert full_revalidation() == partial_revalidation()
+    number = 20
+    full_time = min(timeit.repeat(full_revalidation, number=number, repeat=3)) / number
+    partial_time = min(timeit.repeat(partial_revalidation, number=number, repeat=3)) / number
+    print('full revalidation:    {:.3f} ms'.format(full_time * 1000))
+    print('changed parts only:   {:.3f} ms'.format(partial_time * 1000))
+    print('speedup:              {:.0f}x'.format(full_time / partial_time))
@@ -0,0 +1,80 @@
+# Compares pre-forked workers validating with the schemas compiled lazily in every worker, and compiled once in the
+# parent process by `opulent_schema.prefork.prefork_prepare`: the memory of the workers and their first requests
+import copy
+import json
+import os
+import subprocess
+import sys
+import time
+
+WORKERS = 4
+# every schema of the validation benchmarks is registered this many times (as different schemas)
+COPIES = 20
+
+
+def memory():
+    """The resident and private (i.e. not shared with the parent) memory of the process, in KiB"""
+    sizes = {}
+    with open('/proc/self/smaps_rollup') as fp:
+        for line in fp:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                sizes[parts[0].rstrip(':')] = int(parts[1])
+    return sizes['Rss'], sizes['Private_Clean'] + sizes['Private_Dirty']
+
+
+def worker(validators, write_fd):
+    start = time.perf_counter()
+    for validator, instance in validators:
+        validator(instance)
+    first = time.perf_counter() - start
+    rss, private = memory()
+    os.write(write_fd, json.dumps({'first_request': first, 'rss': rss, 'private': private}).encode() + b'\n')
+
+
+def serve(prepare):
+    from benchmarks.cases import validation_cases
+    from opulent_schema import prefork
+
+    validators = []
+    for _ in range(COPIES):
+        for schema, instance in validation_cases.values():
+            instance = instance[:10] if isinstance(instance, list) else instance
+            validators.append((prefork.register(copy.deepcopy(schema)), instance))
+    if prepare:
+        prefork.prefork_prepare()
+
+    read_fd, write_fd = os.pipe()
+    for _ in range(WORKERS):  # one at a time, not to measure them competing for the cpus
+        if os.fork() == 0:
+            try:
+                worker(validators, write_fd)
+            finally:
+                os._exit(0)
+        os.wait()
+    os.close(write_fd)
+    with os.fdopen(read_fd) as fp:
+        reports = [json.loads(line) for line in fp]
+    print(json.dumps({key: sum(report[key] for report in reports) / len(reports) for key in reports[0]}))
+
+
+def main():
+    if not hasattr(os, 'fork') or not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit('needs os.fork and /proc/self/smaps_rollup (Linux)')
+    from benchmarks.cases import validation_cases
+
+    print('{} workers, {} validators'.format(WORKERS, COPIES * len(validation_cases)))
+    print('{:<28} {:>18} {:>12} {:>14}'.format('', 'first request ms', 'rss KiB', 'private KiB'))
+    for label, prepare in [('lazy (in every worker)', False), ('prefork_prepare', True)]:
+        output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_prefork', 'serve', str(int(prepare))],
+                                check=True, stdout=subprocess.PIPE).stdout
+        result = json.loads(output)
+        print('{:<28} {:>18.1f} {:>12.0f} {:>14.0f}'.format(
+            label, result['first_request'] * 1e3, result['rss'], result['private']))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['serve']:
+        serve(bool(int(sys.argv[2])))
+    else:
+        main()
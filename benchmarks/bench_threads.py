@@ -0,0 +1,39 @@
+# Throughput of validators shared by threads, by the number of threads (scaling only on free-threaded builds)
+import concurrent.futures
+import sys
+import sysconfig
+import time
+
+import opulent_schema
+from benchmarks.cases import validation_cases
+
+THREAD_COUNTS = [1, 2, 4, 8]
+CALLS = 400
+CASES = ['wide_object', 'deep_nesting', 'one_of_unions']
+
+
+def throughput(validator, instance, threads):
+    """Validations per second, `CALLS` of them shared by `threads` threads"""
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        start = time.perf_counter()
+        for _ in executor.map(lambda _: validator(instance), range(CALLS)):
+            pass
+        return CALLS / (time.perf_counter() - start)
+
+
+def build():
+    free_threaded = bool(sysconfig.get_config_var('Py_GIL_DISABLED'))
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    return 'Python {} ({}, GIL {})'.format(sys.version.split()[0], 'free-threaded' if free_threaded else 'default',
+                                           'enabled' if gil_enabled else 'disabled')
+
+
+if __name__ == '__main__':
+    print(build())
+    print('{:<16}'.format('calls/s') + ''.join('{:>16}'.format('{} threads'.format(count)) for count in THREAD_COUNTS))
+    for name in CASES:
+        schema, instance = validation_cases[name]
+        validator = opulent_schema.convert(schema)
+        validator(instance)
+        rates = [throughput(validator, instance, count) for count in THREAD_COUNTS]
+        print('{:<16}'.format(name) + ''.join('{:>9.0f} {:>5.2f}x'.format(rate, rate / rates[0]) for rate in rates))
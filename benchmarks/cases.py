@@ -0,0 +1,390 @@
+# Benchmark cases: functions returning a no-argument callable, whose single call is measured
+import datetime
+import decimal
+import subprocess
+import sys
+
+import opulent_schema
+
+cases = {}
+# functions returning a no-argument callable, the memory held by the result of its single call is measured
+memory_cases = {}
+
+
+def case(name):
+    def decorator(func):
+        cases[name] = func
+        return func
+    return decorator
+
+
+def memory_case(name):
+    def decorator(func):
+        memory_cases[name] = func
+        return func
+    return decorator
+
+
+wide_schema = {
+    'type': 'object',
+    'properties': {
+        'prop{}'.format(ind): [
+            {'type': 'integer', 'minimum': 0, 'maximum': 1000},
+            {'type': 'string', 'maxLength': 20},
+            {'type': ['number', 'null'], 'multipleOf': 0.5},
+            {'type': 'boolean'},
+        ][ind % 4]
+        for ind in range(200)
+    },
+    'required': ['prop{}'.format(ind) for ind in range(0, 200, 2)],
+}
+wide_instance = {
+    'prop{}'.format(ind): [ind, 'value {}'.format(ind), ind / 2, True][ind % 4]
+    for ind in range(200)
+}
+
+
+def deep(depth):
+    schema = {'type': 'integer'}
+    instance = 1
+    for _ in range(depth):
+        schema = {'type': 'object', 'properties': {'child': schema, 'name': {'type': 'string'}}, 'required': ['child']}
+        instance = {'child': instance, 'name': 'node'}
+    return schema, instance
+
+
+deep_schema, deep_instance = deep(50)
+
+array_schema = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {'id': {'type': 'integer'}, 'score': {'type': 'number', 'minimum': 0}},
+        'required': ['id'],
+    },
+    'minItems': 1,
+}
+array_instance = [{'id': ind, 'score': ind * 1.5} for ind in range(5000)]
+
+pattern_schema = {
+    'type': 'object',
+    'patternProperties': {'^str_': {'type': 'string'}, '^int_': {'type': 'integer'}, '^num_': {'type': 'number'}},
+    'additionalProperties': {'type': 'boolean'},
+}
+pattern_instance = {
+    **{'str_{}'.format(ind): 'x' for ind in range(100)},
+    **{'int_{}'.format(ind): ind for ind in range(100)},
+    **{'num_{}'.format(ind): ind / 3 for ind in range(100)},
+    **{'flag_{}'.format(ind): True for ind in range(100)},
+}
+
+one_of_schema = {
+    'type': 'array',
+    'items': {
+        'oneOf': [
+            {'type': 'object', 'properties': {'kind': {'const': 'a'}, 'x': {'type': 'integer'}}, 'required': ['kind']},
+            {'type': 'object', 'properties': {'kind': {'const': 'b'}, 'y': {'type': 'string'}}, 'required': ['kind']},
+            {'type': 'object', 'properties': {'kind': {'const': 'c'}, 'z': {'type': 'number'}}, 'required': ['kind']},
+        ],
+    },
+}
+one_of_instance = [[{'kind': 'a', 'x': 1}, {'kind': 'b', 'y': 'y'}, {'kind': 'c', 'z': 1.5}][ind % 3]
+                   for ind in range(1000)]
+
+formats_schema = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'created': {'type': 'string', 'format': 'date-time'},
+            'email': {'type': 'string', 'format': 'email'},
+            'ip': {'type': 'string', 'format': 'ipv4'},
+            'host': {'type': 'string', 'format': 'hostname'},
+            'uri': {'type': 'string', 'format': 'uri'},
+        },
+    },
+}
+formats_instance = [{
+    'created': '2020-01-0{}T12:00:00.000000Z'.format(ind % 9 + 1),
+    'email': 'user{}@example.com'.format(ind),
+    'ip': '10.0.{}.{}'.format(ind % 256, ind // 256),
+    'host': 'host{}.example.com'.format(ind),
+    'uri': 'https://example.com/path/{}?query#fragment'.format(ind),
+} for ind in range(500)]
+
+
+class Doubled(opulent_schema.TransformedField):
+    schema = {'type': 'number'}
+
+    def _transform(self, instance):
+        return instance * 2
+
+
+class Parsed(opulent_schema.TransformedField):
+    schema = {'type': 'string'}
+
+    def _pre_transform(self, instance):
+        return str(instance)
+
+    def _transform(self, instance):
+        return decimal.Decimal(instance)
+
+
+transformed_schema = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'doubled': Doubled(),
+            'parsed': Parsed(),
+            'inline': opulent_schema.InLineField(lambda x: datetime.date.fromordinal(x), type='integer'),
+        },
+    },
+}
+transformed_instance = [{'doubled': ind, 'parsed': ind / 4, 'inline': 730000 + ind} for ind in range(1000)]
+
+
+def to_cents(value):
+    return decimal.Decimal(value).quantize(decimal.Decimal('0.01'))
+
+
+# a pure transformation of a low-cardinality input, plain and memoized
+prices_instance = ['{}.{}'.format(ind % 7, ind % 3) for ind in range(2000)]
+prices_schema = {'items': opulent_schema.InLineField(to_cents, type='string')}
+memoized_prices_schema = {'items': opulent_schema.InLineField(to_cents, type='string', memo_size=64)}
+
+validation_cases = {
+    'wide_object': (wide_schema, wide_instance),
+    'deep_nesting': (deep_schema, deep_instance),
+    'big_array': (array_schema, array_instance),
+    'pattern_properties': (pattern_schema, pattern_instance),
+    'one_of_unions': (one_of_schema, one_of_instance),
+    'formats': (formats_schema, formats_instance),
+    'transformed_fields': (transformed_schema, transformed_instance),
+    'pure_transformation': (prices_schema, prices_instance),
+    'memoized_transformation': (memoized_prices_schema, prices_instance),
+}
+
+
+def make_compile_case(schema):
+    return lambda: lambda: opulent_schema.SchemaConverter.go(schema)
+
+
+def make_validate_case(schema, instance):
+    def setup():
+        validator = opulent_schema.convert(schema, lazy=False)
+        return lambda: validator(instance)
+    return setup
+
+
+for case_name, (case_schema, case_instance) in validation_cases.items():
+    case('compile/' + case_name)(make_compile_case(case_schema))
+    case('validate/' + case_name)(make_validate_case(case_schema, case_instance))
+
+
+def make_loads_validate_case(schema, instance):
+    def setup():
+        import json
+
+        validator = opulent_schema.convert(schema, lazy=False)
+        document = json.dumps(instance)
+        return lambda: validator(json.loads(document))
+    return setup
+
+
+def make_decode_case(schema, instance):
+    def setup():
+        import json
+        from opulent_schema.decoding import SchemaDecoder
+
+        decoder = SchemaDecoder(schema)
+        document = json.dumps(instance)
+        return lambda: decoder(document)
+    return setup
+
+
+# json documents: decoded and then validated, and decoded by `SchemaDecoder`
+for case_name in ['wide_object', 'deep_nesting', 'big_array']:
+    case('loads_validate/' + case_name)(make_loads_validate_case(*validation_cases[case_name]))
+    case('decode/' + case_name)(make_decode_case(*validation_cases[case_name]))
+
+
+def make_cached_case(schema, instance):
+    def setup():
+        validator = opulent_schema.convert(schema).cached()
+        validator(instance)
+        return lambda: validator(instance)
+    return setup
+
+
+def make_cached_loads_case(schema, instance):
+    def setup():
+        import json
+
+        validator = opulent_schema.convert(schema).cached()
+        document = json.dumps(instance)
+        validator.loads(document)
+        return lambda: validator.loads(document)
+    return setup
+
+
+# a repeated instance, validated again by `validate/*` and `loads_validate/*`, found in the cache of its results here
+for case_name in ['wide_object', 'deep_nesting', 'big_array']:
+    case('cached/' + case_name)(make_cached_case(*validation_cases[case_name]))
+    case('cached_loads/' + case_name)(make_cached_loads_case(*validation_cases[case_name]))
+
+
+@case('schema_schema/wide_object')
+def schema_schema_wide():
+    return lambda: opulent_schema.schema_schema(wide_schema)
+
+
+@case('schema_schema/deep_nesting')
+def schema_schema_deep():
+    return lambda: opulent_schema.schema_schema(deep_schema)
+
+
+def contract_columns():
+    try:
+        import sqlalchemy as sa
+        from opulent_schema import schemalchemy
+    except ImportError:  # the `schemalchemy` extra requirements are not installed
+        return None
+
+    columns = [
+        sa.Column('int_{}'.format(ind), sa.INTEGER, nullable=bool(ind % 2)) for ind in range(20)
+    ] + [
+        sa.Column('str_{}'.format(ind), sa.VARCHAR(50), nullable=False) for ind in range(20)
+    ] + [
+        sa.Column('num_{}'.format(ind), sa.Numeric(20, 6)) for ind in range(10)
+    ] + [
+        sa.Column('ts_{}'.format(ind), sa.TIMESTAMP) for ind in range(10)
+    ]
+    return schemalchemy, columns
+
+
+@case('schemalchemy/make_contract')
+def make_contract():
+    found = contract_columns()
+    if found is None:
+        return None
+    schemalchemy, columns = found
+    maker = schemalchemy.ContractMaker()
+
+    def run():
+        maker.clear_caches()
+        return maker.make_contract(*columns)
+    return run
+
+
+@case('schemalchemy/make_contract_cached')
+def make_contract_cached():
+    found = contract_columns()
+    if found is None:
+        return None
+    schemalchemy, columns = found
+    return lambda: schemalchemy.make_contract(*columns)
+
+
+@case('schemalchemy/any_time_stamp')
+def any_time_stamp():
+    found = contract_columns()
+    if found is None:
+        return None
+    schemalchemy, _ = found
+    values = ['2015-03-{:02d}T12:37:43.103+01:00'.format(day) for day in range(1, 29)] + [1425472663.103, '1425472663']
+
+    def run():
+        schemalchemy.parse_time_stamp.cache_clear()
+        return [schemalchemy.any_time_stamp(value) for value in values]
+    return run
+
+
+def validated_records():
+    """Records with the values of `AnyTimeStamp`, `AnyDate` and `AnyDecimal`, as validated, and their schema"""
+    found = contract_columns()
+    if found is None:
+        return None
+    schemalchemy, _ = found
+    schema = {'type': 'array', 'items': {'type': 'object', 'properties': {
+        'id': {'type': 'integer'},
+        'name': {'type': 'string'},
+        'amount': schemalchemy.AnyDecimal(type='number'),
+        'created': schemalchemy.AnyTimeStamp(),
+        'day': schemalchemy.AnyDate(),
+        'tags': {'type': 'array', 'items': {'type': 'string'}},
+    }}}
+    instance = [{'id': ind, 'name': 'name {}'.format(ind), 'amount': ind + 0.25, 'created': 1425472663 + ind,
+                 'day': '2015-03-04', 'tags': ['a', 'b']} for ind in range(2000)]
+    return schema, opulent_schema.convert(schema)(instance)
+
+
+def default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError
+
+
+@case('encode/dumps_default')
+def dumps_default():
+    found = validated_records()
+    if found is None:
+        return None
+    import json
+
+    _, records = found
+    return lambda: json.dumps(records, default=default)
+
+
+@case('encode/schema_encoder')
+def schema_encoder():
+    found = validated_records()
+    if found is None:
+        return None
+    from opulent_schema.encoding import SchemaEncoder
+
+    schema, records = found
+    encoder = SchemaEncoder(schema)
+    return lambda: encoder(records)
+
+
+records_schema = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'id': {'type': 'integer'},
+            'name': {'type': 'string'},
+            'score': {'type': 'number'},
+            'active': {'type': 'boolean'},
+            'address': {'type': 'object', 'properties': {'city': {'type': 'string'}, 'zip': {'type': 'string'}}},
+        },
+    },
+}
+records_instance = [{'id': ind, 'name': 'name', 'score': 1.5, 'active': True, 'address': {'city': 'city', 'zip': '1'}}
+                    for ind in range(20000)]
+
+
+def make_records_case(records):
+    def setup():
+        validator = opulent_schema.convert(records_schema, lazy=False, records=records)
+        return lambda: validator(records_instance)
+    return setup
+
+
+# the validated objects as dicts, and as records
+for case_name, case_records in [('dicts', False), ('records', True)]:
+    case('validate/records_as_' + case_name)(make_records_case(case_records))
+    memory_case('memory/records_as_' + case_name)(make_records_case(case_records))
+
+
+def make_import_case(module):
+    def setup():
+        return lambda: subprocess.run([sys.executable, '-c', 'import {}'.format(module)], check=True)
+    return setup
+
+
+case('import/opulent_schema')(make_import_case('opulent_schema'))
+case('import/schemalchemy')(make_import_case('opulent_schema.schemalchemy'))
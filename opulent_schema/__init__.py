@@ -1,3 +1,11 @@
 from opulent_schema.opulent_schema import *  # noqa
+from opulent_schema import opulent_schema as _module
 
 __version__ = '0.1.0'
+
+
+def __getattr__(name):
+    # the attributes of `opulent_schema.opulent_schema` built on first use are not star-imported
+    if name in _module._lazy_attributes:
+        return getattr(_module, name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
@@ -0,0 +1,179 @@
+# asyncio support: awaitable validators, coroutine transformations and validation of instance streams
+import asyncio
+import collections
+import inspect
+import json
+
+import voluptuous as vol
+
+from opulent_schema.opulent_schema import TransformedField
+from opulent_schema.pending import (Pending, PendingSchemaConverter, Postponing, add_error, collect,
+                                    transformation_errors)
+
+
+def is_coroutine_transformation(schema: TransformedField):
+    return (inspect.iscoroutinefunction(schema.get_post_transformation()) or
+            inspect.iscoroutinefunction(getattr(schema, '_transform', None)))
+
+
+async def _apply(pending: Pending, path):
+    value = await resolve(pending.value, path)
+    with transformation_errors(pending, path):
+        result = pending.transformation(value)
+        if inspect.isawaitable(result):
+            result = await result
+    # the results of postponed validators may contain new placeholders
+    return await resolve(result, path)
+
+
+async def resolve(value, path=None):
+    """Applies all pending transformations found in `value`, raises `vol.MultipleInvalid` with the errors of all the
+    failing ones. Sibling transformations run concurrently, nested ones are applied before the transformation of the
+    value containing them. Containers are updated in place - they are always the ones created by the synchronous
+    validation"""
+    path = path or []
+    if isinstance(value, Pending):
+        found = [(None, None, value, path)]
+    else:
+        found = []
+        collect(value, path, found)
+    if not found:
+        return value
+
+    results = await asyncio.gather(*[_apply(pending, item_path) for _, _, pending, item_path in found],
+                                   return_exceptions=True)
+    errors = []
+    for (container, key, _, _), result in zip(found, results):
+        if isinstance(result, vol.Invalid):
+            add_error(errors, result)
+        elif isinstance(result, BaseException):
+            raise result
+        elif container is None:
+            return result
+        else:
+            container[key] = result
+    if errors:
+        raise vol.MultipleInvalid(errors)
+    return value
+
+
+def exceeds_size(value, threshold):
+    """Checks if `value` has at least `threshold` nodes, without visiting more than `threshold` of them"""
+    count = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        count += 1
+        if count >= threshold:
+            return True
+        if isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return False
+
+
+class AsyncValidator:
+    """Awaitable counterpart of the callables returned by `convert`.
+
+    :param executor_threshold: instances having at least this many nodes (containers and scalars) are validated in
+        `executor` (`None` means the loop's default executor) instead of the event loop's thread. `None` disables it.
+    """
+
+    def __init__(self, validator, executor_threshold=None, executor=None):
+        self.validator = validator
+        self.executor_threshold = executor_threshold
+        self.executor = executor
+
+    async def __call__(self, instance):
+        if self.executor_threshold is not None and exceeds_size(instance, self.executor_threshold):
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, self.validator, instance)
+        else:
+            result = self.validator(instance)
+        return await resolve(result)
+
+    async def validate_many(self, instances, slice_size=100):
+        """Validates an iterable of instances, yielding control to the event loop every `slice_size` instances"""
+        results = []
+        for ind, instance in enumerate(instances):
+            try:
+                results.append(await self(instance))
+            except vol.Invalid as e:
+                e.prepend([ind])
+                raise
+            if (ind + 1) % slice_size == 0:
+                await asyncio.sleep(0)
+        return results
+
+    async def validate_stream(self, reader: asyncio.StreamReader, concurrency=1, loads=json.loads):
+        """Asynchronous generator of validated instances read from `reader`, one json document per line.
+
+        Lines are only read when there is room for them: at most `concurrency` instances are being validated at once
+        and nothing is read ahead while the consumer does not ask for the next result, so a slow consumer slows down
+        the reading (and, through the reader's buffer limit, the transport).
+        """
+        in_flight = collections.deque()
+        ind = 0
+        eof = False
+        try:
+            while True:
+                while not eof and len(in_flight) < concurrency:
+                    line = await reader.readline()
+                    if not line:
+                        eof = True
+                        break
+                    if not line.strip():
+                        continue
+                    in_flight.append(asyncio.ensure_future(self._validate_line(line, ind, loads)))
+                    ind += 1
+                if not in_flight:
+                    return
+                yield await in_flight.popleft()
+        finally:
+            # on errors, and when the consumer stops early (`aclose()` raises `GeneratorExit` at the `yield`)
+            for task in in_flight:
+                task.cancel()
+
+    async def _validate_line(self, line, ind, loads):
+        try:
+            instance = loads(line)
+        except ValueError as e:
+            raise vol.Invalid('Invalid json: {}'.format(e), path=[ind])
+        try:
+            return await self(instance)
+        except vol.Invalid as e:
+            e.prepend([ind])
+            raise
+
+
+class AsyncSchemaConverter(PendingSchemaConverter):
+    """Allows `TransformedField` transformations to be coroutines. They are awaited after the synchronous validation,
+    concurrently for all fields, and so are the validators checking the values they return as parts of an enclosing
+    value (see `PendingSchemaConverter`)"""
+    after_pending = Postponing
+
+    @classmethod
+    def post_transformation_validators(cls, schema):
+        if is_coroutine_transformation(schema):
+            return super().post_transformation_validators(schema)
+        # applied right away, or postponed by `chain` while the value contains placeholders
+        return super(PendingSchemaConverter, cls).post_transformation_validators(schema)
+
+    @classmethod
+    def async_convert(cls, json_schema, executor_threshold=None, executor=None):
+        return AsyncValidator(cls.convert(json_schema), executor_threshold, executor)
+
+    @classmethod
+    def async_check_and_convert(cls, json_schema, executor_threshold=None, executor=None):
+        return AsyncValidator(cls.check_and_convert(json_schema), executor_threshold, executor)
+
+
+class ExactAsyncSchemaConverter(AsyncSchemaConverter):
+    extra = vol.PREVENT_EXTRA
+
+
+async_convert = AsyncSchemaConverter.async_convert
+exact_async_convert = ExactAsyncSchemaConverter.async_convert
+
+async_check_and_convert = AsyncSchemaConverter.async_check_and_convert
+exact_async_check_and_convert = ExactAsyncSchemaConverter.async_check_and_convert
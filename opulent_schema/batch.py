@@ -0,0 +1,256 @@
+# Columnar validation of batches of flat records sharing one object schema
+import math
+
+import voluptuous as vol
+
+from opulent_schema.opulent_schema import SchemaConverter, MultipleOf
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# keywords of a property's schema that can be checked for a whole column at once
+VECTORIZABLE_KEYWORDS = {'type', 'minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum', 'multipleOf', 'enum',
+                         'maxLength', 'minLength', 'title', 'description', 'examples'}
+VECTORIZABLE_TYPES = {'integer', 'number', 'string', 'boolean', 'null'}
+
+# float64 represents all integers up to this magnitude exactly
+EXACT_FLOAT_INT = 2 ** 53
+EXACT_INT64 = 2 ** 63 - 1
+
+MISSING = object()
+
+
+def is_vectorizable(schema):
+    return (type(schema) is dict and not schema.keys() - VECTORIZABLE_KEYWORDS and
+            isinstance(schema.get('type'), str) and schema['type'] in VECTORIZABLE_TYPES)
+
+
+def is_batch_transformed(schema, converter):
+    return (converter.batch_post_transformation(schema) is not None and
+            not converter.pre_transformation_validators(schema))
+
+
+def _is_integral(value):
+    return type(value) is int or (math.isfinite(value) and value.is_integer())
+
+
+class Column:
+    """Checks the values of one property in all records of a batch. The checks only tell which values pass: the values
+    that do not (or that the column checks are unsure about) are validated again by the property's usual validator, to
+    get exactly the same errors as the per-record validation"""
+
+    def __init__(self, name, schema, validator, use_numpy):
+        self.name = name
+        self.schema = schema
+        # validating the value as a one-key dict reproduces the errors of the per-record validation exactly
+        self.validator = vol.Schema({name: validator})
+        self.use_numpy = use_numpy
+        self.type = schema['type']
+        (self.min, self.min_included), (self.max, self.max_included) = SchemaConverter.get_bounds(schema)
+        self.multiple_of = schema.get('multipleOf')
+        self.multiple_of_validator = MultipleOf(self.multiple_of) if self.multiple_of is not None else None
+        self.min_length = schema.get('minLength')
+        self.max_length = schema.get('maxLength')
+        self.enum = schema.get('enum')
+        try:
+            self.enum_set = frozenset(self.enum) if self.enum is not None else None
+        except TypeError:
+            self.enum_set = None
+        self.numeric_enum = (self.enum is not None and all(type(v) in (int, float) for v in self.enum))
+
+    def passing(self, values):
+        """A sequence of booleans, `True` for values that certainly pass"""
+        if not values:
+            return []
+        types = set(map(type, values))
+        if self.type in ('integer', 'number'):
+            if not types <= {int, float}:
+                return [False] * len(values)
+            if self.use_numpy and np is not None:
+                return self._numeric_numpy(values, types)
+            return self._numeric(values, types)
+        if self.type == 'string':
+            if types != {str}:
+                return [False] * len(values)
+            return self._strings(values)
+        if self.type == 'boolean':
+            ok = types == {bool}
+        else:  # i.e. 'null'
+            ok = types == {type(None)}
+        return self._enum(values, [ok] * len(values))
+
+    def _enum(self, values, ok):
+        if self.enum is None:
+            return ok
+        if self.enum_set is None:
+            return [False] * len(values)
+        return [o and v in self.enum_set for o, v in zip(ok, values)]
+
+    def _numeric(self, values, types):
+        ok = [True] * len(values)
+        if self.type == 'integer' and float in types:
+            ok = [_is_integral(v) for v in values]
+        if self.min is not None:
+            bound = self.min
+            checked = [v >= bound for v in values] if self.min_included else [v > bound for v in values]
+            ok = [o and c for o, c in zip(ok, checked)]
+        if self.max is not None:
+            bound = self.max
+            checked = [v <= bound for v in values] if self.max_included else [v < bound for v in values]
+            ok = [o and c for o, c in zip(ok, checked)]
+        if self.multiple_of is not None:
+            if type(self.multiple_of) is int and types == {int} and self.multiple_of:
+                checked = [v % self.multiple_of == 0 for v in values]
+            else:
+                checked = [self._is_multiple(v) for v in values]
+            ok = [o and c for o, c in zip(ok, checked)]
+        return self._enum(values, ok)
+
+    def _is_multiple(self, value):
+        try:
+            self.multiple_of_validator(value)
+        except vol.Invalid:
+            return False
+        return True
+
+    def _numeric_numpy(self, values, types):
+        if not self._exact_bounds():
+            return self._numeric(values, types)
+        array = np.array(values, dtype=np.float64)
+        finite = np.isfinite(array)
+        if int in types and np.abs(array, where=finite, out=np.zeros_like(array)).max() >= EXACT_FLOAT_INT:
+            return self._numeric(values, types)
+
+        ok = finite.copy()
+        if self.type == 'integer' and float in types:
+            ok &= np.floor(array, where=finite, out=np.zeros_like(array)) == array
+        if self.min is not None:
+            ok &= array >= self.min if self.min_included else array > self.min
+        if self.max is not None:
+            ok &= array <= self.max if self.max_included else array < self.max
+        if self.multiple_of is not None:
+            if type(self.multiple_of) is int and types == {int} and 0 < abs(self.multiple_of) <= EXACT_INT64:
+                ok &= np.array(values, dtype=np.int64) % self.multiple_of == 0
+            else:
+                ok &= np.array([self._is_multiple(v) for v in values], dtype=bool)
+        if self.enum is not None:
+            if self.numeric_enum:
+                ok &= np.isin(array, np.array(self.enum, dtype=np.float64))
+            else:
+                ok &= np.array(self._enum(values, [True] * len(values)), dtype=bool)
+        return ok
+
+    def _exact_bounds(self):
+        for bound in [self.min, self.max] + (self.enum if self.numeric_enum else []):
+            if bound is not None and (type(bound) not in (int, float) or abs(bound) >= EXACT_FLOAT_INT):
+                return False
+        return True
+
+    def _strings(self, values):
+        ok = [True] * len(values)
+        if self.min_length is not None or self.max_length is not None:
+            if self.use_numpy and np is not None:
+                lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+                checked = np.ones(len(values), dtype=bool)
+                if self.min_length is not None:
+                    checked &= lengths >= self.min_length
+                if self.max_length is not None:
+                    checked &= lengths <= self.max_length
+                ok = checked.tolist()
+            else:
+                min_length = self.min_length if self.min_length is not None else 0
+                max_length = self.max_length if self.max_length is not None else float('inf')
+                ok = [min_length <= len(v) <= max_length for v in values]
+        return self._enum(values, ok)
+
+    def errors(self, rows, values):
+        """`vol.Invalid` errors (with paths starting at the record index) of the values in the column"""
+        errors = []
+        ok = self.passing(values)
+        for row, value, passed in zip(rows, values, ok):
+            if passed:
+                continue
+            try:
+                self.validator({self.name: value})
+            except vol.Invalid as e:
+                e.prepend([row])
+                errors.extend(e.errors if isinstance(e, vol.MultipleInvalid) else [e])
+        return errors
+
+
+class BatchValidator:
+    """Validates a list of records against an object schema. The properties whose schemas consist only of
+    `VECTORIZABLE_KEYWORDS` (and a single scalar `type`) are checked column by column - with NumPy if it's available
+    and `use_numpy` is true. Everything else (the object keywords and the other properties) is validated record by
+    record, as usual. Returns the list of validated records, or raises `vol.MultipleInvalid` with errors whose paths
+    start with the index of the record. The properties that are `TransformedField`s with a batch post transformation
+    (and no pre transformation) are transformed column by column as well, with `TransformedField._transform_many`"""
+
+    def __init__(self, json_schema, converter=SchemaConverter, use_numpy=True):
+        self.columns = []
+        self.transformed = []  # (name, BatchTransformation) pairs
+        self.required = None
+        residual = json_schema
+        if type(json_schema) is dict and isinstance(json_schema.get('properties'), dict):
+            residual_properties = {}
+            for name, prop_schema in json_schema['properties'].items():
+                if is_vectorizable(prop_schema):
+                    self.columns.append(Column(name, prop_schema, converter.go(prop_schema), use_numpy))
+                    residual_properties[name] = {}
+                elif is_batch_transformed(prop_schema, converter):
+                    self.transformed.append((name, converter.batch_post_transformation(prop_schema)))
+                    residual_properties[name] = dict(prop_schema)  # i.e. without the post transformation
+                else:
+                    residual_properties[name] = prop_schema
+            residual = {**json_schema, 'properties': residual_properties}
+            if (converter.extra == vol.ALLOW_EXTRA and len(self.columns) == len(residual_properties) and
+                    json_schema.get('type') in (None, 'object') and
+                    not json_schema.keys() - {'type', 'properties', 'required', 'title', 'description', 'examples'}):
+                # nothing left to validate record by record but the presence of the required keys
+                self.required = frozenset(json_schema.get('required', ()))
+        self.record_validator = converter.convert(residual, lazy=False)
+
+    def __call__(self, records):
+        results = []
+        errors = {}
+        required = self.required
+        for ind, record in enumerate(records):
+            if required is not None and type(record) is dict and required <= record.keys():
+                results.append(dict(record))
+                continue
+            try:
+                results.append(self.record_validator(record))
+            except vol.Invalid as e:
+                e.prepend([ind])
+                errors[ind] = e.errors if isinstance(e, vol.MultipleInvalid) else [e]
+                results.append(None)
+
+        for column in self.columns:
+            rows, values = [], []
+            for ind, record in enumerate(records):
+                value = record.get(column.name, MISSING) if isinstance(record, dict) else MISSING
+                if value is not MISSING:
+                    rows.append(ind)
+                    values.append(value)
+            for error in column.errors(rows, values):
+                errors.setdefault(error.path[0], []).append(error)
+
+        for name, transform_many in self.transformed:
+            rows = [ind for ind, result in enumerate(results)
+                    if ind not in errors and isinstance(result, dict) and name in result]
+            for ind, item in zip(rows, transform_many([results[ind][name] for ind in rows])):
+                if isinstance(item, vol.Invalid):
+                    item.prepend([ind, name])
+                    errors.setdefault(ind, []).extend(item.errors if isinstance(item, vol.MultipleInvalid) else [item])
+                else:
+                    results[ind][name] = item
+
+        if errors:
+            raise vol.MultipleInvalid([error for ind in sorted(errors) for error in errors[ind]])
+        return results
+
+
+def batch_convert(json_schema, converter=SchemaConverter, use_numpy=True):
+    return BatchValidator(json_schema, converter, use_numpy)
@@ -0,0 +1,172 @@
+# Caching of the results of validators, for instances (or json documents) validated over and over again
+import collections
+import copy
+import datetime
+import decimal
+import hashlib
+import json
+import marshal
+import threading
+import uuid
+
+import voluptuous as vol
+
+# marshal's format without references to already written objects, making its output depend on the values only
+MARSHAL_VERSION = 2
+DIGEST_SIZE = 16
+
+# the types of values shared by the results of a `CachedValidator`, as they can not be modified
+ATOMIC_TYPES = frozenset([
+    str, int, float, bool, type(None), bytes, decimal.Decimal, datetime.date, datetime.datetime, datetime.time,
+    datetime.timedelta, uuid.UUID,
+])
+
+CacheInfo = collections.namedtuple('CacheInfo', ['hits', 'misses', 'uncached', 'maxsize', 'currsize'])
+
+
+def sorted_keys(value):
+    """`value` with the keys of its dicts in sorted order (as marshal writes dicts in the order of their keys)"""
+    type_ = type(value)
+    if type_ is dict:
+        try:
+            keys = sorted(value)
+        except TypeError:  # keys of different types
+            keys = value
+        return {key: sorted_keys(value[key]) for key in keys}
+    if type_ is list:
+        return [sorted_keys(item) for item in value]
+    if type_ is tuple:
+        return tuple(sorted_keys(item) for item in value)
+    return value
+
+
+def instance_key(instance, sort_keys=False):
+    """The key of an instance of json data, made of its value and the exact types of its parts (e.g. `1`, `1.0` and
+    `True`, or lists and tuples, are told apart) - None for instances of other types. It depends on the order of the
+    keys of its dicts, unless `sort_keys`"""
+    try:
+        data = marshal.dumps(sorted_keys(instance) if sort_keys else instance, MARSHAL_VERSION)
+    except ValueError:
+        return None
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE, person=b'instance').digest()
+
+
+def document_key(document):
+    """The key of a json document, made of its text - the same objects with their keys in another order are other
+    documents"""
+    if isinstance(document, str):
+        document = document.encode('utf-8', 'surrogatepass')
+    return hashlib.blake2b(document, digest_size=DIGEST_SIZE, person=b'document').digest()
+
+
+def copy_value(value):
+    """A deep copy of `value`, sharing its parts of `ATOMIC_TYPES` only"""
+    type_ = type(value)
+    if type_ in ATOMIC_TYPES:
+        return value
+    if type_ is dict:
+        return {key: copy_value(item) for key, item in value.items()}
+    if type_ is list:
+        return [copy_value(item) for item in value]
+    return copy.deepcopy(value)
+
+
+def freeze_result(result):
+    """The form of `result` kept by the cache, and the function returning copies of `result` out of it"""
+    try:
+        return marshal.dumps(result, MARSHAL_VERSION), marshal.loads
+    except ValueError:  # e.g. transformed values
+        return copy_value(result), copy_value
+
+
+class CachedValidator:
+    """A validator with a bounded LRU cache of the results of `validator` (e.g. returned by `convert`), for the
+    instances seen over and over again (configs, heartbeats, retries). The instances are keyed by a digest of their
+    value, the json documents validated by `loads` by a digest of their text. The errors are cached too: the instances
+    failing the validation raise `vol.MultipleInvalid` with copies of the same errors.
+
+    Every call returns a copy of the cached result, so modifying it does not affect the cache. An instance equal to a
+    cached one but with the keys of its dicts in another order gets the same result, with the keys in the order of the
+    instance that was validated - the order of the keys is not preserved. The instances that are
+    not json data (e.g. of other types than dict, list, str, int, float, bool and None) are validated every time
+    (counted as `uncached`). The results of the validation must depend on the instances only, as of `Memo`"""
+
+    def __init__(self, validator, maxsize=1024):
+        self.validator = validator
+        self.maxsize = maxsize
+        self._results = collections.OrderedDict()  # key -> (result or None, thaw or None, errors or None)
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._uncached = 0
+
+    def __call__(self, instance):
+        key = instance_key(instance)
+        if key is None:
+            with self._lock:
+                self._uncached += 1
+            return self.validator(instance)
+        return self._validate(key, self.validator, instance, sort_keys=True)
+
+    def loads(self, document):
+        """Validates the json document (`str` or `bytes`)"""
+        return self._validate(document_key(document), self._validate_document, document)
+
+    def _validate_document(self, document):
+        return self.validator(json.loads(document))
+
+    def _validate(self, key, validate, instance, sort_keys=False):
+        keys = [key]
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None:
+                self._hits += 1
+                self._results.move_to_end(key)
+        if entry is None and sort_keys:
+            # an equal instance with the keys of its dicts in another order - the results are kept by both keys, so
+            # that the instances with the keys in the same order (the usual case) do not have to be sorted
+            sorted_key = instance_key(instance, sort_keys=True)
+            if sorted_key != key:
+                keys.append(sorted_key)
+                with self._lock:
+                    entry = self._results.get(sorted_key)
+                    if entry is not None:
+                        self._hits += 1
+                        self._results.move_to_end(sorted_key)
+                if entry is not None:
+                    self._store(keys[:1], entry)
+        if entry is None:
+            with self._lock:
+                self._misses += 1
+            try:
+                result = validate(instance)
+            except vol.MultipleInvalid as e:
+                self._store(keys, (None, None, copy.deepcopy(e.errors)))
+                raise
+            self._store(keys, freeze_result(result) + (None,))
+            return result
+        frozen, thaw, errors = entry
+        if errors is not None:
+            raise vol.MultipleInvalid(copy.deepcopy(errors))
+        return thaw(frozen)
+
+    def _store(self, keys, entry):
+        with self._lock:
+            for key in keys:
+                self._results[key] = entry
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def cache_info(self):
+        return CacheInfo(self._hits, self._misses, self._uncached, self.maxsize, len(self._results))
+
+    @property
+    def hit_rate(self):
+        calls = self._hits + self._misses + self._uncached
+        return self._hits / calls if calls else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._hits = self._misses = self._uncached = 0
+
+    def __repr__(self):
+        return 'CachedValidator({!r}, maxsize={})'.format(self.validator, self.maxsize)
@@ -1,7 +1,11 @@
 from collections import OrderedDict
 
+from opulent_schema.opulent_schema import SchemaConverter
+
 schemas = OrderedDict()
 added_keys = []
+# (keys, converter) -> the validator of the schema added with the keys
+validators = {}
 
 
 def add(*keys, schema):
@@ -13,3 +17,17 @@ def add(*keys, schema):
         dict_ = dict_[key]
 
     dict_[keys[-1]] = schema
+
+
+def get(*keys):
+    dict_ = schemas
+    for key in keys:
+        dict_ = dict_[key]
+    return dict_
+
+
+def validator(*keys, converter=SchemaConverter):
+    """The validator (made once) of the schema added with `keys`"""
+    if (keys, converter) not in validators:
+        validators.setdefault((keys, converter), converter.convert(get(*keys)))
+    return validators[keys, converter]
@@ -0,0 +1,347 @@
+# Decoding json documents guided by their json schema, validating the values as they are decoded
+import collections
+import copy
+import json
+import json.decoder
+import json.scanner
+import sys
+import threading
+
+import voluptuous as vol
+
+from opulent_schema.opulent_schema import SchemaConverter, TransformedField
+
+# how many decoders are cached by `loads`, the least recently used ones are dropped first
+DECODER_CACHE_SIZE = 256
+
+WHITESPACE = json.decoder.WHITESPACE
+WHITESPACE_STR = json.decoder.WHITESPACE_STR
+scanstring = json.decoder.scanstring
+# decodes the values the schema gives no guidance for, in C where available
+scan_once = json.scanner.make_scanner(json.JSONDecoder())
+
+# keywords of objects and arrays that need no checks besides the ones of their parts (and `required`)
+PLAIN_OBJECT_KEYWORDS = {'type', 'properties', 'required', 'title', 'description', 'examples', 'default'}
+PLAIN_ARRAY_KEYWORDS = {'type', 'items', 'title', 'description', 'examples', 'default'}
+# keywords and types of scalars checked without the validators converted from their schemas
+PLAIN_VALUE_KEYWORDS = {'type', 'minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum', 'minLength', 'maxLength',
+                        'title', 'description', 'examples', 'default'}
+PLAIN_VALUE_TYPES = {'integer': (int,), 'number': (int, float), 'string': (str,), 'boolean': (bool,),
+                     'null': (type(None),)}
+
+# the value of a part of the document that did not pass the validation
+FAILED = object()
+
+_decoders = collections.OrderedDict()
+_decoders_lock = threading.Lock()
+
+
+def skip_whitespace(s, idx):  # inlined in the loops below
+    if s[idx:idx + 1] in WHITESPACE_STR:
+        return WHITESPACE.match(s, idx).end()
+    return idx
+
+
+def scan_value(s, idx):
+    try:
+        return scan_once(s, idx)
+    except StopIteration as e:
+        raise json.JSONDecodeError('Expecting value', s, e.value) from None
+
+
+def passing_check(schema):
+    """For the plain schemas of scalars, a predicate telling the values that certainly pass `schema` (unchanged) - the
+    rest is left to the validator converted from it. None for the other schemas"""
+    if (type(schema) is not dict or schema.keys() - PLAIN_VALUE_KEYWORDS or not isinstance(schema.get('type'), str) or
+            schema['type'] not in PLAIN_VALUE_TYPES):
+        return None
+    types = PLAIN_VALUE_TYPES[schema['type']]
+    if schema['type'] in ('integer', 'number'):
+        (min_, min_included), (max_, max_included) = SchemaConverter.get_bounds(schema)
+        if min_ is None and max_ is None:
+            return lambda value: type(value) in types
+
+        def passes(value):
+            return (type(value) in types and
+                    (min_ is None or (value >= min_ if min_included else value > min_)) and
+                    (max_ is None or (value <= max_ if max_included else value < max_)))
+        return passes
+
+    min_length, max_length = schema.get('minLength'), schema.get('maxLength')
+    if schema['type'] != 'string' or (min_length is None and max_length is None):
+        return lambda value: type(value) in types
+
+    def passes(value):
+        return (type(value) is str and (min_length is None or len(value) >= min_length) and
+                (max_length is None or len(value) <= max_length))
+    return passes
+
+
+class ValueNode:
+    """Decodes a value with the stdlib scanner and validates it against `schema` at once. With `number_decoder` set, a
+    number is decoded from its text with it"""
+
+    def __init__(self, schema, converter, number_decoder=None):
+        self.schema = schema
+        self.converter = converter
+        self.number_decoder = number_decoder
+        self.passes = passing_check(schema)
+        self._validator = None
+        self._compiled = None
+
+    @property
+    def validator(self):
+        if self._validator is None:
+            self._validator = vol.Schema(self.converter.go(self.schema))
+        return self._validator
+
+    def decode(self, s, idx):
+        """Returns the decoded value, the validated one (`FAILED` if it is invalid) and the index past the value"""
+        try:
+            raw, end = scan_once(s, idx)
+        except StopIteration as e:
+            raise json.JSONDecodeError('Expecting value', s, e.value) from None
+        if self.number_decoder is not None and type(raw) in (int, float):
+            raw = self.number_decoder(s[idx:end])
+        elif self.passes is not None and self.passes(raw):
+            return raw, raw, end
+        if self._compiled is None:
+            # skips the entry point of `vol.Schema`, the errors are not kept anyway
+            self._compiled = self.validator._compiled
+        try:
+            return raw, self._compiled([], raw), end
+        except vol.Invalid:
+            return raw, FAILED, end
+
+
+class ContainerNode(ValueNode):
+    """Validates the parts of a container as they are decoded, and the rest of `schema` (`residual`, with the schemas
+    of the parts left out) once the whole container is. With no other keywords than `plain_keywords` in `schema`, the
+    residual checks are left to `check`"""
+
+    def __init__(self, schema, converter, residual, plain_keywords):
+        super().__init__(schema, converter)
+        if type(schema) is dict and not schema.keys() - plain_keywords:
+            self.residual = None
+        else:
+            validators = [converter.go(residual)]
+            if isinstance(schema, TransformedField):
+                validators.extend(converter.post_transformation_validators(schema))
+            self.residual = vol.Schema(vol.All(*validators))
+
+    def check(self, result):
+        if self.residual is None:
+            return result
+        try:
+            return self.residual(result)
+        except vol.Invalid:
+            return FAILED
+
+
+class ObjectNode(ContainerNode):
+    """Decodes an object, validating the values of the `properties` (with their `fields` nodes) as they are decoded.
+    The keys of the `properties` are interned - all the decoded objects share them"""
+
+    def __init__(self, schema, converter, fields):
+        residual = dict(schema, properties=dict.fromkeys(schema['properties'], {}))
+        super().__init__(schema, converter, residual, PLAIN_OBJECT_KEYWORDS)
+        self.fields = fields
+        self.keys = {key: key for key in fields}
+        self.required = list(schema.get('required', []))
+        # as voluptuous does, the same copy of a default is validated for every object missing the property
+        self.defaults = {key: copy.deepcopy(subschema['default']) for key, subschema in schema['properties'].items()
+                         if isinstance(subschema, dict) and 'default' in subschema and key not in self.required}
+        self.allowed = None
+        if converter.extra == vol.PREVENT_EXTRA:
+            self.allowed = self.keys.keys() | set(self.required)
+
+    def decode(self, s, idx):
+        if s[idx:idx + 1] != '{':
+            return super().decode(s, idx)
+        raw, result = {}, {}
+        failed = False
+        fields, keys = self.fields, self.keys
+        idx += 1
+        if s[idx:idx + 1] in WHITESPACE_STR:
+            idx = WHITESPACE.match(s, idx).end()
+        if s[idx:idx + 1] == '}':
+            idx += 1
+        else:
+            while True:
+                if s[idx:idx + 1] != '"':
+                    raise json.JSONDecodeError('Expecting property name enclosed in double quotes', s, idx)
+                key, idx = scanstring(s, idx + 1)
+                key = keys.get(key, key)
+                if s[idx:idx + 1] != ':':
+                    idx = WHITESPACE.match(s, idx).end()
+                    if s[idx:idx + 1] != ':':
+                        raise json.JSONDecodeError("Expecting ':' delimiter", s, idx)
+                idx += 1
+                if s[idx:idx + 1] == ' ':  # the usual separator
+                    idx += 1
+                if s[idx:idx + 1] in WHITESPACE_STR:
+                    idx = WHITESPACE.match(s, idx).end()
+                node = fields.get(key)
+                if node is None:  # validated along with the whole object
+                    value, idx = scan_value(s, idx)
+                    raw[key] = result[key] = value
+                else:
+                    raw[key], value, idx = node.decode(s, idx)
+                    if value is FAILED:
+                        failed = True
+                    else:
+                        result[key] = value
+                if s[idx:idx + 1] in WHITESPACE_STR:
+                    idx = WHITESPACE.match(s, idx).end()
+                delimiter = s[idx:idx + 1]
+                idx += 1
+                if delimiter == '}':
+                    break
+                if delimiter != ',':
+                    raise json.JSONDecodeError("Expecting ',' delimiter", s, idx - 1)
+                if s[idx:idx + 1] == ' ':
+                    idx += 1
+                if s[idx:idx + 1] in WHITESPACE_STR:
+                    idx = WHITESPACE.match(s, idx).end()
+        if failed:
+            return raw, FAILED, idx
+        return raw, self.check(result), idx
+
+    def check(self, result):
+        for key, default in self.defaults.items():
+            if key not in result:
+                try:
+                    result[key] = self.fields[key].validator(default)
+                except vol.Invalid:
+                    return FAILED
+        if self.residual is not None:
+            return super().check(result)
+        for key in self.required:
+            if key not in result:
+                return FAILED
+        if self.allowed is not None and not result.keys() <= self.allowed:
+            return FAILED
+        return result
+
+
+class ArrayNode(ContainerNode):
+    """Decodes an array, validating its items (with the `items` node) as they are decoded"""
+
+    def __init__(self, schema, converter, items):
+        super().__init__(schema, converter, dict(schema, items={}), PLAIN_ARRAY_KEYWORDS)
+        self.items = items
+
+    def decode(self, s, idx):
+        if s[idx:idx + 1] != '[':
+            return super().decode(s, idx)
+        raw, result = [], []
+        failed = False
+        idx += 1
+        if s[idx:idx + 1] in WHITESPACE_STR:
+            idx = WHITESPACE.match(s, idx).end()
+        if s[idx:idx + 1] == ']':
+            idx += 1
+        else:
+            decode = self.items.decode
+            while True:
+                item_raw, item, idx = decode(s, idx)
+                raw.append(item_raw)
+                if item is FAILED:
+                    failed = True
+                else:
+                    result.append(item)
+                if s[idx:idx + 1] in WHITESPACE_STR:
+                    idx = WHITESPACE.match(s, idx).end()
+                delimiter = s[idx:idx + 1]
+                idx += 1
+                if delimiter == ']':
+                    break
+                if delimiter != ',':
+                    raise json.JSONDecodeError("Expecting ',' delimiter", s, idx - 1)
+                if s[idx:idx + 1] == ' ':
+                    idx += 1
+                if s[idx:idx + 1] in WHITESPACE_STR:
+                    idx = WHITESPACE.match(s, idx).end()
+        if failed:
+            return raw, FAILED, idx
+        return raw, self.check(result), idx
+
+
+def is_guided(schema, converter, type_):
+    """Whether the values of an object's `properties` or an array's `items` can be validated on their own, before the
+    rest of `schema`"""
+    if not isinstance(schema, dict):
+        return False
+    types = schema.get('type')
+    if types and type_ not in ([types] if isinstance(types, str) else types):
+        return False
+    if isinstance(schema, TransformedField) and converter.pre_transformation_validators(schema):
+        return False
+    if type_ == 'object':
+        return isinstance(schema.get('properties'), dict) and bool(schema['properties'])
+    # `uniqueItems` and `contains` check the items before they are transformed
+    return isinstance(schema.get('items'), dict) and not {'uniqueItems', 'contains'} & schema.keys()
+
+
+def make_node(schema, converter, decode_numbers):
+    if is_guided(schema, converter, 'object'):
+        fields = {sys.intern(key): make_node(subschema, converter, decode_numbers)
+                  for key, subschema in schema['properties'].items()}
+        return ObjectNode(schema, converter, fields)
+    if is_guided(schema, converter, 'array'):
+        items = make_node(schema['items'], converter, decode_numbers)
+        # the stdlib scanner and the usual validation of the items are quicker than decoding them one by one
+        if isinstance(items, ContainerNode) or items.number_decoder is not None:
+            return ArrayNode(schema, converter, items)
+    number_decoder = None
+    if decode_numbers and isinstance(schema, TransformedField):
+        number_decoder = schema.number_decoder
+    return ValueNode(schema, converter, number_decoder)
+
+
+class SchemaDecoder:
+    """Decodes json documents (`str` or `bytes`) and validates them against `json_schema` in a single pass: the values
+    of the `properties` of objects and the `items` of arrays are validated right after they are decoded, the rest of an
+    object's (or array's) schema once it is decoded whole. Returns what the validator converted from `json_schema` would
+    return for the decoded document, and raises the same errors - an invalid document is validated again in full, to
+    get them.
+
+    With `decode_numbers`, the numbers of `TransformedField`s with a `number_decoder` are decoded from their text by it
+    (e.g. into `Decimal`s, with no rounding to floats)"""
+
+    def __init__(self, json_schema, converter=SchemaConverter, decode_numbers=False):
+        self.json_schema = json_schema
+        self.converter = converter
+        self.root = make_node(json_schema, converter, decode_numbers)
+
+    def decode(self, document):
+        if isinstance(document, (bytes, bytearray)):
+            document = document.decode(json.detect_encoding(document), 'surrogatepass')
+        if document.startswith('\ufeff'):
+            raise json.JSONDecodeError('Unexpected UTF-8 BOM (decode using utf-8-sig)', document, 0)
+        raw, value, idx = self.root.decode(document, skip_whitespace(document, 0))
+        idx = skip_whitespace(document, idx)
+        if idx != len(document):
+            raise json.JSONDecodeError('Extra data', document, idx)
+        if value is FAILED:
+            return self.root.validator(raw)
+        return value
+
+    __call__ = decode
+
+
+def loads(document, json_schema, converter=SchemaConverter, decode_numbers=False):
+    """Decodes and validates `document` with a `SchemaDecoder`. The decoders are cached per (converter, schema,
+    decode_numbers), keyed by the identity of the schema - it should not be modified afterwards"""
+    key = (converter, id(json_schema), decode_numbers)
+    with _decoders_lock:
+        decoder = _decoders.get(key)
+        if decoder is not None:
+            _decoders.move_to_end(key)
+    if decoder is None:
+        decoder = SchemaDecoder(json_schema, converter, decode_numbers)
+        with _decoders_lock:
+            _decoders[key] = decoder
+            if len(_decoders) > DECODER_CACHE_SIZE:
+                _decoders.popitem(last=False)
+    return decoder.decode(document)
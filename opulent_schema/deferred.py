@@ -0,0 +1,120 @@
+# Validation with deferred post-transformations, applied when the validated values are first read
+import collections.abc
+
+import voluptuous as vol
+
+from opulent_schema.pending import Materializing, Pending, PendingSchemaConverter, apply, materialize
+
+
+def view(value, path=None):
+    if isinstance(value, dict):
+        return DeferredMapping(value, path)
+    if isinstance(value, list):
+        return DeferredSequence(value, path)
+    return value
+
+
+class DeferredView:
+    """A view of a validated container, without methods modifying it. The deferred transformations of its items are
+    applied when the items are first read, and their results are cached in place of them in the container; a failing
+    one raises `vol.Invalid` then. Nested containers are returned as views as well"""
+    __slots__ = ('_data', '_path')
+
+    def __init__(self, data, path=None):
+        self._data = data
+        self._path = path or []
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        if isinstance(value, Pending):
+            # the results of transformations are returned as they are
+            value = self._data[key] = apply(value, self._path + [key])
+            return value
+        return view(value, self._path + [key])
+
+    def __len__(self):
+        return len(self._data)
+
+    def materialize(self):
+        """Applies all the deferred transformations, returns the validated (and transformed) instance"""
+        return materialize(self._data, self._path)
+
+    def __eq__(self, other):
+        """Compares the transformed values - a view with failing transformations equals only itself"""
+        try:
+            if isinstance(other, DeferredView):
+                other = other.materialize()
+            return self.materialize() == other
+        except vol.Invalid:
+            return self is other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self._data)
+
+
+class DeferredMapping(DeferredView, collections.abc.Mapping):
+    __slots__ = ()
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+class DeferredSequence(DeferredView, collections.abc.Sequence):
+    __slots__ = ()
+
+    def __getitem__(self, ind):
+        if isinstance(ind, slice):
+            return [self[i] for i in range(len(self._data))[ind]]
+        if ind < 0:
+            ind += len(self._data)
+        return super().__getitem__(ind)
+
+
+class DeferredValidator:
+    """Counterpart of the callables returned by `convert`, returning views of the validated instances (see
+    `DeferredView`). A post-transformation of the whole instance is applied at once"""
+
+    def __init__(self, validator):
+        self.validator = validator
+
+    def __call__(self, instance):
+        result = self.validator(instance)
+        if isinstance(result, Pending):
+            return apply(result, [])
+        return view(result)
+
+
+class DeferredSchemaConverter(PendingSchemaConverter):
+    """Defers the post-transformations of `TransformedField`s until the values are read. The json schema checks run in
+    full: the transformed values checked by the keywords of an enclosing value (e.g. its `allOf` or `dependencies`) are
+    transformed during the validation, the rest are left as placeholders (see `PendingSchemaConverter`)"""
+    after_pending = Materializing
+
+    @classmethod
+    def batch_post_transformation(cls, schema):
+        # batch transformations would be applied eagerly
+        return None
+
+    @classmethod
+    def deferred_convert(cls, json_schema):
+        return DeferredValidator(cls.convert(json_schema))
+
+    @classmethod
+    def deferred_check_and_convert(cls, json_schema):
+        return DeferredValidator(cls.check_and_convert(json_schema))
+
+
+class ExactDeferredSchemaConverter(DeferredSchemaConverter):
+    extra = vol.PREVENT_EXTRA
+
+
+deferred_convert = DeferredSchemaConverter.deferred_convert
+exact_deferred_convert = ExactDeferredSchemaConverter.deferred_convert
+
+deferred_check_and_convert = DeferredSchemaConverter.deferred_check_and_convert
+exact_deferred_check_and_convert = ExactDeferredSchemaConverter.deferred_check_and_convert
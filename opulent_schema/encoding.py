@@ -0,0 +1,189 @@
+# Encoding validated instances into json text, guided by the json schema they were validated against
+import collections
+import decimal
+import json
+import json.encoder
+import threading
+
+from opulent_schema.opulent_schema import SchemaConverter, TransformedField, UnGettableError
+
+# how many encoders are cached by `dumps`, the least recently used ones are dropped first
+ENCODER_CACHE_SIZE = 256
+
+KEY_SEPARATOR = ': '
+ITEM_SEPARATOR = ', '
+
+c_make_encoder = json.encoder.c_make_encoder
+encode_string = json.encoder.encode_basestring_ascii
+int_repr = int.__repr__
+float_repr = float.__repr__
+INFINITY = float('inf')
+
+_encoders = collections.OrderedDict()
+_encoders_lock = threading.Lock()
+
+
+def inverse_transformation(schema):
+    """The inverse transformation of the `TransformedField` `schema`, None if it has none"""
+    try:
+        return schema.get_inverse_transformation()
+    except UnGettableError:
+        return None
+
+
+def has_transformed_fields(schema, memo=None):
+    """Whether there are `TransformedField`s in `schema`, i.e. whether the instances validated against it may contain
+    values that are not json-serializable. `memo` keeps the results for the parts of the schema (by their ids, with
+    the parts, for their ids not to be reused), so that each part is checked once"""
+    if isinstance(schema, TransformedField):
+        return True
+    if not isinstance(schema, (dict, list)):
+        return False
+    if memo is None:
+        memo = {}
+    if id(schema) not in memo:
+        values = schema.values() if isinstance(schema, dict) else schema
+        memo[id(schema)] = (schema, any(has_transformed_fields(value, memo) for value in values))
+    return memo[id(schema)][1]
+
+
+def allows(schema, type_):
+    types = schema.get('type')
+    return not types or type_ in ([types] if isinstance(types, str) else types)
+
+
+def make_generic_encoder(default):
+    """The stdlib encoder (in C where available), with the same output as `json.dumps(value, default=default)`"""
+    encoder = json.JSONEncoder(default=default)
+    if c_make_encoder is None:  # pragma: no cover
+        return encoder.encode
+    c_encoder = c_make_encoder(None, encoder.default, encode_string, None, KEY_SEPARATOR, ITEM_SEPARATOR, False, False,
+                               True)
+    return lambda value: ''.join(c_encoder(value, 0))
+
+
+class SchemaEncoder:
+    """Encodes instances validated against `json_schema` into json text, with the output of `json.dumps` (and its
+    default separators). The parts of the schema with `TransformedField`s are compiled into encoders of their own:
+
+    - the values of `TransformedField`s are turned back into json data by their inverse transformations (see
+      `TransformedField._inverse_transform`) and encoded according to their schemas; the ones with no inverse
+      transformation are left to `default`
+    - the keys of the `properties` of objects are encoded once, when the encoder is made
+    - `Decimal`s are encoded as json numbers, exactly
+
+    The rest (i.e. the json data) is encoded by the stdlib encoder at once, with `default` (as in `json.dumps`) called
+    for the values it cannot encode. It is slower than `json.dumps` with a `default` converting the transformed values,
+    the parts with `TransformedField`s being encoded in python"""
+
+    def __init__(self, json_schema, converter=SchemaConverter, default=None):
+        self.json_schema = json_schema
+        self.converter = converter
+        self.encode_any = make_generic_encoder(default)
+        self._transformed = {}  # the memo of `has_transformed_fields`
+        self.encode = self.make_encoder(json_schema)
+
+    def __call__(self, instance):
+        return self.encode(instance)
+
+    def make_encoder(self, schema):
+        if not has_transformed_fields(schema, self._transformed):
+            return self.encode_value
+        if isinstance(schema, TransformedField):
+            return self.transformed_encoder(schema)
+        if allows(schema, 'object') and (isinstance(schema.get('properties'), dict) or
+                                         isinstance(schema.get('additionalProperties'), dict)):
+            return self.object_encoder(schema)
+        if allows(schema, 'array') and isinstance(schema.get('items'), dict):
+            return self.array_encoder(schema)
+        return self.encode_value  # e.g. `anyOf` - which of the subschemas describes a value is not known here
+
+    def transformed_encoder(self, schema):
+        inverse = inverse_transformation(schema)
+        if inverse is None:
+            return self.encode_value
+        if self.converter.pre_transformation_validators(schema):
+            encode = self.encode_value  # the schema is not the one of the data before the transformations
+        else:
+            encode = self.make_encoder(dict(schema))
+
+        def encode_transformed(value):
+            return encode(inverse(value))
+        return encode_transformed
+
+    def object_encoder(self, schema):
+        properties = schema.get('properties') if isinstance(schema.get('properties'), dict) else {}
+        prefixes = {key: encode_string(key) + KEY_SEPARATOR for key in properties}
+        encoders = {key: self.make_encoder(subschema) for key, subschema in properties.items()}
+        fields = {key: (prefixes[key], encoders[key]) for key in prefixes}
+        # with other properties unlikely, the objects are encoded on the assumption there are none
+        assume_known = not schema.get('additionalProperties') and not schema.get('patternProperties')
+        # the quicker encoder of strings, raising `TypeError` for other values
+        encoders.update((key, encode_string) for key, subschema in properties.items()
+                        if isinstance(subschema, dict) and subschema.get('type') == 'string' and
+                        not has_transformed_fields(subschema, self._transformed))
+        additional = None
+        if isinstance(schema.get('additionalProperties'), dict) and not schema.get('patternProperties'):
+            additional = self.make_encoder(schema['additionalProperties'])
+        encode_value, encode_any = self.encode_value, self.encode_any
+
+        def encode_object(value):
+            if not isinstance(value, dict):
+                return encode_value(value)
+            if assume_known:
+                try:
+                    return '{' + ITEM_SEPARATOR.join([prefixes[key] + encoders[key](item)
+                                                      for key, item in value.items()]) + '}'
+                except (KeyError, TypeError):  # encoded again below, to get the same output (or error) anyway
+                    pass
+            parts = []
+            for key, item in value.items():
+                field = fields.get(key)
+                if field is not None:
+                    parts.append(field[0] + field[1](item))
+                elif additional is not None and type(key) is str:
+                    parts.append(encode_string(key) + KEY_SEPARATOR + additional(item))
+                else:
+                    parts.append(encode_any({key: item})[1:-1])
+            return '{' + ITEM_SEPARATOR.join(parts) + '}'
+        return encode_object
+
+    def array_encoder(self, schema):
+        encode, encode_value = self.make_encoder(schema['items']), self.encode_value
+
+        def encode_array(value):
+            if not isinstance(value, list):
+                return encode_value(value)
+            return '[' + ITEM_SEPARATOR.join([encode(item) for item in value]) + ']'
+        return encode_array
+
+    def encode_value(self, value):
+        type_ = type(value)
+        if type_ is str:
+            return encode_string(value)
+        if type_ is int:
+            return int_repr(value)
+        if type_ is float and -INFINITY < value < INFINITY:
+            return float_repr(value)
+        if type_ is decimal.Decimal and value.is_finite():
+            return str(value)
+        if type_ is decimal.Decimal:
+            return self.encode_any(float(value))  # as `json.dumps` encodes the floats that are not finite
+        return self.encode_any(value)
+
+
+def dumps(instance, json_schema, converter=SchemaConverter, default=None):
+    """Encodes `instance` with a `SchemaEncoder`. The encoders are cached per (converter, schema, default), keyed by the
+    identity of the schema - it should not be modified afterwards"""
+    key = (converter, id(json_schema), default)
+    with _encoders_lock:
+        encoder = _encoders.get(key)
+        if encoder is not None:
+            _encoders.move_to_end(key)
+    if encoder is None:
+        encoder = SchemaEncoder(json_schema, converter, default)
+        with _encoders_lock:
+            _encoders[key] = encoder
+            if len(_encoders) > ENCODER_CACHE_SIZE:
+                _encoders.popitem(last=False)
+    return encoder.encode(instance)
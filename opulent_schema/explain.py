@@ -0,0 +1,204 @@
+# Human readable description of the validators converted from a json schema, for reviewing schemas
+import time
+import tracemalloc
+
+import voluptuous as vol
+
+from opulent_schema import ext_validators
+from opulent_schema.opulent_schema import (SchemaConverter, IntegralNumber, Not, Equalizer, In, OneOf,
+                                           ExtendedExactSequence, FullPropertiesSchema, Contains, MultipleOf, AnyPass,
+                                           Unique, ListSchema)
+from opulent_schema.profiling import schema_pointers
+
+# relative costs of the validators, a type check being 1
+FORMAT_COSTS = {'Datetime': 20, 'Date': 15, 'Email': 10, 'Hostname': 8, 'IP': 6}
+REGEX_COST = 4
+COERCE_COST = 2
+MULTIPLE_OF_COST = 3
+
+
+class PointerNode:
+    """Marks the validator converted from the part of the schema at `pointer`"""
+
+    def __init__(self, validator, pointer):
+        self.validator = validator
+        self.pointer = pointer
+
+    def __call__(self, value):
+        return vol.Schema(self.validator)(value)
+
+
+class Node:
+    def __init__(self, kind, detail='', weight=1, children=(), pointer=None):
+        self.kind = kind
+        self.detail = detail
+        self.weight = weight
+        self.children = list(children)  # (label, Node) pairs
+        self.pointer = pointer
+
+    @property
+    def cost(self):
+        return self.weight + sum(child.cost for _, child in self.children)
+
+    def lines(self, label=None, indent=0):
+        line = '{}{}{}{}'.format('  ' * indent, '{}: '.format(label) if label is not None else '', self.kind,
+                                 ' {}'.format(self.detail) if self.detail else '')
+        if self.pointer is not None:
+            line += '  <{}>'.format(self.pointer)
+        yield '{}  [cost {:g}]'.format(line, self.cost)
+        for child_label, child in self.children:
+            yield from child.lines(child_label, indent + 1)
+
+
+class Explanation:
+    """The tree of validators converted from `json_schema`, each node with the json pointer of the part of the schema
+    it was converted from (when it corresponds to a subschema), its kind and estimated cost: the relative time of
+    validating an instance with every property present and a single item in every array. Also: the number of regular
+    expressions and of `vol.Schema` objects kept in the tree, and the time and memory taken by the conversion"""
+
+    def __init__(self, json_schema, converter=SchemaConverter):
+        self.regexes = 0
+        self.schemas = 0
+
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        validator = vol.Schema(converter.go(json_schema))
+        self.compile_time = time.perf_counter() - start
+        self.memory = tracemalloc.get_traced_memory()[0] - before
+        if not tracing:
+            tracemalloc.stop()
+        del validator
+
+        pointers = schema_pointers(json_schema)
+
+        class ExplainingConverter(converter):
+            @classmethod
+            def go(cls, schema):
+                validator = super().go(schema)
+                if id(schema) not in pointers or validator is None:
+                    return validator
+                return PointerNode(validator, pointers[id(schema)][1])
+
+        self.tree = self.describe(vol.Schema(ExplainingConverter.go(json_schema)))
+
+    @property
+    def cost(self):
+        return self.tree.cost
+
+    def __str__(self):
+        return '\n'.join([
+            'compile time: {:.3f} ms, memory: {:.1f} KiB'.format(self.compile_time * 1000, self.memory / 1024),
+            'regexes: {}, schemas: {}, estimated cost: {:g}'.format(self.regexes, self.schemas, self.cost),
+            '',
+            *self.tree.lines(),
+        ])
+
+    def describe(self, validator):
+        if isinstance(validator, PointerNode):
+            node = self.describe(validator.validator)
+            if node.pointer is None:
+                node.pointer = validator.pointer
+            return node
+        if isinstance(validator, vol.Schema):
+            self.schemas += 1
+            if isinstance(validator.schema, dict):
+                return self.describe_dict(validator.schema, validator.extra)
+            return self.describe(validator.schema)
+        if isinstance(validator, dict):
+            return self.describe_dict(validator, vol.PREVENT_EXTRA)
+        if isinstance(validator, list):
+            return Node('items', children=[(None, self.describe(item)) for item in validator])
+        if validator is None or isinstance(validator, type):
+            return Node('type', getattr(validator, '__name__', 'null'))
+        if isinstance(validator, IntegralNumber):
+            return Node('type', 'integer')
+        if isinstance(validator, (vol.All, vol.Any, OneOf)):
+            kind = {vol.All: 'All', vol.Any: 'Any', OneOf: 'OneOf'}[type(validator)]
+            schemas = getattr(validator, '_schemas', None)
+            if schemas is not None:  # i.e. OneOf
+                children = schemas
+            else:
+                children = validator.validators
+            return Node(kind, repr(validator.msg) if getattr(validator, 'msg', None) else '', 0,
+                        [(None, self.describe(child)) for child in children])
+        if isinstance(validator, Not):
+            return Node('Not', weight=0, children=[(None, self.describe(validator.schema))])
+        if isinstance(validator, vol.Msg):
+            return Node('Msg', repr(validator.msg), 0, [(None, self.describe(validator.schema))])
+        if isinstance(validator, vol.Coerce):
+            return Node('Coerce', getattr(validator.type, '__qualname__', repr(validator.type)), COERCE_COST)
+        if isinstance(validator, vol.Match):
+            self.regexes += 1
+            return Node('regex', repr(validator.pattern.pattern), REGEX_COST)
+        if isinstance(validator, vol.Range):
+            return Node('Range', '{}{}, {}{}'.format(
+                '[' if validator.min_included else '(', '-inf' if validator.min is None else validator.min,
+                'inf' if validator.max is None else validator.max, ']' if validator.max_included else ')'))
+        if isinstance(validator, vol.Length):
+            return Node('Length', '[{}, {}]'.format(validator.min, validator.max))
+        if isinstance(validator, In):
+            return Node('enum', '{} values'.format(len(validator.container)), 1 + len(validator.container) // 16)
+        if isinstance(validator, Equalizer):
+            return Node('const')
+        if isinstance(validator, MultipleOf):
+            return Node('MultipleOf', str(validator.divider), MULTIPLE_OF_COST)
+        if isinstance(validator, Contains):
+            return Node('Contains', ', '.join(map(repr, validator.elements)), len(validator.elements))
+        if isinstance(validator, Unique):
+            return Node('Unique')
+        if isinstance(validator, AnyPass):
+            return Node('contains', children=[(None, self.describe(validator.schema))])
+        if isinstance(validator, ListSchema):
+            return Node('items', 'from {}'.format(validator.start) if validator.start else '',
+                        children=[(None, self.describe(validator.schema))])
+        if isinstance(validator, ExtendedExactSequence):
+            return Node('tuple items', children=[(ind, self.describe(schema))
+                                                 for ind, schema in enumerate(validator._schemas)])
+        if isinstance(validator, FullPropertiesSchema):
+            self.regexes += len(validator.patterns)
+            children = [('pattern {!r}'.format(pattern.pattern), self.describe(schema))
+                        for pattern, schema in validator.patterns]
+            if validator.additional_schema is not None:
+                children.append(('additional', self.describe(validator.additional_schema)))
+            if validator.properties:
+                children.insert(0, ('properties', self.describe_dict(validator._properties, vol.ALLOW_EXTRA)))
+            parts = [('properties', validator.properties), ('patternProperties', validator.patterns),
+                     ('additionalProperties', validator.additional_schema is not None)]
+            return Node(' and '.join(name for name, present in parts if present),
+                        weight=REGEX_COST * len(validator.patterns), children=children)
+        name = type(validator).__name__
+        wrapped = getattr(validator, '__wrapped__', None)  # validators made with `vol.validators.message`
+        if wrapped is not None:
+            name = wrapped.__name__
+        if name in FORMAT_COSTS:
+            if isinstance(validator, ext_validators.Hostname):
+                self.regexes += 1
+            return Node('format', name, FORMAT_COSTS[name])
+        return Node('callable', name)
+
+    def describe_dict(self, schema, extra):
+        children = []
+        for key, value in schema.items():
+            if isinstance(key, vol.Required):
+                label = 'required {!r}'.format(key.schema)
+            elif isinstance(key, vol.Optional):
+                label = 'optional {!r}'.format(key.schema)
+            elif isinstance(key, vol.Match):
+                self.regexes += 1
+                label = 'matching {!r}'.format(key.pattern.pattern)
+            elif isinstance(key, type):
+                label = 'any {}'.format(key.__name__)
+            else:  # e.g. `propertyNames`
+                children.append(('keys', self.describe(key)))
+                label = 'values'
+            children.append((label, self.describe(value)))
+        extra = {vol.ALLOW_EXTRA: 'ALLOW_EXTRA', vol.PREVENT_EXTRA: 'PREVENT_EXTRA',
+                 vol.REMOVE_EXTRA: 'REMOVE_EXTRA'}[extra]
+        return Node('object', 'extra={}'.format(extra), 1, children)
+
+
+def explain(json_schema, converter=SchemaConverter):
+    return Explanation(json_schema, converter)
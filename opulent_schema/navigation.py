@@ -0,0 +1,48 @@
+# Helpers for validating parts of instances: finding the subschema describing a part of an instance and telling which
+# keywords of a schema depend only on the "shape" (keys, length) of an object or an array, and not on its contents
+ANNOTATION_KEYWORDS = {'title', 'description', 'default', 'examples'}
+OBJECT_SHAPE_KEYWORDS = {'properties', 'additionalProperties', 'required', 'minProperties', 'maxProperties',
+                         'dependencies', 'propertyNames'}
+ARRAY_SHAPE_KEYWORDS = {'items', 'minItems', 'maxItems'}
+SHAPE_KEYWORDS = {'type'} | ANNOTATION_KEYWORDS | OBJECT_SHAPE_KEYWORDS | ARRAY_SHAPE_KEYWORDS
+
+# a schema that accepts anything, but is truthy (`additionalProperties` are ignored when falsy)
+ANYTHING = {'description': 'anything'}
+
+
+def is_shape_only(schema):
+    """Checks if the validation of an instance against `schema` can be split into validating the instance's items
+    against their subschemas (see `child_schema`) and validating the instance against `shallow_schema(schema)`"""
+    if type(schema) is not dict or schema.keys() - SHAPE_KEYWORDS:
+        return False
+    if 'items' in schema and not isinstance(schema['items'], dict):
+        return False
+    if not all(isinstance(dependency, list) for dependency in schema.get('dependencies', {}).values()):
+        return False
+    return True
+
+
+def child_schema(schema, key):
+    """The subschema an item of an instance (the value under `key` of an object or the item at index `key` of an array)
+    is validated against, in a schema for which `is_shape_only` is true"""
+    if isinstance(key, int):
+        return schema.get('items', {})
+    properties = schema.get('properties', {})
+    if key in properties:
+        return properties[key]
+    return schema.get('additionalProperties') or {}
+
+
+def shallow_schema(schema):
+    """`schema` without the parts validating the items of an instance. The subschemas of properties with a default are
+    kept, so that the defaults are still validated and transformed when inserted"""
+    shallow = dict(schema)
+    if 'properties' in shallow:
+        shallow['properties'] = {
+            key: prop_schema if isinstance(prop_schema, dict) and 'default' in prop_schema else {}
+            for key, prop_schema in schema['properties'].items()
+        }
+    if shallow.get('additionalProperties'):
+        shallow['additionalProperties'] = ANYTHING
+    shallow.pop('items', None)
+    return shallow
@@ -1,14 +1,74 @@
 import collections
 import copy
 import decimal
+import functools
+import inspect
 import numbers
 import re
+import threading
 from typing import Dict, Callable, Container
 
 import voluptuous as vol
 from opulent_schema import ext_validators
 
 
+class LazyInvalid(vol.Invalid):
+    """`vol.Invalid` formatting its message (`template.format(*args)`) and putting its path together only when they are
+    needed, so that errors caught and discarded at once (by `Not`, `vol.Any`, `OneOf`, ...) cost next to nothing"""
+
+    def __init__(self, template, *args, path=None, error_type=None):
+        Exception.__init__(self, template)
+        self.template = template
+        self.template_args = args
+        self._message = None
+        self._path = path or []
+        self._prefixes = []
+        self.error_type = error_type
+
+    @property
+    def args(self):
+        return (self.msg,)
+
+    @property
+    def msg(self):
+        if self._message is None:
+            self._message = self.template.format(*self.template_args)
+        return self._message
+
+    @property
+    def error_message(self):
+        return self.msg
+
+    @property
+    def path(self):
+        if self._prefixes:
+            path = []
+            for prefix in reversed(self._prefixes):
+                path.extend(prefix)
+            path.extend(self._path)
+            self._path = path
+            self._prefixes = []
+        return self._path
+
+    def prepend(self, path):
+        self._prefixes.append(path)
+
+    def __str__(self):
+        output = self.msg
+        if self.error_type:
+            output += ' for ' + self.error_type
+        path = self.path
+        return output + (' @ data[%s]' % ']['.join(map(repr, path)) if path else '')
+
+    def __reduce__(self):
+        # copied and pickled with the formatted message, the arguments of the template may not be
+        return type(self), ('{}', self.msg), {'_path': self.path, 'error_type': self.error_type}
+
+
+class LazyInInvalid(LazyInvalid, vol.InInvalid):
+    pass
+
+
 class IntegralNumber:
     def __call__(self, value):
         try:
@@ -45,7 +105,7 @@ class Equalizer:
                 return v
         except Exception:
             pass
-        raise vol.Invalid('Value not equal to: {}'.format(self.expected))
+        raise LazyInvalid('Value not equal to: {}', self.expected)
 
     def __repr__(self):
         return 'Equalizer({})'.format(self.expected)
@@ -55,9 +115,12 @@ class In(vol.In):
 
     def __call__(self, v):
         try:
-            return super().__call__(v)
-        except vol.InInvalid:
-            raise vol.InInvalid('{} not in {}'.format(v, self.container))
+            missing = v not in self.container
+        except TypeError:
+            missing = True
+        if missing:
+            raise LazyInInvalid('{} not in {}', v, self.container)
+        return v
 
 
 def sorted_dict_items(dict_):
@@ -66,6 +129,32 @@ def sorted_dict_items(dict_):
     return sorted(dict_.items(), key=lambda x: x[0])
 
 
+def freeze(value):
+    """Hashable counterpart of a json-like value. Frozen values are equal if and only if the values are equal. Raises
+    `TypeError` when hashed if `value` contains other unhashable objects"""
+    if isinstance(value, dict):
+        return frozenset((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+# the keywords of the validation of the parts of objects and arrays
+OBJECT_KEYWORDS = frozenset(['properties', 'additionalProperties', 'patternProperties', 'maxProperties',
+                             'minProperties', 'required', 'dependencies', 'propertyNames'])
+ARRAY_KEYWORDS = frozenset(['items', 'additionalItems', 'maxItems', 'minItems', 'uniqueItems', 'contains'])
+
+
+def has_parts_keywords(schema):
+    """Checks if `schema` (or any schema within it) has keywords validating the parts of objects or arrays, i.e. if the
+    errors of its validation can be about the parts of the value"""
+    if isinstance(schema, dict):
+        return bool((OBJECT_KEYWORDS | ARRAY_KEYWORDS) & schema.keys()) or any(map(has_parts_keywords, schema.values()))
+    if isinstance(schema, list):
+        return any(map(has_parts_keywords, schema))
+    return False
+
+
 def is_type(schema, *types):
     if 'type' not in schema:
         return False
@@ -108,15 +197,47 @@ class OneOf:
         return 'OneOf({})'.format(", ".join(repr(v) for v in self.validators))
 
 
+class ErrorCollector:
+    """Gathers the errors of the items of a container. Raises `vol.MultipleInvalid` as soon as `max_errors` errors
+    have been gathered (`None` means no limit), otherwise - when `check` is called"""
+
+    def __init__(self, max_errors=None):
+        self.max_errors = max_errors
+        self.errors = []
+
+    def add(self, error: vol.Invalid, path):
+        error.prepend(path)
+        self.errors.extend(error.errors if isinstance(error, vol.MultipleInvalid) else [error])
+        if self.max_errors is not None and len(self.errors) >= self.max_errors:
+            raise vol.MultipleInvalid(self.errors[:self.max_errors])
+
+    def check(self):
+        if self.errors:
+            raise vol.MultipleInvalid(self.errors)
+
+
+def mark_dict_value(error: vol.Invalid):
+    """Marks the errors of a dict value itself (not of its parts), as voluptuous does"""
+    for error in error.errors if isinstance(error, vol.MultipleInvalid) else [error]:
+        if not error.path:
+            error.error_type = 'dictionary value'
+
+
 class ExtendedExactSequence:
-    def __init__(self, validators):
+    def __init__(self, validators, max_errors=None):
         self.validators = validators
         self._schemas = [vol.Schema(val) for val in validators]
+        self.max_errors = max_errors
 
     def __call__(self, v):
         ret = v.copy()
+        errors = ErrorCollector(self.max_errors)
         for ind in range(min(len(self._schemas), len(v))):
-            ret[ind] = (self._schemas[ind](v[ind]))
+            try:
+                ret[ind] = (self._schemas[ind](v[ind]))
+            except vol.Invalid as e:
+                errors.add(e, [ind])
+        errors.check()
         return ret
 
     def __repr__(self):
@@ -124,29 +245,56 @@ class ExtendedExactSequence:
 
 
 class FullPropertiesSchema:
-    def __init__(self, go, patterns: Dict[str, dict], additional_schema: dict, basic_props: Container[str]):
+    """Validates the values of the keys matching `patterns` and of the other keys (not in `basic_props`) against
+    `additional_schema` (`None` - any values). With `properties` (a voluptuous dict schema of the properties, of
+    `vol.Required`/`vol.Optional` keys) validates them too, in the order of the keys of the dict, as
+    `vol.Schema({**properties, str: additional_schema})` does - but gathering at most `max_errors` errors"""
+
+    def __init__(self, go, patterns: Dict[str, dict], additional_schema: dict, basic_props: Container[str],
+                 max_errors=None, properties=None):
         self._patterns = patterns
         self.patterns = [(re.compile(k), vol.Schema(go(v))) for k, v in sorted_dict_items(patterns)]
         self._additional_schema = additional_schema
-        self.additional_schema = vol.Schema(go(additional_schema))
+        self.additional_schema = None if additional_schema is None else vol.Schema(go(additional_schema))
         self.basic_props = basic_props
+        self.max_errors = max_errors
+        self._properties = properties or {}
+        self.properties = {key.schema: vol.Schema(value) for key, value in self._properties.items()}
+        self.required = [key.schema for key in self._properties if isinstance(key, vol.Required)]
+        self.defaults = {key.schema: key.default for key in self._properties
+                         if isinstance(key, vol.Optional) and not isinstance(key.default, vol.Undefined)}
 
     def __call__(self, to_validate: dict):
         result = {}
-        for key, value in to_validate.items():
+        errors = ErrorCollector(self.max_errors)
+        items = list(to_validate.items())
+        items.extend((key, default()) for key, default in self.defaults.items() if key not in to_validate)
+        for key, value in items:
             matched = key in self.basic_props
-            for patt, schema in self.patterns:
-                if patt.match(key):
-                    value = schema(value)
-                    matched = True
-            if not matched:
-                value = self.additional_schema(value)
+            try:
+                if key in self.properties:
+                    value = self.properties[key](value)
+                for patt, schema in self.patterns:
+                    if patt.match(key):
+                        value = schema(value)
+                        matched = True
+                if not matched and self.additional_schema is not None:
+                    value = self.additional_schema(value)
+            except vol.Invalid as e:
+                mark_dict_value(e)
+                errors.add(e, [key])
+                continue
             result[key] = value
+        for key in self.required:
+            if key not in to_validate:
+                errors.add(vol.RequiredFieldInvalid('required key not provided'), [key])
+        errors.check()
         return result
 
     def __repr__(self):
-        return 'FullPropertiesSchema(patterns={}, additional_schema={}, basic_props={})'.format(
-            self._patterns, self._additional_schema, self.basic_props)
+        return 'FullPropertiesSchema(patterns={}, additional_schema={}, basic_props={}{})'.format(
+            self._patterns, self._additional_schema, self.basic_props,
+            ', properties={}'.format(self._properties) if self._properties else '')
 
 
 class Contains:
@@ -156,7 +304,7 @@ class Contains:
     def __call__(self, value):
         for element in self.elements:
             if element not in value:
-                raise vol.Invalid('"{}" not contained'.format(element))
+                raise LazyInvalid('"{}" not contained', element)
 
         return value
 
@@ -175,7 +323,7 @@ class MultipleOf:
                 return value
         except TypeError:
             pass
-        raise vol.Invalid('Not a multiple of {}'.format(self.divider))
+        raise LazyInvalid('Not a multiple of {}', self.divider)
 
     def __repr__(self):
         return 'MultipleOf({})'.format(self.divider)
@@ -207,13 +355,29 @@ class AnyPass:
 
 class Unique:
     """
-    Validates that elements of all different, works with unhashable types
+    Validates that elements of all different, works with unhashable types. Elements are compared by their frozen
+    (see `freeze`) counterparts in a dict, the ones that cannot be frozen - with all the others
     """
     def __call__(self, value):
-        for i in range(len(value) - 1):
-            for j in range(i+1, len(value)):
-                if value[i] == value[j]:
-                    raise vol.Invalid('duplicate value: {}'.format(value[i]))
+        first_indexes = {}
+        unhashable = []
+        duplicated = None  # the lowest index of an element having a duplicate
+        for ind, item in enumerate(value):
+            try:
+                key = freeze(item)
+                hash(key)
+            except TypeError:
+                first = next((i for i in range(ind) if value[i] == item), ind)
+                unhashable.append(ind)
+            else:
+                first = next((i for i in unhashable if value[i] == item), ind)
+                found = first_indexes.setdefault(key, ind)
+                if found < first and value[found] == item:  # frozen NaNs are equal only if they are the same object
+                    first = found
+            if first != ind and (duplicated is None or first < duplicated):
+                duplicated = first
+        if duplicated is not None:
+            raise LazyInvalid('duplicate value: {}', value[duplicated])
 
         return value
 
@@ -221,33 +385,112 @@ class Unique:
         return 'Unique'
 
 
+class BatchTransformation:
+    """Applies the batch post transformation of a `TransformedField` (see `TransformedField._transform_many`) to a list
+    of values. Returns the list of the results, with `vol.Invalid` in place of the values that failed (the exceptions
+    of other types become `vol.CoerceInvalid`). Raises `TypeError` if the transformation returns a list of another
+    length"""
+
+    def __init__(self, transform_many, msg):
+        self.transform_many = transform_many
+        self.msg = msg
+
+    def __call__(self, values):
+        if not values:
+            return []
+        transformed = self.transform_many(values)
+        if len(transformed) != len(values):
+            raise TypeError('{!r} returned {} results of {} values'.format(self.transform_many, len(transformed),
+                                                                           len(values)))
+        return [vol.CoerceInvalid(self.msg) if isinstance(item, Exception) and not isinstance(item, vol.Invalid)
+                else item for item in transformed]
+
+    def __repr__(self):
+        return 'BatchTransformation({!r})'.format(self.transform_many)
+
+
 class ListSchema:
     """
-    Validates that elements in a list (starting from `start`) are valid against a schema
+    Validates that elements in a list (starting from `start`) are valid against a schema. `transform_many` (a
+    `BatchTransformation`) is applied at once to all the elements that are valid. With `nested`, the errors within an
+    element (e.g. of a property of an object) are raised at once, dropping the errors of the elements gathered before,
+    as voluptuous' validation of sequences does - the elements are validated until one is found, also after
+    `max_errors` errors of elements themselves have been gathered
     """
-    def __init__(self, schema, start=0):
+    def __init__(self, schema, start=0, max_errors=None, transform_many=None, nested=False):
         self._schema = schema
         self.schema = vol.Schema(schema)
         self.start = start
+        self.max_errors = max_errors
+        self.transform_many = transform_many
+        self.nested = nested
 
     def __call__(self, value):
-        return vol.Coerce(lambda x: x[:self.start] + [self.schema(v) for v in x[self.start:]])(value)
+        if not isinstance(value, list):
+            raise vol.Invalid('expected list')
+        result = value[:self.start]
+        errors = ErrorCollector(None if self.nested else self.max_errors)
+        passed = []  # (index in `result`, index in `value`) pairs
+        for ind in range(self.start, len(value)):
+            try:
+                result.append(self.schema(value[ind]))
+                passed.append((len(result) - 1, ind))
+            except vol.Invalid as e:
+                if not self.nested:
+                    errors.add(e, [ind])
+                elif e.path:
+                    e.prepend([ind])
+                    raise vol.MultipleInvalid(e.errors if isinstance(e, vol.MultipleInvalid) else [e])
+                elif self.max_errors is None or len(errors.errors) < self.max_errors:
+                    errors.add(e, [ind])
+        if self.transform_many is not None:
+            transformed = self.transform_many([result[result_ind] for result_ind, _ in passed])
+            for (result_ind, ind), item in zip(passed, transformed):
+                if isinstance(item, vol.Invalid):
+                    errors.add(item, [ind])
+                else:
+                    result[result_ind] = item
+        if self.nested:
+            errors.errors = errors.errors[:self.max_errors]
+        errors.check()
+        return result
 
     def __repr__(self):
         return 'ListSchema({}, start={})'.format(self._schema, self.start)
 
 
 class LazySchema:
+    """The validator of `json_schema`, converted by `converter` on the first call - once, also when shared by threads"""
+
     def __init__(self, converter, json_schema):
         self.converted = None
         self.converter = converter
         self.json_schema = json_schema
+        self._lock = threading.Lock()
 
     def __call__(self, *args, **kwargs):
         if not self.converted:
-            self.converted = self.converter(self.json_schema, lazy=False)
+            self.compile()
         return self.converted(*args, **kwargs)
 
+    def compile(self):
+        """Converts the schema now instead of on the first call (see `opulent_schema.prefork`), returns the validator"""
+        if not self.converted:
+            with self._lock:
+                if not self.converted:
+                    self.converted = self.converter(self.json_schema, lazy=False)
+        return self.converted
+
+    def project(self, paths):
+        """A validator of the parts of instances at `paths` only, see `opulent_schema.projection.project`"""
+        from opulent_schema.projection import project
+        return project(self.json_schema, paths, self.converter.__self__)
+
+    def cached(self, maxsize=1024):
+        """The validator with a cache of its results, see `opulent_schema.caching.CachedValidator`"""
+        from opulent_schema.caching import CachedValidator
+        return CachedValidator(self, maxsize)
+
 
 class SchemaConverter:
     any_pass = AnyPass
@@ -262,6 +505,19 @@ class SchemaConverter:
 
     extra = vol.ALLOW_EXTRA
 
+    # how many errors of the items of a single array or object are gathered before the validation stops: `None` - all
+    # of them, 1 - fail at the first error
+    max_errors = None
+
+    # whether the validated objects are returned as records (see `opulent_schema.records`) instead of dicts
+    records = False
+
+    # the process pool validating the items of the arrays with at least `parallel_threshold` items, in chunks of
+    # `parallel_chunk_size` items (`None` - 4 chunks per cpu), see `opulent_schema.parallel.ParallelItems`
+    parallel_executor = None
+    parallel_threshold = 100000
+    parallel_chunk_size = None
+
     type_mapping = {
         'string': str,
         'integer': IntegralNumber(),
@@ -273,16 +529,35 @@ class SchemaConverter:
     }
 
     @classmethod
-    def check_and_convert(cls, json_schema, lazy=True):
-        schema_schema(json_schema)
-        return cls.convert(json_schema, lazy)
+    def check_and_convert(cls, json_schema, lazy=True, records=False):
+        lazy_attribute('schema_schema')(json_schema)
+        return cls.convert(json_schema, lazy, records)
 
     @classmethod
-    def convert(cls, json_schema, lazy=True):
+    def convert(cls, json_schema, lazy=True, records=False):
+        """`records` - return the validated objects as compact records, see `opulent_schema.records`"""
+        if records and not cls.records:
+            return cls.with_records().convert(json_schema, lazy)
         if lazy:
             return LazySchema(cls.convert, json_schema)
+        if cls.records:
+            from opulent_schema.records import RecordValidator
+            return RecordValidator(vol.Schema(cls.go(json_schema)), json_schema)
         return vol.Schema(cls.go(json_schema))
 
+    @classmethod
+    def with_max_errors(cls, max_errors):
+        return type(cls.__name__, (cls,), {'max_errors': max_errors})
+
+    @classmethod
+    def with_records(cls):
+        return type(cls.__name__, (cls,), {'records': True})
+
+    @classmethod
+    def with_parallel_items(cls, executor, threshold=100000, chunk_size=None):
+        return type(cls.__name__, (cls,), {'parallel_executor': executor, 'parallel_threshold': threshold,
+                                           'parallel_chunk_size': chunk_size})
+
     @classmethod
     def go(cls, schema):
         # check with http://json-schema.org/latest/json-schema-validation.html#rfc.section.6.8
@@ -306,7 +581,7 @@ class SchemaConverter:
         if 'anyOf' in schema:
             validators.append(vol.Any(*[cls.go(subschema) for subschema in schema['anyOf']]))
         if 'allOf' in schema:
-            validators.append(vol.All(*[cls.go(subschema) for subschema in schema['allOf']]))
+            validators.append(cls.chain(schema, *[cls.go(subschema) for subschema in schema['allOf']]))
         if 'oneOf' in schema:
             validators.append(cls.one_of(*[cls.go(subschema) for subschema in schema['oneOf']]))
 
@@ -320,24 +595,69 @@ class SchemaConverter:
             validators.append(cls.not_(cls.go(schema['not'])))
 
         if isinstance(schema, TransformedField):
-            try:
-                pre_transformation = schema.get_pre_transformation()
-            except UnGettableError:
-                pass
-            else:
-                validators.insert(0, vol.Coerce(pre_transformation, msg=f'{type(schema).__name__} '
-                                                                        f'pre_transformation failed'))
-            validators.append(vol.Coerce(schema.get_post_transformation(),
-                                         msg=f'{type(schema).__name__} post_transformation failed'))
+            validators[:0] = cls.pre_transformation_validators(schema)
+            validators.extend(cls.post_transformation_validators(schema))
         if not validators:
             validators = [object]
 
-        return vol.All(*validators) if len(validators) > 1 else validators[0]
+        return cls.chain(schema, *validators) if len(validators) > 1 else validators[0]
+
+    @classmethod
+    def chain(cls, schema, *validators):
+        """Runs `validators` (converted from `schema` and its subschemas) one after another, each on the result of the
+        previous one"""
+        return vol.All(*validators)
+
+    @classmethod
+    def pre_transformation_validators(cls, schema):
+        try:
+            pre_transformation = schema.get_pre_transformation()
+        except UnGettableError:
+            return []
+        return [vol.Coerce(pre_transformation, msg=f'{type(schema).__name__} pre_transformation failed')]
+
+    @classmethod
+    def post_transformation_validators(cls, schema):
+        return [vol.Coerce(schema.get_memoized_post_transformation(),
+                           msg=f'{type(schema).__name__} post_transformation failed')]
+
+    @classmethod
+    def batch_post_transformation(cls, schema):
+        """The `BatchTransformation` of `schema` if it is a `TransformedField` with a batch post transformation, else
+        None"""
+        if not isinstance(schema, TransformedField):
+            return None
+        try:
+            transform_many = schema.get_batch_post_transformation()
+        except UnGettableError:
+            return None
+        return BatchTransformation(transform_many, msg=f'{type(schema).__name__} post_transformation failed')
+
+    @classmethod
+    def untransformed(cls, schema):
+        """The validator of the `TransformedField` `schema`, without its post transformation"""
+        return vol.All(*cls.pre_transformation_validators(schema), cls.go(dict(schema)))
+
+    @classmethod
+    def items_validator(cls, schema, start=0):
+        """Validates the items of an array (starting from `start`) against `schema`. The post transformation of a
+        `TransformedField` is applied to all the items at once, if it can be"""
+        if cls.parallel_executor is not None:
+            from opulent_schema.parallel import ParallelItems
+            return ParallelItems(cls, schema, start)
+        transform_many = cls.batch_post_transformation(schema)
+        if transform_many is not None:
+            return cls.list_schema(cls.untransformed(schema), start, max_errors=cls.max_errors,
+                                   transform_many=transform_many)
+        if start == 0 and cls.max_errors is None:
+            return [cls.go(schema)]
+        # voluptuous would gather errors of all the items - the same errors are gathered, as far as `max_errors`
+        return cls.list_schema(cls.go(schema), start, max_errors=cls.max_errors,
+                               nested=start == 0 and has_parts_keywords(schema))
 
     @classmethod
     def object_validators(cls, schema):
-        if not {'properties', 'additionalProperties', 'patternProperties', 'maxProperties', 'minProperties', 'required',
-                'dependencies', 'propertyNames'} & schema.keys():
+        if not OBJECT_KEYWORDS & schema.keys():
             return []
 
         validators = []
@@ -364,10 +684,15 @@ class SchemaConverter:
             validators.append(vol.Schema(dict_schema, extra=vol.ALLOW_EXTRA))
             validators.append(
                 cls.full_properties_schema(cls.go, schema['patternProperties'], schema['additionalProperties'],
-                                           schema.get('properties', {}).keys()))
+                                           schema.get('properties', {}).keys(), max_errors=cls.max_errors))
         elif schema.get('additionalProperties'):
-            dict_schema[str] = cls.go(schema['additionalProperties'])
-            validators.append(dict_schema)
+            if cls.max_errors is None:
+                dict_schema[str] = cls.go(schema['additionalProperties'])
+                validators.append(dict_schema)
+            else:  # voluptuous would gather errors of all the additional properties
+                validators.append(cls.full_properties_schema(cls.go, {}, schema['additionalProperties'],
+                                                             schema.get('properties', {}).keys(),
+                                                             max_errors=cls.max_errors, properties=dict_schema))
         elif schema.get('patternProperties'):
             if cls.extra == vol.PREVENT_EXTRA:
                 validators.append(vol.Schema(
@@ -377,7 +702,12 @@ class SchemaConverter:
             if dict_schema:
                 validators.append(vol.Schema(dict_schema, extra=vol.ALLOW_EXTRA))
             for prop_pattern, prop_schema in sorted_dict_items(schema['patternProperties']):
-                validators.append(vol.Schema({vol.Match(prop_pattern): cls.go(prop_schema)}, extra=vol.ALLOW_EXTRA))
+                if cls.max_errors is None:
+                    validators.append(vol.Schema({vol.Match(prop_pattern): cls.go(prop_schema)},
+                                                 extra=vol.ALLOW_EXTRA))
+                else:  # voluptuous would gather errors of all the matching properties
+                    validators.append(cls.full_properties_schema(cls.go, {prop_pattern: prop_schema}, None, (),
+                                                                 max_errors=cls.max_errors))
         else:  # just the 'properties'
             if dict_schema:
                 validators.append(vol.Schema(dict_schema, extra=cls.extra))
@@ -396,7 +726,7 @@ class SchemaConverter:
                                    'Property name schema {} not fulfilled'.format(schema['propertyNames']))))
 
         if not is_type(schema, 'object'):
-            return [vol.Any(vol.All(dict, *validators), cls.not_(dict))]
+            return [vol.Any(cls.chain(schema, dict, *validators), cls.not_(dict))]
         return validators
 
     @classmethod
@@ -406,11 +736,7 @@ class SchemaConverter:
 
         validators = []
 
-        min_ = max([schema.get('minimum'), True], [schema.get('exclusiveMinimum'), False],
-                   key=lambda n: [float('-inf'), -n[1]] if n[0] is None else [n[0], -n[1]])
-        max_ = min([schema.get('maximum'), True], [schema.get('exclusiveMaximum'), False],
-                   key=lambda n: [float('inf'), n[1]] if n[0] is None else n)
-
+        min_, max_ = cls.get_bounds(schema)
         if min_[0] is not None or max_[0] is not None:
             validators.append(vol.Range(min=min_[0], min_included=min_[1], max=max_[0], max_included=max_[1]))
 
@@ -421,6 +747,16 @@ class SchemaConverter:
             return [vol.Any(vol.All(numbers.Number, *validators), cls.not_(numbers.Number))]
         return validators
 
+    @classmethod
+    def get_bounds(cls, schema):
+        """The stricter of `minimum`/`exclusiveMinimum` and of `maximum`/`exclusiveMaximum`, as `[value, included]`
+        pairs (value is `None` when there is no bound)"""
+        min_ = max([schema.get('minimum'), True], [schema.get('exclusiveMinimum'), False],
+                   key=lambda n: [float('-inf'), -n[1]] if n[0] is None else [n[0], -n[1]])
+        max_ = min([schema.get('maximum'), True], [schema.get('exclusiveMaximum'), False],
+                   key=lambda n: [float('inf'), n[1]] if n[0] is None else n)
+        return min_, max_
+
     @classmethod
     def string_validators(cls, schema):
         if not {'maxLength', 'minLength', 'pattern', 'format'} & schema.keys():
@@ -439,7 +775,7 @@ class SchemaConverter:
 
     @classmethod
     def array_validators(cls, schema):
-        if not {'items', 'additionalItems', 'maxItems', 'minItems', 'uniqueItems', 'contains'} & schema.keys():
+        if not ARRAY_KEYWORDS & schema.keys():
             return []
 
         validators = []
@@ -452,11 +788,12 @@ class SchemaConverter:
             validators.append(cls.any_pass(cls.go(schema['contains'])))
 
         if isinstance(schema.get('items'), dict):
-            validators.append([cls.go(schema['items'])])
+            validators.append(cls.items_validator(schema['items']))
         elif isinstance(schema.get('items'), list):
-            validators.append(cls.extended_exact_sequence([cls.go(it) for it in schema['items']]))
+            validators.append(cls.extended_exact_sequence([cls.go(it) for it in schema['items']],
+                                                          max_errors=cls.max_errors))
             if schema.get('additionalItems'):
-                validators.append(cls.list_schema(cls.go(schema['additionalItems']), len(schema['items'])))
+                validators.append(cls.items_validator(schema['additionalItems'], len(schema['items'])))
 
         if not is_type(schema, 'array'):
             return [vol.Any(vol.All(list, *validators), cls.not_(list))]
@@ -470,17 +807,7 @@ class SchemaConverter:
 
     @classmethod
     def _get_format_validator(cls, format):
-        return {
-            'date-time': vol.Datetime(),
-            'date': vol.Date(),
-            'time': vol.Datetime(format='%H:%M:%S.%fZ'),
-            'email': vol.Email(),
-            'hostname': ext_validators.Hostname(),
-            'ipv4': ext_validators.IP(4),
-            'ipv6': ext_validators.IP(6),
-            # regex from: https://tools.ietf.org/html/rfc3986#appendix-B
-            'uri': vol.Match(r'^(([^:/?#]+):)?(//([^/?#]*))?([^?#]*)(\?([^#]*))?(#(.*))?'),
-        }.get(format, object)
+        return lazy_attribute('format_validators').get(format, object)
 
 
 class ExactSchemaConverter(SchemaConverter):
@@ -489,6 +816,15 @@ class ExactSchemaConverter(SchemaConverter):
     extra = vol.PREVENT_EXTRA
 
 
+class FailFastSchemaConverter(SchemaConverter):
+    """Stops at the first error found in the items of an array or an object, instead of gathering all of them"""
+    max_errors = 1
+
+
+class ExactFailFastSchemaConverter(ExactSchemaConverter):
+    max_errors = 1
+
+
 class UnGettableError(Exception):
     pass
 
@@ -502,13 +838,100 @@ class UnGettableMethod:
         raise UnGettableError('Override this method to get it')
 
 
+MemoInfo = collections.namedtuple('MemoInfo', ['hits', 'misses', 'uncached', 'maxsize', 'currsize'])
+
+
+class Memo:
+    """A bounded LRU memo of a pure transformation (one whose result depends only on the instance, and that has no side
+    effects). Instances are keyed by their type and value, or by `key(instance)` if `key` is given - e.g. for
+    unhashable instances. Unhashable instances without `key` are transformed every time (counted as `uncached`), and
+    so are the instances whose transformation failed"""
+
+    def __init__(self, transformation: Callable, maxsize=1024, key: Callable = None):
+        if inspect.iscoroutinefunction(transformation):
+            raise TypeError('Coroutine transformations can not be memoized')
+        self.transformation = transformation
+        self.__name__ = getattr(transformation, '__name__', type(transformation).__name__)  # used by `vol.Coerce`
+        self.maxsize = maxsize
+        self.key = key
+        self._cached = functools.lru_cache(maxsize, typed=True)(transformation)
+        self._results = collections.OrderedDict()  # by `key(instance)`
+        self._lock = threading.Lock()  # of `_results`, `functools.lru_cache` has its own
+        self._hits = self._misses = self._uncached = 0
+
+    def __call__(self, instance):
+        if self.key is not None:
+            return self._call_keyed(instance)
+        try:
+            return self._cached(instance)
+        except TypeError:
+            try:
+                hash(instance)
+            except TypeError:  # i.e. the instance, not the transformation, is the problem
+                with self._lock:
+                    self._uncached += 1
+                return self.transformation(instance)
+            raise
+
+    def _call_keyed(self, instance):
+        key = self.key(instance)
+        with self._lock:
+            try:
+                result = self._results[key]
+            except KeyError:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._results.move_to_end(key)
+                return result
+        result = self.transformation(instance)
+        with self._lock:
+            self._results[key] = result
+            if len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return result
+
+    def cache_info(self):
+        info = self._cached.cache_info()
+        return MemoInfo(info.hits + self._hits, info.misses + self._misses, self._uncached, self.maxsize,
+                        info.currsize + len(self._results))
+
+    @property
+    def hit_rate(self):
+        info = self.cache_info()
+        calls = info.hits + info.misses + info.uncached
+        return info.hits / calls if calls else 0.0
+
+    def clear(self):
+        self._cached.cache_clear()
+        with self._lock:
+            self._results.clear()
+            self._hits = self._misses = self._uncached = 0
+
+    def __reduce__(self):
+        # the remembered results are not pickled
+        return type(self), (self.transformation, self.maxsize, self.key)
+
+    def __repr__(self):
+        return 'Memo({!r}, maxsize={})'.format(self.transformation, self.maxsize)
+
+
 class TransformedField(dict):
     """A magical dict, that allows for arbitrary transformations of validated data:
     _post_transform - mandatory, applied to data after json-schema-validating
     _pre_transform - optional, applied to data before json-schema-validating
+    _transform_many - optional, the batch version of `_post_transform`, applied at once to all the items of an array
+    _inverse_transform - optional, turns transformed data back into json-serializable data (for `SchemaEncoder`)
     """
 
     schema = {}
+    # a pure post transformation may be memoized (see `Memo`): how many results are remembered (0 - none), and the
+    # function making the keys of (e.g. unhashable) instances
+    memo_size = 0
+    memo_key = None
+    # decodes the text of a json number, the numbers of instances are decoded with it by `SchemaDecoder` (with
+    # `decode_numbers`), instead of into ints and floats
+    number_decoder = None
 
     def __init__(self, title=None, description=None, default=None, **kwargs):
         if title is not None:
@@ -536,21 +959,80 @@ class TransformedField(dict):
     def get_post_transformation(self):
         return self.get_transformation()
 
+    def get_memoized_post_transformation(self):
+        """The post transformation, wrapped in a `Memo` (shared by all the validators converted from this field) if
+        `memo_size` is set"""
+        if not self.memo_size:
+            return self.get_post_transformation()
+        if '_memo' not in self.__dict__:
+            # by `setdefault`, the validators converted in different threads share the same memo too
+            self.__dict__.setdefault('_memo', Memo(self.get_post_transformation(), self.memo_size, self.memo_key))
+        return self._memo
+
     def get_pre_transformation(self):
         return self._pre_transform
 
+    @UnGettableMethod
+    def _transform_many(self, instances):
+        """Returns the list of the transformed `instances` (of the same length), with an exception in place of every
+        instance that could not be transformed: `vol.Invalid`, reported as it is, or any other `Exception`, reported
+        as a failed post transformation. It should not raise"""
+        raise NotImplementedError
+
+    def get_batch_post_transformation(self):
+        return self._transform_many
+
+    @UnGettableMethod
+    def _inverse_transform(self, instance):
+        """`Decimal`s are json numbers here"""
+        raise NotImplementedError
+
+    def get_inverse_transformation(self):
+        return self._inverse_transform
+
     def copy(self):
         return type(self)(**super().copy())
 
 
 class InLineField(TransformedField):
-    def __init__(self, transformation: Callable, *args, **kwargs):
+    def __init__(self, transformation: Callable, *args, batch_transformation: Callable = None, memo_size=0,
+                 memo_key: Callable = None, inverse_transformation: Callable = None, **kwargs):
+        """`batch_transformation` - optional, see `TransformedField._transform_many`, `memo_size` and `memo_key` - see
+        `TransformedField.memo_size`, `inverse_transformation` - optional, see `TransformedField._inverse_transform`"""
         super().__init__(*args, **kwargs)
         self.transformation = transformation
+        self.batch_transformation = batch_transformation
+        self.memo_size = memo_size
+        self.memo_key = memo_key
+        self.inverse_transformation = inverse_transformation
 
     def get_post_transformation(self):
         return self.transformation
 
+    def get_batch_post_transformation(self):
+        if self.batch_transformation is None:
+            raise UnGettableError('No batch transformation given')
+        return self.batch_transformation
+
+    def get_inverse_transformation(self):
+        if self.inverse_transformation is None:
+            raise UnGettableError('No inverse transformation given')
+        return self.inverse_transformation
+
+
+def make_format_validators():
+    return {
+        'date-time': vol.Datetime(),
+        'date': vol.Date(),
+        'time': vol.Datetime(format='%H:%M:%S.%fZ'),
+        'email': vol.Email(),
+        'hostname': ext_validators.Hostname(),
+        'ipv4': ext_validators.IP(4),
+        'ipv6': ext_validators.IP(6),
+        # regex from: https://tools.ietf.org/html/rfc3986#appendix-B
+        'uri': vol.Match(r'^(([^:/?#]+):)?(//([^/?#]*))?([^?#]*)(\?([^#]*))?(#(.*))?'),
+    }
+
 
 def make_schema_schema(extra):
     """
@@ -602,10 +1084,34 @@ def make_schema_schema(extra):
     return vol.Schema(schema_dict, extra=extra)
 
 
-schema_schema = make_schema_schema(vol.PREVENT_EXTRA)
+# module attributes built on first use (PEP 562), to keep `import opulent_schema` fast
+_lazy_lock = threading.RLock()
+_lazy_attributes = {
+    'schema_schema': lambda: make_schema_schema(vol.PREVENT_EXTRA),
+    'format_validators': make_format_validators,
+}
+
+
+def lazy_attribute(name):
+    """The module attribute `name` (one of `_lazy_attributes`), built on first use"""
+    if name not in globals():
+        with _lazy_lock:
+            if name not in globals():
+                globals()[name] = _lazy_attributes[name]()
+    return globals()[name]
+
+
+def __getattr__(name):
+    if name not in _lazy_attributes:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    return lazy_attribute(name)
+
 
 convert = SchemaConverter.convert
 exact_convert = ExactSchemaConverter.convert
 
 check_and_convert = SchemaConverter.check_and_convert
 exact_check_and_convert = ExactSchemaConverter.check_and_convert
+
+fail_fast_convert = FailFastSchemaConverter.convert
+exact_fail_fast_convert = ExactFailFastSchemaConverter.convert
@@ -0,0 +1,180 @@
+# Validating the items of huge arrays in chunks, in the processes of a process pool
+import enum
+import functools
+import hashlib
+import itertools
+import os
+import pickle
+import sys
+import threading
+
+import voluptuous as vol
+
+from opulent_schema.opulent_schema import LazyInvalid
+
+# in the worker processes: the validators of the items (see `validate_chunk`), by the digests of their descriptions
+_validators = {}
+
+
+class Status(enum.Enum):
+    # returned by `validate_chunk` when a process has no validator for the key - an enum member, to stay the same
+    # object when it is pickled back from a worker process
+    MISSING = 'missing'
+
+
+MISSING = Status.MISSING
+
+
+def is_importable(cls):
+    """Whether `cls` can be pickled (by reference), i.e. found by its name in its module"""
+    try:
+        return functools.reduce(getattr, cls.__qualname__.split('.'), sys.modules[cls.__module__]) is cls
+    except (KeyError, AttributeError):
+        return False
+
+
+def portable(converter):
+    """An importable base of `converter` and the attributes set by the classes made of it (e.g. by `with_max_errors`),
+    making a converter that validates the same in other processes - validating the items there, not in parallel"""
+    attributes = {}
+    for cls in converter.__mro__:
+        if is_importable(cls):
+            break
+        for name, value in vars(cls).items():
+            if not name.startswith('__'):
+                attributes.setdefault(name, value)
+    attributes['parallel_executor'] = None
+    return cls, attributes
+
+
+def validate_chunk(key, description, chunk):
+    """Validates the items in `chunk`, returns them validated, or None if any of them is not valid. The validator of the
+    items is made of its pickled `description` once per worker process, and then found by `key` (a digest of the
+    description) - `description` may be None then. Returns `MISSING` if it is None and the process does not have the
+    validator"""
+    validator = _validators.get(key)
+    if validator is None:
+        if description is None:
+            return MISSING
+        base, attributes, schema, start = pickle.loads(description)
+        converter = type(base.__name__, (base,), attributes)
+        validator = _validators[key] = (vol.Schema(converter.items_validator(schema, start)), start)
+    validator, start = validator
+    try:
+        # the items before `start` are not validated, they only make the validator behave as in the whole array
+        return validator([None] * start + chunk)[start:]
+    except vol.Invalid:
+        return None
+
+
+def flatten(errors):
+    for error in errors:
+        if isinstance(error, vol.MultipleInvalid):
+            yield from flatten(error.errors)
+        else:
+            yield error
+
+
+def with_path(error: vol.Invalid, path):
+    """A copy of `error` at `path`, of the same class if it can be made as `vol.Invalid` is"""
+    if isinstance(error, LazyInvalid):
+        return type(error)('{}', error.msg, path=path, error_type=error.error_type)
+    try:
+        return type(error)(error.msg, path=path, error_message=error.error_message, error_type=error.error_type)
+    except TypeError:  # a subclass made otherwise
+        return vol.Invalid(error.msg, path=path, error_message=error.error_message, error_type=error.error_type)
+
+
+def moved(error: vol.MultipleInvalid, offset):
+    """The errors of validating a chunk, with their paths moved by the `offset` of the chunk in the array"""
+    return [with_path(error, [error.path[0] + offset] + error.path[1:]) for error in flatten(error.errors)]
+
+
+class ParallelItems:
+    """Validates the items of an array (starting from `start`) against `schema`, as `converter.items_validator` does.
+    The arrays with at least `converter.parallel_threshold` items to validate are split into chunks (of
+    `converter.parallel_chunk_size` items, by default - so that every process of the pool gets about 4 of them)
+    validated in `converter.parallel_executor` (a `concurrent.futures.ProcessPoolExecutor`), and the validated items
+    are put back together in order. The chunks with invalid items are validated again in this process, and their
+    errors put together as the validation in one process would (with batch transformations of the items, the whole
+    array is validated again).
+
+    The worker processes make the validator of the items once, of the pickled `schema` and converter, sent with the
+    chunks of the first array (and again to the processes started later) - otherwise only its digest is sent. If they
+    cannot be pickled (e.g. a `TransformedField` defined in a function), the items are validated in this process. The
+    items and their validated counterparts must be picklable too. The keywords about the array as a whole
+    (`minItems`, `maxItems`, `uniqueItems`, `contains`) are validated in this process, as usual"""
+
+    def __init__(self, converter, schema, start=0):
+        self.schema = schema
+        self.start = start
+        self.executor = converter.parallel_executor
+        self.threshold = converter.parallel_threshold
+        self.chunk_size = converter.parallel_chunk_size
+        self.max_errors = converter.max_errors
+        base, attributes = portable(converter)
+        items_validator = type(base.__name__, (base,), attributes).items_validator(schema, start)
+        self.sequential = vol.Schema(items_validator)
+        # voluptuous' validation of sequences raises the first error within an item at once, dropping the errors
+        # of the items gathered before it
+        self.raises_nested = isinstance(items_validator, list) or getattr(items_validator, 'nested', False)
+        self.batch = getattr(items_validator, 'transform_many', None) is not None
+        try:
+            self.description = pickle.dumps((base, attributes, schema, start))
+        except Exception:  # anything may be raised by pickling arbitrary objects
+            self.description = None
+        else:
+            self.key = hashlib.blake2b(self.description, digest_size=16).digest()
+        self.sent = False  # whether the description has been sent to the processes, guarded by `_lock`
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        if (self.description is None or not isinstance(value, list) or
+                len(value) - self.start < max(self.threshold, 1)):
+            return self.sequential(value)
+        items = value[self.start:]
+        size = self.chunk_size or -(-len(items) // (4 * (os.cpu_count() or 1)))
+        offsets = range(0, len(items), size)
+        chunks = [items[offset:offset + size] for offset in offsets]
+        with self._lock:
+            sent = self.sent
+        results = self.validate(chunks, None if sent else self.description)
+        missing = [ind for ind, validated in enumerate(results) if validated is MISSING]
+        if missing:  # processes started after the description was sent
+            for ind, validated in zip(missing, self.validate([chunks[ind] for ind in missing], self.description)):
+                results[ind] = validated
+        with self._lock:
+            self.sent = True
+
+        failed = [(offset, chunk) for offset, chunk, validated in zip(offsets, chunks, results) if validated is None]
+        if failed and self.batch:
+            return self.sequential(value)
+        if failed:
+            raise vol.MultipleInvalid(self.errors(failed))
+        result = value[:self.start]
+        for validated in results:
+            result.extend(validated)
+        return result
+
+    def validate(self, chunks, description):
+        return list(self.executor.map(validate_chunk, itertools.repeat(self.key), itertools.repeat(description),
+                                      chunks))
+
+    def errors(self, failed):
+        """The errors of the chunks with invalid items (with their offsets within the items), as of validating the
+        whole array"""
+        errors = []
+        for offset, chunk in failed:
+            try:
+                self.sequential([None] * self.start + chunk)
+            except vol.MultipleInvalid as e:
+                chunk_errors = moved(e, offset)
+            else:
+                continue
+            if self.raises_nested and len(chunk_errors[0].path) > 1:
+                return chunk_errors
+            errors.extend(chunk_errors)
+        return errors[:self.max_errors]
+
+    def __repr__(self):
+        return 'ParallelItems({}, start={})'.format(self.schema, self.start)
@@ -0,0 +1,282 @@
+# Validation of JSON Patch (RFC 6902) updates of already validated documents, touching only the changed parts
+import copy
+
+import voluptuous as vol
+
+from opulent_schema.opulent_schema import SchemaConverter
+from opulent_schema.navigation import is_shape_only, child_schema, shallow_schema
+
+
+class JsonPatchError(ValueError):
+    pass
+
+
+def parse_pointer(pointer):
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise JsonPatchError('Invalid json pointer: {!r}'.format(pointer))
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def json_equal(first, second):
+    """Equality in the sense of RFC 6902 `test` (booleans are not numbers)"""
+    if isinstance(first, bool) or isinstance(second, bool):
+        return type(first) is type(second) and first == second
+    if isinstance(first, dict) and isinstance(second, dict):
+        return first.keys() == second.keys() and all(json_equal(first[k], second[k]) for k in first)
+    if isinstance(first, list) and isinstance(second, list):
+        return len(first) == len(second) and all(json_equal(a, b) for a, b in zip(first, second))
+    if isinstance(first, (dict, list, str)) or isinstance(second, (dict, list, str)):
+        return type(first) is type(second) and first == second
+    return first == second
+
+
+class PatchedDocument:
+    """Applies patch operations to a copy of a document (copying only the containers on the changed paths) and keeps
+    track of which values were replaced and which containers had their keys (or length) changed"""
+
+    def __init__(self, document):
+        self.document = document
+        self.copied = {}  # id -> copy (kept, so that the ids are not reused)
+        self.changed_values = set()  # paths of values that were added or replaced
+        self.changed_shapes = set()  # paths of containers whose keys or length changed
+
+    def _index(self, container, token, allow_end=False):
+        if token == '-' and allow_end:
+            return len(container)
+        if not token.isdigit() or (token != '0' and token.startswith('0')):
+            raise JsonPatchError('Invalid array index: {!r}'.format(token))
+        index = int(token)
+        if index > len(container) or (index == len(container) and not allow_end):
+            raise JsonPatchError('Array index out of range: {}'.format(index))
+        return index
+
+    def _writable(self, value):
+        if id(value) in self.copied:
+            return value
+        value = copy.copy(value)
+        self.copied[id(value)] = value
+        return value
+
+    def _parent(self, tokens):
+        """Returns the (copied) parent container of the pointed value and the path to it (with ints for array
+        indexes)"""
+        if not tokens:
+            raise JsonPatchError('The operation cannot target the whole document')
+        self.document = self._writable(self.document)
+        container = self.document
+        path = []
+        for token in tokens[:-1]:
+            key = self._key(container, token)
+            container[key] = self._writable(container[key])
+            container = container[key]
+            path.append(key)
+        return container, path
+
+    def _key(self, container, token, allow_end=False):
+        if isinstance(container, dict):
+            if not allow_end and token not in container:
+                raise JsonPatchError('Path not found: {!r}'.format(token))
+            return token
+        if isinstance(container, list):
+            return self._index(container, token, allow_end)
+        raise JsonPatchError('Cannot descend into a scalar with {!r}'.format(token))
+
+    def get(self, tokens):
+        value = self.document
+        for token in tokens:
+            value = value[self._key(value, token)]
+        return value
+
+    def _shift(self, path, index, delta):
+        """Updates the recorded paths after an insertion into (or a removal from) the array at `path`"""
+        depth = len(path)
+        for paths in (self.changed_values, self.changed_shapes):
+            shifted = set()
+            for changed in paths:
+                if len(changed) > depth and changed[:depth] == path and changed[depth] >= index:
+                    if delta < 0 and changed[depth] == index:
+                        continue  # the removed value
+                    changed = changed[:depth] + (changed[depth] + delta,) + changed[depth + 1:]
+                shifted.add(changed)
+            paths.clear()
+            paths.update(shifted)
+
+    def _forget(self, path):
+        """Forgets the recorded paths of a removed or replaced value and within it"""
+        depth = len(path)
+        for paths in (self.changed_values, self.changed_shapes):
+            paths.difference_update([changed for changed in paths if changed[:depth] == path])
+
+    def add(self, tokens, value):
+        if not tokens:
+            self.replace_root(value)
+            return
+        container, path = self._parent(tokens)
+        key = self._key(container, tokens[-1], allow_end=True)
+        path = tuple(path)
+        if isinstance(container, list):
+            self._shift(path, key, 1)
+            container.insert(key, value)
+            self.changed_shapes.add(path)
+        else:
+            if key not in container:
+                self.changed_shapes.add(path)
+            container[key] = value
+        self._forget(path + (key,))
+        self.changed_values.add(path + (key,))
+
+    def remove(self, tokens):
+        container, path = self._parent(tokens)
+        key = self._key(container, tokens[-1])
+        path = tuple(path)
+        value = container.pop(key)
+        self._forget(path + (key,))
+        if isinstance(container, list):
+            self._shift(path, key, -1)
+        self.changed_shapes.add(path)
+        return value
+
+    def replace(self, tokens, value):
+        if not tokens:
+            self.replace_root(value)
+            return
+        container, path = self._parent(tokens)
+        key = self._key(container, tokens[-1])
+        container[key] = value
+        path = tuple(path) + (key,)
+        self._forget(path)
+        self.changed_values.add(path)
+
+    def replace_root(self, value):
+        self.document = value
+        self.changed_values = {()}
+        self.changed_shapes = set()
+
+    def apply(self, operation):
+        op = operation.get('op')
+        if 'path' not in operation:
+            raise JsonPatchError('Operation without a path: {!r}'.format(operation))
+        tokens = parse_pointer(operation['path'])
+        try:
+            if op in ('add', 'replace', 'test') and 'value' not in operation:
+                raise JsonPatchError('Operation without a value: {!r}'.format(operation))
+            if op == 'add':
+                self.add(tokens, operation['value'])
+            elif op == 'remove':
+                self.remove(tokens)
+            elif op == 'replace':
+                self.replace(tokens, operation['value'])
+            elif op in ('move', 'copy'):
+                from_tokens = parse_pointer(operation['from'])
+                if op == 'move':
+                    if tokens[:len(from_tokens)] == from_tokens and tokens != from_tokens:
+                        raise JsonPatchError('Cannot move a value into itself')
+                    self.add(tokens, self.remove(from_tokens))
+                else:
+                    self.add(tokens, copy.deepcopy(self.get(from_tokens)))
+            elif op == 'test':
+                if not json_equal(self.get(tokens), operation['value']):
+                    raise JsonPatchError('Test failed: {!r}'.format(operation))
+            else:
+                raise JsonPatchError('Unknown operation: {!r}'.format(op))
+        except (KeyError, IndexError, TypeError) as e:
+            raise JsonPatchError('Cannot apply {!r}: {}'.format(operation, e))
+
+    def get_path(self, path):
+        value = self.document
+        for key in path:
+            value = value[key]
+        return value
+
+    def set_path(self, path, value):
+        if not path:
+            self.document = value
+            return
+        container = self.document
+        for key in path[:-1]:
+            container = container[key]
+        container[path[-1]] = value
+
+
+class PatchValidator:
+    """Applies JSON Patch operations to a document that is a result of validating against `json_schema` and validates
+    only what the operations could have made invalid:
+
+    * the added and replaced values, against their subschemas,
+    * the objects and arrays whose keys or length changed, against their schemas without the subschemas of their
+      items (see `navigation.shallow_schema`).
+
+    Whenever the schema of a changed value's ancestor has keywords depending on the ancestor's contents (`anyOf`,
+    `enum`, `uniqueItems`, `patternProperties`, ...), the whole ancestor is validated instead.
+
+    The result (and the validity) is the same as validating the whole patched document, provided that validating a
+    result of the validation again does not change it (it's not the case with some `TransformedField`s)."""
+
+    def __init__(self, json_schema, converter=SchemaConverter):
+        self.json_schema = json_schema
+        self.converter = converter
+        self._validators = {}
+
+    def _validator(self, schema, shallow=False):
+        key = (id(schema), shallow)
+        if key not in self._validators:
+            converted = self.converter.go(shallow_schema(schema) if shallow else schema)
+            # the schema is kept alongside, so that its id is not reused
+            self._validators[key] = (schema, vol.Schema(converted))
+        return self._validators[key][1]
+
+    def _validation_root(self, path):
+        """The deepest ancestor of `path` (or `path` itself) that can be validated separately from its ancestors, and
+        its schema"""
+        schema = self.json_schema
+        for depth, key in enumerate(path):
+            if not is_shape_only(schema):
+                return path[:depth], schema
+            schema = child_schema(schema, key)
+        return path, schema
+
+    def validation_plan(self, patched: PatchedDocument):
+        """`(path, schema, shallow)` triples to validate, the deepest first"""
+        full = {}
+        for path in patched.changed_values:
+            root, schema = self._validation_root(path)
+            full[root] = schema
+        shallow = {}
+        for path in patched.changed_shapes:
+            root, schema = self._validation_root(path)
+            if root == path and is_shape_only(schema):
+                shallow[root] = schema
+            else:
+                full[root] = schema
+
+        plan = []
+        for path, schema in full.items():
+            if not any(path[:depth] in full for depth in range(len(path))):
+                plan.append((path, schema, False))
+        for path, schema in shallow.items():
+            if not any(path[:depth] in full for depth in range(len(path) + 1)):
+                plan.append((path, schema, True))
+        plan.sort(key=lambda step: -len(step[0]))
+        return plan
+
+    def __call__(self, document, operations):
+        patched = PatchedDocument(document)
+        for operation in operations:
+            patched.apply(operation)
+
+        errors = []
+        for path, schema, shallow in self.validation_plan(patched):
+            try:
+                patched.set_path(path, self._validator(schema, shallow)(patched.get_path(path)))
+            except vol.Invalid as e:
+                e.prepend(list(path))
+                errors.extend(e.errors if isinstance(e, vol.MultipleInvalid) else [e])
+        if errors:
+            raise vol.MultipleInvalid(errors)
+        return patched.document
+
+
+def patch_convert(json_schema, converter=SchemaConverter):
+    return PatchValidator(json_schema, converter)
@@ -0,0 +1,208 @@
+# Post-transformations applied after the validation: the placeholders left in the validated instances, and applying them
+import contextlib
+import decimal
+import threading
+
+import voluptuous as vol
+
+from opulent_schema.opulent_schema import SchemaConverter, TransformedField
+
+
+class Pending:
+    """A post-transformation (or a validator, see `Postponing`) that has not been applied yet. `value` is the already
+    validated instance (it may contain other `Pending` objects)"""
+    __slots__ = ('transformation', 'value', 'msg')
+
+    def __init__(self, transformation, value, msg):
+        self.transformation = transformation
+        self.value = value
+        self.msg = msg
+
+    def __repr__(self):
+        return 'Pending({}, {!r})'.format(getattr(self.transformation, '__name__', self.transformation), self.value)
+
+
+class PendingCoerce:
+    """Replaces `vol.Coerce` for post-transformations: the value is only wrapped in a `Pending`"""
+
+    def __init__(self, transformation, msg):
+        self.transformation = transformation
+        self.msg = msg
+
+    def __call__(self, value):
+        return Pending(self.transformation, value, self.msg)
+
+    def __repr__(self):
+        return 'PendingCoerce({}, msg={!r})'.format(getattr(self.transformation, '__name__', self.transformation),
+                                                    self.msg)
+
+
+def contains_pending(value):
+    if isinstance(value, Pending):
+        return True
+    if isinstance(value, dict):
+        return any(contains_pending(v) for v in value.values())
+    if isinstance(value, list):
+        return any(contains_pending(v) for v in value)
+    return False
+
+
+# the results of `nested_transformations` during the conversion of a schema (in this thread), by the ids of the parts
+# of the schema - with the parts, for their ids not to be reused
+_conversion = threading.local()
+
+
+def nested_transformations(schema):
+    """Checks if there are `TransformedField`s within `schema` (not counting `schema` itself). Each part of the schema
+    is checked once per conversion (see `PendingSchemaConverter.go`), so that converting deeply nested schemas does
+    not take quadratic time"""
+    memo = getattr(_conversion, 'memo', None)
+    if memo is None:
+        memo = {}
+    return _nested_transformations(schema, memo)
+
+
+def _nested_transformations(schema, memo):
+    if not isinstance(schema, (dict, list)):
+        return False
+    if id(schema) not in memo:
+        values = schema.values() if isinstance(schema, dict) else schema
+        memo[id(schema)] = (schema, any(isinstance(value, TransformedField) or _nested_transformations(value, memo)
+                                        for value in values))
+    return memo[id(schema)][1]
+
+
+def collect(value, path, found):
+    """Appends `(container, key, pending, path)` of the outermost `Pending` objects within `value` to `found`"""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return
+    for key, item in items:
+        if isinstance(item, Pending):
+            found.append((value, key, item, path + [key]))
+        else:
+            collect(item, path + [key], found)
+
+
+@contextlib.contextmanager
+def transformation_errors(pending: Pending, path):
+    """Reraises the errors of applying `pending` as `vol.Invalid` at `path`"""
+    try:
+        yield
+    except (ValueError, TypeError, decimal.InvalidOperation):
+        raise vol.CoerceInvalid(pending.msg, path=path)
+    except vol.Invalid as e:
+        e.prepend(path)
+        raise
+
+
+def add_error(errors, error: vol.Invalid):
+    errors.extend(error.errors if isinstance(error, vol.MultipleInvalid) else [error])
+
+
+def apply(pending: Pending, path):
+    value = materialize(pending.value, path)
+    with transformation_errors(pending, path):
+        return pending.transformation(value)
+
+
+def materialize(value, path=None):
+    """Applies all the pending transformations found in `value`, raises `vol.MultipleInvalid` with the errors of all
+    the failing ones. Containers are updated in place - they are always the ones created by the validation"""
+    path = path or []
+    if isinstance(value, Pending):
+        return apply(value, path)
+
+    found = []
+    collect(value, path, found)
+    errors = []
+    for container, key, pending, item_path in found:
+        try:
+            container[key] = apply(pending, item_path)
+        except vol.Invalid as e:
+            add_error(errors, e)
+    if errors:
+        raise vol.MultipleInvalid(errors)
+    return value
+
+
+class Materializing:
+    """Applies the pending transformations within the value before `validator` checks it"""
+
+    def __init__(self, validator):
+        self.validator = validator
+        # voluptuous' internal entry point (see setup.py), raising the errors of `validator` as they are
+        self._compiled = vol.Schema(validator)._compiled
+
+    def __call__(self, value):
+        if contains_pending(value):
+            value = materialize(value)
+        return self._compiled([], value)
+
+    def __repr__(self):
+        return 'Materializing({!r})'.format(self.validator)
+
+
+class Postponing:
+    """Postpones `validator` (as a `Pending`) if the value still contains pending transformations, to check the
+    value they are going to be replaced with"""
+
+    def __init__(self, validator):
+        self.validator = validator
+        # see `Materializing`
+        self._compiled = vol.Schema(validator)._compiled
+
+    def __call__(self, value):
+        if contains_pending(value):
+            return Pending(self, value, 'not a valid value')
+        return self._compiled([], value)
+
+    def __repr__(self):
+        return 'Postponing({!r})'.format(self.validator)
+
+
+class PendingSchemaConverter(SchemaConverter):
+    """Leaves `Pending` placeholders in place of the results of the post-transformations of `TransformedField`s. The
+    keywords checking them as parts of an enclosing value (e.g. `allOf`, `dependencies` or `patternProperties` of an
+    object containing a transformed property) see the transformed values, as with `convert`: the `after_pending`
+    wrapper of their validators either applies the transformations first or postpones the validators too.
+
+    Note that the pending transformations are applied after the whole instance has been validated, so their failures
+    do not take part in choosing the branch of `anyOf`/`oneOf`"""
+    after_pending = Materializing
+
+    @classmethod
+    def go(cls, schema):
+        if getattr(_conversion, 'memo', None) is not None:
+            return super().go(schema)
+        _conversion.memo = {}
+        try:
+            return super().go(schema)
+        finally:
+            _conversion.memo = None
+
+    @classmethod
+    def post_transformation_validators(cls, schema):
+        return [PendingCoerce(schema.get_memoized_post_transformation(),
+                              msg=f'{type(schema).__name__} post_transformation failed')]
+
+    @classmethod
+    def batch_post_transformation(cls, schema):
+        # a batch transformation would get the placeholders of the items' own pending transformations
+        if nested_transformations(schema):
+            return None
+        return super().batch_post_transformation(schema)
+
+    @classmethod
+    def chain(cls, schema, *validators):
+        # only the results of validators of parts of `schema` can contain placeholders, the first validator gets
+        # values without them
+        if not nested_transformations(schema):
+            return super().chain(schema, *validators)
+        return super().chain(schema, validators[0], *[
+            validator if isinstance(validator, PendingCoerce) else cls.after_pending(validator)
+            for validator in validators[1:]
+        ])
@@ -0,0 +1,51 @@
+# Preparing the validators in the parent process of a pre-forking server, to be shared by its workers
+import gc
+
+from opulent_schema import collector
+from opulent_schema import opulent_schema as _module
+from opulent_schema.opulent_schema import LazySchema, SchemaConverter
+
+_registered = []
+
+
+def register(validator, converter=SchemaConverter):
+    """Registers a validator returned by `convert` (or a json schema, converted by `converter`) to be compiled by
+    `prefork_prepare`, returns the validator"""
+    if isinstance(validator, dict):
+        validator = converter.convert(validator)
+    _registered.append(validator)
+    return validator
+
+
+def live_lazy_schemas():
+    """The `LazySchema` objects alive (all of them are tracked by the garbage collector)"""
+    return [obj for obj in gc.get_objects() if isinstance(obj, LazySchema)]
+
+
+def prefork_prepare(*validators, freeze=True):
+    """To be called in the parent process before the workers are forked: builds the module attributes built on first
+    use (`schema_schema`, `format_validators`), compiles the validators of all the schemas in `collector.schemas` (see
+    `collector.validator`), the registered ones and `validators` (the ones returned by `convert(..., lazy=False)` and
+    other callables are compiled already), and then moves all the objects tracked by the garbage collector to its
+    permanent generation (`gc.freeze()`, after a collection), so that the collections in the workers do not write to
+    the memory pages they share with the parent. Returns the compiled validators.
+
+    All the other `LazySchema` objects alive (e.g. returned by `convert` into module attributes of the application)
+    are compiled as well; the ones failing to convert are left to fail on their first call, as usual"""
+    for name in _module._lazy_attributes:
+        getattr(_module, name)
+    for keys in collector.added_keys:
+        collector.validator(*keys)
+    prepared = list(collector.validators.values()) + _registered + list(validators)
+    for validator in prepared:
+        if isinstance(validator, LazySchema):
+            validator.compile()
+    for validator in live_lazy_schemas():
+        try:
+            validator.compile()
+        except Exception:  # anything may be raised by converting arbitrary schemas
+            pass
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    return prepared
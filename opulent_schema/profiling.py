@@ -0,0 +1,166 @@
+# Profiling of validators, per the part of the json schema they were converted from
+import collections
+import threading
+import time
+
+import voluptuous as vol
+
+from opulent_schema.opulent_schema import SchemaConverter
+
+
+def schema_pointers(json_schema, pointer='#'):
+    """Maps ids of all the dicts within `json_schema` to `(dict, json pointer)` pairs. A dict appearing in the schema
+    more than once is mapped to its first occurrence"""
+    pointers = {}
+    stack = [(json_schema, pointer)]
+    while stack:
+        value, pointer = stack.pop()
+        if isinstance(value, dict):
+            if id(value) in pointers:
+                continue
+            pointers[id(value)] = (value, pointer)
+            items = value.items()
+        elif isinstance(value, list):
+            items = enumerate(value)
+        else:
+            continue
+        for key, item in reversed(list(items)):
+            stack.append((item, '{}/{}'.format(pointer, str(key).replace('~', '~0').replace('/', '~1'))))
+    return pointers
+
+
+class NodeStats:
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.cumulative_time = 0.
+        self.self_time = 0.
+
+
+class Profile:
+    """Gathers statistics of validators converted by `converter` (see `Profile.converter`). Each node - the validator
+    of a part of the schema, or a pre/post transformation of a `TransformedField` - is named with the json pointer of
+    that part, and records its number of calls, failures (`vol.Invalid` raised), the time spent in it (cumulative) and
+    the time spent in it, but not in the nodes nested in it (self)"""
+
+    def __init__(self):
+        self.stats = collections.defaultdict(NodeStats)
+        self.stacks = collections.Counter()  # ';'-joined names of nested nodes -> self time
+        self._local = threading.local()  # the stack of the nodes being run, of every thread
+        self._lock = threading.Lock()  # of `stats` and `stacks`
+
+    @property
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def converter(self, converter=SchemaConverter):
+        """A subclass of `converter` producing profiled validators"""
+        profile = self
+
+        class ProfilingConverter(converter):
+            pointers = {}
+
+            @classmethod
+            def convert(cls, json_schema, lazy=True, *args, **kwargs):
+                if not lazy:
+                    for key, value in schema_pointers(json_schema).items():
+                        cls.pointers.setdefault(key, value)
+                return super().convert(json_schema, lazy, *args, **kwargs)
+
+            @classmethod
+            def go(cls, schema):
+                validator = super().go(schema)
+                if id(schema) not in cls.pointers or validator is None:
+                    return validator
+                return ProfiledNode(validator, cls.pointers[id(schema)][1], profile)
+
+            @classmethod
+            def pre_transformation_validators(cls, schema):
+                return [ProfiledNode(validator, cls.pointers[id(schema)][1] + ' (pre_transformation)', profile)
+                        if id(schema) in cls.pointers else validator
+                        for validator in super().pre_transformation_validators(schema)]
+
+            @classmethod
+            def post_transformation_validators(cls, schema):
+                return [ProfiledNode(validator, cls.pointers[id(schema)][1] + ' (post_transformation)', profile)
+                        if id(schema) in cls.pointers else validator
+                        for validator in super().post_transformation_validators(schema)]
+
+        ProfilingConverter.__name__ = 'Profiling' + converter.__name__
+        return ProfilingConverter
+
+    def convert(self, json_schema, converter=SchemaConverter, lazy=True):
+        return self.converter(converter).convert(json_schema, lazy)
+
+    def enter(self, name):
+        self._stack.append([name, 0.])
+
+    def exit(self, elapsed, failed):
+        stack = self._stack
+        name, nested_time = stack[-1]
+        key = ';'.join(frame[0].replace(';', ':') for frame in stack)
+        with self._lock:
+            stats = self.stats[name]
+            stats.calls += 1
+            stats.failures += failed
+            stats.cumulative_time += elapsed
+            stats.self_time += elapsed - nested_time
+            self.stacks[key] += elapsed - nested_time
+        stack.pop()
+        if stack:
+            stack[-1][1] += elapsed
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self.stacks.clear()
+
+    def report(self, sort_by='self_time', limit=None):
+        """A table of the nodes' statistics, sorted descending by one of: 'self_time', 'cumulative_time', 'calls',
+        'failures'"""
+        rows = sorted(self.stats.items(), key=lambda item: getattr(item[1], sort_by), reverse=True)[:limit]
+        lines = ['{:>10} {:>10} {:>12} {:>12}  {}'.format('calls', 'failures', 'cumul [ms]', 'self [ms]', 'node')]
+        for name, stats in rows:
+            lines.append('{:>10} {:>10} {:>12.3f} {:>12.3f}  {}'.format(
+                stats.calls, stats.failures, stats.cumulative_time * 1000, stats.self_time * 1000, name))
+        return '\n'.join(lines)
+
+    def write_collapsed(self, fp):
+        """Writes the stacks of nodes with their self times (in microseconds) in the "collapsed" format of
+        flamegraph.pl and compatible tools"""
+        for stack, self_time in sorted(self.stacks.items()):
+            fp.write('{} {}\n'.format(stack, round(self_time * 1e6)))
+
+
+class ProfiledNode:
+    def __init__(self, validator, name, profile: Profile):
+        self.validator = validator
+        # compiled the way `vol.All` and `vol.Schema` compile their nested validators - voluptuous' internal entry
+        # point (see setup.py), raising the errors of `validator` as they are, not wrapped in a `vol.MultipleInvalid`
+        self._compiled = vol.Schema(validator)._compiled
+        self.name = name
+        self.profile = profile
+
+    def __call__(self, value):
+        profile = self.profile
+        profile.enter(self.name)
+        failed = False
+        start = time.perf_counter()
+        try:
+            return self._compiled([], value)
+        except vol.Invalid:
+            failed = True
+            raise
+        finally:
+            profile.exit(time.perf_counter() - start, failed)
+
+    def __repr__(self):
+        return 'Profiled({}, {})'.format(self.name, self.validator)
+
+
+def profiled_convert(json_schema, profile: Profile, converter=SchemaConverter, lazy=True):
+    return profile.convert(json_schema, converter, lazy)
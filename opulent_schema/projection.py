@@ -0,0 +1,174 @@
+# Validation of the requested parts of instances only, returning just those parts
+import collections
+import copy
+import re
+import threading
+
+import voluptuous as vol
+
+from opulent_schema.opulent_schema import SchemaConverter, ErrorCollector
+
+# the path segment standing for every item of an array
+ALL_ITEMS = '*'
+# how many projections are cached, the least recently used ones are dropped first
+PROJECTION_CACHE_SIZE = 256
+
+_projections = collections.OrderedDict()
+_projections_lock = threading.Lock()
+
+
+def parse_path(path):
+    """A tuple of segments from a json pointer (e.g. `/orders/*/id`) or an iterable of segments"""
+    if isinstance(path, str):
+        if not path:
+            return ()
+        if not path.startswith('/'):
+            raise ValueError('A json pointer has to start with "/": {!r}'.format(path))
+        return tuple(segment.replace('~1', '/').replace('~0', '~') for segment in path[1:].split('/'))
+    return tuple(path)
+
+
+def make_tree(paths):
+    """Nested dicts of the path segments, `None` marks the requested subtrees"""
+    tree = {}
+    for path in sorted(map(parse_path, paths), key=len):
+        node = tree
+        for segment in path[:-1]:
+            node = node.setdefault(segment, {})
+            if node is None:  # a parent of the path is requested already
+                break
+        else:
+            if not path:
+                return None
+            node[path[-1]] = None
+    return tree
+
+
+def is_array_schema(schema):
+    """Checks if the instances of `schema` can only be arrays (of those it can tell)"""
+    type_ = schema.get('type')
+    if type_ is not None:
+        types = type_ if isinstance(type_, list) else [type_]
+        return 'array' in types and 'object' not in types
+    return 'items' in schema and not any(key in schema for key in ['properties', 'patternProperties'])
+
+
+def property_schemas(schema, name):
+    """The schemas the value of property `name` is validated against"""
+    schemas = []
+    if isinstance(schema.get('properties'), dict) and name in schema['properties']:
+        schemas.append(schema['properties'][name])
+    for pattern, pattern_schema in (schema.get('patternProperties') or {}).items():
+        if re.match(pattern, name):
+            schemas.append(pattern_schema)
+    if not schemas and isinstance(schema.get('additionalProperties'), dict):
+        schemas.append(schema['additionalProperties'])
+    return schemas
+
+
+class ObjectProjection:
+    """Checks `type` and `required` of an object, validates the requested properties (with `fields`: property name ->
+    validator) and returns a dict of them only"""
+
+    def __init__(self, type_validator, required, fields, defaults, max_errors=None):
+        self.type_validator = type_validator
+        self.required = required
+        self.fields = fields
+        self.defaults = defaults
+        self.max_errors = max_errors
+
+    def __call__(self, value):
+        if self.type_validator is not None:
+            self.type_validator(value)
+        if not isinstance(value, dict):
+            return value
+        errors = ErrorCollector(self.max_errors)
+        for key in self.required:
+            if key not in value:
+                errors.add(vol.RequiredFieldInvalid('required key not provided'), [key])
+        result = {}
+        for key, validator in self.fields.items():
+            if key not in value:
+                if key in self.defaults:
+                    result[key] = copy.deepcopy(self.defaults[key])
+                continue
+            try:
+                result[key] = validator(value[key])
+            except vol.Invalid as e:
+                for error in e.errors if isinstance(e, vol.MultipleInvalid) else [e]:
+                    if not error.path:  # as voluptuous marks the errors of dict values
+                        error.error_type = 'dictionary value'
+                errors.add(e, [key])
+        errors.check()
+        return result
+
+
+class ItemsProjection:
+    """Checks `type` of an array, applies `validator` to its items"""
+
+    def __init__(self, type_validator, validator, max_errors=None):
+        self.type_validator = type_validator
+        self.validator = validator
+        self.max_errors = max_errors
+
+    def __call__(self, value):
+        if self.type_validator is not None:
+            self.type_validator(value)
+        if not isinstance(value, list):
+            return value
+        result = []
+        errors = ErrorCollector(self.max_errors)
+        for ind, item in enumerate(value):
+            try:
+                result.append(self.validator(item))
+            except vol.Invalid as e:
+                errors.add(e, [ind])
+        errors.check()
+        return result
+
+
+def make_projection(schema, tree, converter):
+    if tree is None:
+        return vol.Schema(converter.go(schema))
+    if not isinstance(schema, dict):
+        schema = {}
+    type_validator = vol.Schema(converter.go({'type': schema['type']})) if schema.get('type') else None
+
+    if set(tree) == {ALL_ITEMS}:
+        items = schema.get('items') if isinstance(schema.get('items'), dict) else {}
+        return ItemsProjection(type_validator, make_projection(items, tree[ALL_ITEMS], converter), converter.max_errors)
+
+    if is_array_schema(schema):
+        raise ValueError('The items of arrays can only be requested all at once, with "{}" - not {}'.format(
+            ALL_ITEMS, ', '.join(map(repr, sorted(tree, key=str)))))
+
+    fields, defaults = {}, {}
+    for name, subtree in tree.items():
+        schemas = property_schemas(schema, name)
+        validators = [make_projection(subschema, subtree, converter) for subschema in schemas]
+        fields[name] = vol.All(*validators) if validators else object
+        if schemas and isinstance(schemas[0], dict) and 'default' in schemas[0]:
+            defaults[name] = schemas[0]['default']
+    return ObjectProjection(type_validator, list(schema.get('required', [])), fields, defaults, converter.max_errors)
+
+
+def project(json_schema, paths, converter=SchemaConverter):
+    """A validator of the parts of instances at `paths` (json pointers or sequences of segments, `*` stands for every
+    item of an array - single items, e.g. `/orders/0`, can not be requested: raises `ValueError`). The requested
+    subtrees are validated in full, of their ancestors only `type` and `required` are checked, and everything else is
+    skipped. Returns the instance pruned to the requested paths.
+
+    The projections are cached per (converter, schema, paths), keyed by the identity of the schema - it should not be
+    modified afterwards"""
+    paths = frozenset(map(parse_path, paths))
+    key = (converter, id(json_schema), paths)
+    with _projections_lock:
+        if key in _projections:
+            _projections.move_to_end(key)
+            return _projections[key][0]
+    projection = make_projection(json_schema, make_tree(paths), converter)
+    with _projections_lock:
+        _projections[key] = (projection, json_schema)  # the schema is kept, so that its identity is not reused
+        if len(_projections) > PROJECTION_CACHE_SIZE:
+            _projections.popitem(last=False)
+    return projection
@@ -0,0 +1,164 @@
+# Validated objects as instances of compact record classes (with `__slots__`) instead of dicts
+import keyword
+import re
+import threading
+
+from opulent_schema.opulent_schema import TransformedField
+
+_record_classes = {}  # (name, fields) -> record class
+_record_classes_lock = threading.Lock()
+
+
+class Record:
+    """The base of the record classes made from object schemas (see `record_class`). The values of the `properties`
+    are attributes (the ones of the missing properties are not set), any other keys of an object are kept in the
+    `_extra` dict (None when there are none)"""
+    __slots__ = ('_extra',)
+    _fields = ()
+
+    def to_dict(self):
+        """The object as a dict, with the nested records as dicts as well"""
+        result = {}
+        for name in self._fields:
+            try:
+                result[name] = as_dict(getattr(self, name))
+            except AttributeError:
+                pass
+        if self._extra:
+            result.update(self._extra)
+        return result
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __reduce__(self):
+        values = {name: getattr(self, name) for name in self._fields if hasattr(self, name)}
+        return rebuild_record, (type(self).__name__, self._fields, values, self._extra)
+
+    def __repr__(self):
+        items = [(name, getattr(self, name)) for name in self._fields if hasattr(self, name)]
+        items.extend((self._extra or {}).items())
+        return '{}({})'.format(type(self).__name__, ', '.join('{}={!r}'.format(key, value) for key, value in items))
+
+
+def as_dict(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    if type(value) is list:
+        return [as_dict(item) for item in value]
+    return value
+
+
+def is_field_name(name):
+    """Whether a property can be an attribute of a record"""
+    return (isinstance(name, str) and name.isidentifier() and not keyword.iskeyword(name) and
+            not name.startswith('_') and not hasattr(Record, name))
+
+
+def record_class(name, fields):
+    """The record class of `fields`, shared by all the schemas (and processes) with the same name and fields, so that
+    their records compare equal and can be pickled"""
+    key = (name, tuple(fields))
+    cls = _record_classes.get(key)
+    if cls is None:
+        with _record_classes_lock:
+            cls = _record_classes.setdefault(key, type(name, (Record,), {'__slots__': key[1], '_fields': key[1]}))
+    return cls
+
+
+def rebuild_record(name, fields, values, extra):
+    """Unpickles a record"""
+    cls = record_class(name, fields)
+    record = cls.__new__(cls)
+    for key, value in values.items():
+        setattr(record, key, value)
+    record._extra = extra
+    return record
+
+
+def class_name(name):
+    return ''.join(part[:1].upper() + part[1:] for part in re.findall('[0-9a-zA-Z]+', name))
+
+
+class RecordBuilder:
+    """Turns validated dicts into instances of `record_class`, the values of the properties with a builder in `fields`
+    into records too"""
+
+    def __init__(self, record_class, fields):
+        self.record_class = record_class
+        self.fields = fields
+
+    def __call__(self, value):
+        if type(value) is not dict:
+            return value
+        record = self.record_class.__new__(self.record_class)
+        fields = self.fields
+        extra = None
+        for key, item in value.items():
+            if key in fields:
+                builder = fields[key]
+                setattr(record, key, item if builder is None else builder(item))
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = item
+        record._extra = extra
+        return record
+
+
+class ItemsBuilder:
+    def __init__(self, builder):
+        self.builder = builder
+
+    def __call__(self, value):
+        if type(value) is not list:
+            return value
+        builder = self.builder
+        return [builder(item) for item in value]
+
+
+def allows(schema, type_):
+    types = schema.get('type')
+    return not types or type_ in ([types] if isinstance(types, str) else types)
+
+
+def make_builder(schema, name='Record'):
+    """The builder of the records of the objects validated against `schema` (None if it has no objects with records):
+    a record class is made of every object schema with `properties` that can all be attributes, named after its
+    `title` or its location. The values of `TransformedField`s are left as transformed"""
+    if not isinstance(schema, dict) or isinstance(schema, TransformedField):
+        return None
+    properties = schema.get('properties')
+    if (allows(schema, 'object') and isinstance(properties, dict) and properties and
+            all(map(is_field_name, properties))):
+        title = schema.get('title')
+        if isinstance(title, str) and class_name(title).isidentifier():
+            name = class_name(title)
+        return RecordBuilder(record_class(name, properties), {
+            key: make_builder(subschema, name + class_name(key)) for key, subschema in properties.items()
+        })
+    if allows(schema, 'array') and isinstance(schema.get('items'), dict):
+        items = make_builder(schema['items'], name)
+        if items is not None:
+            return ItemsBuilder(items)
+    return None
+
+
+class RecordValidator:
+    """Counterpart of the validators returned by `convert`, returning records (see `make_builder`) in place of the
+    validated objects. The records are built once the whole instance has been validated, as the keywords like `anyOf`
+    validate the objects as dicts"""
+
+    def __init__(self, validator, json_schema):
+        self.validator = validator
+        self.builder = make_builder(json_schema)
+
+    def __call__(self, instance):
+        result = self.validator(instance)
+        if self.builder is None:
+            return result
+        return self.builder(result)
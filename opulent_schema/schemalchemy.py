@@ -1,21 +1,31 @@
 import collections
+import collections.abc
+import copy
 import datetime
 import decimal
+import functools
+import hashlib
 import itertools
+import os
+import pickle
+import re
+import threading
+import types
 from typing import Union
 
-import delorean
-from opulent_schema import TransformedField, sorted_dict_items
+from opulent_schema import TransformedField, sorted_dict_items, check_and_convert, __version__
 
 import sqlalchemy as sa
-import sqlalchemy.orm
-import sqlalchemy.orm.attributes
-import sqlalchemy.dialects
-import sqlalchemy.dialects.postgresql
 import sqlalchemy.sql.sqltypes
 
+# `delorean`, `sqlalchemy.orm` and `sqlalchemy.dialects.postgresql` are slow to import, so they are imported on first
+# use, and so are the type tables built (PEP 562)
+
 sentry = object()
 
+# bumped when the format of the contract cache files (see `ContractMaker.make_table_contracts`) changes
+CONTRACT_CACHE_FORMAT = 1
+
 
 class AlmostStr(type):
     """This metaclass is necessary, so that `voluptuous` will not distinguish `Optional` and `Required` classes defined
@@ -64,6 +74,47 @@ def uuid_validator(*a):
     }
 
 
+# the common shapes of ISO 8601 / RFC 3339 time stamps, parsed without `delorean` (i.e. `dateutil`)
+ISO_TIME_STAMP = re.compile(
+    r'^(\d{4})-(\d{2})-(\d{2})'
+    r'(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)?(?:(Z)|([+-])(\d{2})(?::?(\d{2}))?)?)?$')
+# how many distinct time stamp strings are remembered, the least recently used ones are dropped first
+TIME_STAMP_CACHE_SIZE = 4096
+
+
+def parse_iso_time_stamp(value):
+    """A naive UTC datetime from `value` if it is an ISO 8601 / RFC 3339 time stamp of a common shape, else None"""
+    match = ISO_TIME_STAMP.match(value)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, fraction, zulu, sign, offset_hours, offset_minutes = match.groups()
+    result = datetime.datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0),
+                               int((fraction or '').ljust(6, '0')))
+    if sign is not None:
+        offset = datetime.timedelta(hours=int(offset_hours), minutes=int(offset_minutes or 0))
+        result = result - offset if sign == '+' else result + offset
+    return result
+
+
+@functools.lru_cache(maxsize=TIME_STAMP_CACHE_SIZE)
+def parse_time_stamp(value: str):
+    """A naive UTC datetime from a time stamp string: the common ISO 8601 shapes are parsed directly, anything else
+    with `parse_any_time_stamp`"""
+    try:
+        result = parse_iso_time_stamp(value)
+    except ValueError:  # e.g. month 13, left to `delorean.parse` to report
+        result = None
+    if result is not None:
+        return result
+    return parse_any_time_stamp(value)
+
+
+def parse_any_time_stamp(value):
+    """The flexible (and slow) parser, assumes UTC for time stamps without a timezone"""
+    import delorean
+    return delorean.parse(value, dayfirst=False).shift('UTC')._dt.replace(tzinfo=None)
+
+
 def any_time_stamp(value):
     if value == float('inf') or (isinstance(value, str) and value.lower() == 'infinity'):
         return 'infinity'
@@ -71,39 +122,78 @@ def any_time_stamp(value):
         return '-infinity'
 
     try:
-        return delorean.epoch(float(value)).shift('UTC')._dt.replace(tzinfo=None)
+        return datetime.datetime.fromtimestamp(float(value), datetime.timezone.utc).replace(tzinfo=None)
     except ValueError:
         pass
 
-    return delorean.parse(value, dayfirst=False).shift('UTC')._dt.replace(tzinfo=None)
+    if isinstance(value, str):
+        return parse_time_stamp(value)
+    return parse_any_time_stamp(value)
+
+
+def transform_each(transformation, instances):
+    """`TransformedField._transform_many` made of a transformation of a single instance (catching what `vol.Coerce`
+    catches)"""
+    results = []
+    for instance in instances:
+        try:
+            results.append(transformation(instance))
+        except (ValueError, TypeError, decimal.InvalidOperation) as e:
+            results.append(e)
+    return results
 
 
 class AnyTimeStamp(TransformedField):
     def _transform(self, instance):
         return any_time_stamp(instance)
 
+    def _transform_many(self, instances):
+        return transform_each(any_time_stamp, instances)
+
+    def _inverse_transform(self, instance):
+        if isinstance(instance, datetime.datetime):
+            return instance.isoformat()
+        return instance  # i.e. 'infinity' or '-infinity'
+
 
 class AnyDate(TransformedField):
     def _transform(self, instance):
         return any_time_stamp(instance).date()
 
+    def _transform_many(self, instances):
+        return transform_each(self._transform, instances)
+
+    def _inverse_transform(self, instance):
+        return instance.isoformat()
+
 
 class AnyDecimal(TransformedField):
+    number_decoder = decimal.Decimal
+
     def _transform(self, instance):
         return decimal.Decimal(str(instance))
 
+    def _transform_many(self, instances):
+        return transform_each(self._transform, instances)
+
+    def _inverse_transform(self, instance):
+        return instance
 
-sql_type_validators = {
-    sa.dialects.postgresql.base.UUID: uuid_validator,
-    sqlalchemy.JSON: lambda col: {},
-    sa.sql.sqltypes.Numeric: lambda col: AnyDecimal(type='number'),
-    sa.sql.sqltypes.TIME: lambda col: {
-        'type': 'string',
-        'pattern': r'^[0-2]?\d:[0-5]\d:[0-5]\d(.\d+)?$',
-    },
-    sa.sql.sqltypes.BOOLEAN: lambda col: {'type': 'boolean'},
-    sqlalchemy.sql.sqltypes.Enum: lambda col: {'enum': [el.value for el in col.type.python_type]},
-}
+
+def make_sql_type_validators():
+    import sqlalchemy.dialects.postgresql
+
+    return {
+        sa.dialects.postgresql.base.UUID: uuid_validator,
+        sqlalchemy.JSON: lambda col: {},
+        sa.sql.sqltypes.Numeric: lambda col: AnyDecimal(type='number'),
+        sa.sql.sqltypes.TIME: lambda col: {
+            'type': 'string',
+            'pattern': r'^[0-2]?\d:[0-5]\d:[0-5]\d(.\d+)?$',
+        },
+        sa.sql.sqltypes.BOOLEAN: lambda col: {'type': 'boolean'},
+        sqlalchemy.sql.sqltypes.Enum: lambda col: {'enum': [el.value for el in col.type.python_type]},
+    }
 
 
 def str_validator(col):
@@ -113,48 +203,296 @@ def str_validator(col):
     return validator
 
 
-python_type_validators = {
-    int: lambda col: {'type': 'integer'},
-    str: str_validator,
-    datetime.datetime: lambda col: AnyTimeStamp(type=['string', 'number']),
-    datetime.date: lambda col: AnyDate(type=['string', 'number']),
+def make_python_type_validators():
+    return {
+        int: lambda col: {'type': 'integer'},
+        str: str_validator,
+        datetime.datetime: lambda col: AnyTimeStamp(type=['string', 'number']),
+        datetime.date: lambda col: AnyDate(type=['string', 'number']),
+    }
+
+
+_lazy_lock = threading.RLock()
+_lazy_attributes = {
+    'sql_type_validators': make_sql_type_validators,
+    'python_type_validators': make_python_type_validators,
 }
 
-sa_columns = Union[sa.Column, sa.orm.attributes.InstrumentedAttribute]
+
+def lazy_attribute(name):
+    """The module attribute `name` (one of `_lazy_attributes`), built on first use"""
+    if name not in globals():
+        with _lazy_lock:
+            if name not in globals():
+                globals()[name] = _lazy_attributes[name]()
+    return globals()[name]
+
+
+def __getattr__(name):
+    if name not in _lazy_attributes:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    return lazy_attribute(name)
+
+
+sa_columns = Union[sa.Column, 'sa.orm.attributes.InstrumentedAttribute']
+
+
+READ_ONLY_MESSAGE = ('Contracts returned by `make_contract` are shared and read-only, modify a copy of them '
+                     '(`copy.deepcopy`)')
+DICT_MUTATORS = ('__setitem__', '__delitem__', '__ior__', 'clear', 'pop', 'popitem', 'setdefault', 'update')
+LIST_MUTATORS = ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'clear', 'extend', 'insert', 'pop',
+                 'remove', 'reverse', 'sort')
+
+_sealable_classes = {}
+
+
+def _guarded(cls, name):
+    method = getattr(cls, name)
+
+    def guarded(self, *args, **kwargs):
+        if self._sealed:
+            raise TypeError(READ_ONLY_MESSAGE)
+        return method(self, *args, **kwargs)
+    guarded.__name__ = name
+    return guarded
+
+
+def _new_instance(cls):
+    return cls.__new__(cls)
+
+
+def _reduce_sealed(self, protocol):
+    # pickled as an instance of the base class, i.e. unpickled thawed
+    cls = type(self).__bases__[0]
+    state = {k: v for k, v in self.__dict__.items() if k != '_sealed'} or None
+    if isinstance(self, dict):
+        return _new_instance, (cls,), state, None, iter(self.items())
+    return _new_instance, (cls,), state, iter(self), None
+
+
+def _sealable_class(cls):
+    """A subclass of the dict or list subclass `cls` (with the same name, used in error messages of
+    `TransformedField`s), whose instances are read-only once sealed. Instances made by other means than
+    `freeze_contract` (e.g. `type(value)()` by voluptuous) are not sealed"""
+    if cls in _sealable_classes.values():
+        return cls
+    if cls not in _sealable_classes:
+        namespace = {name: _guarded(cls, name) for name in (DICT_MUTATORS if issubclass(cls, dict) else LIST_MUTATORS)
+                     if hasattr(cls, name)}
+        namespace.update({
+            '_sealed': False,
+            '__module__': cls.__module__,
+            '__copy__': lambda self: thaw(self, deep=False),
+            '__deepcopy__': lambda self, memo: thaw(self),
+            '__reduce_ex__': _reduce_sealed,
+        })
+        _sealable_classes[cls] = type(cls.__name__, (cls,), namespace)
+    return _sealable_classes[cls]
+
+
+def freeze_contract(value):
+    """A read-only copy of a contract: dicts (including `TransformedField`s) and lists are copied into their sealed
+    subclasses"""
+    if isinstance(value, (dict, list)) and not getattr(value, '_sealed', False):
+        cls = _sealable_class(type(value))
+        frozen = cls.__new__(cls)
+        frozen.__dict__.update(getattr(value, '__dict__', {}))
+        if isinstance(value, dict):
+            for key, item in value.items():
+                frozen[key] = freeze_contract(item)
+        else:
+            frozen.extend(freeze_contract(item) for item in value)
+        frozen._sealed = True
+        return frozen
+    return value
+
+
+def thaw(value, deep=True):
+    """A modifiable copy of a value returned by `freeze_contract`"""
+    copy_item = thaw if deep else (lambda item: item)
+    if type(value) in _sealable_classes.values():
+        cls = type(value).__bases__[0]
+        thawed = cls.__new__(cls)
+        if hasattr(thawed, '__dict__'):
+            thawed.__dict__.update({k: v for k, v in value.__dict__.items() if k != '_sealed'})
+        if isinstance(value, dict):
+            for key, item in value.items():
+                thawed[key] = copy_item(item)
+        else:
+            thawed.extend(copy_item(item) for item in value)
+        return thawed
+    if deep:
+        return copy.deepcopy(value)
+    return value
+
+
+def _value_key(value, keep_alive):
+    """A hashable key of a json-like `value`, equal for equal values of the same types. Values of other types are keyed
+    by their identity (and appended to `keep_alive`, so that the identity is not reused)"""
+    type_ = type(value)
+    if type_ in (dict, collections.OrderedDict):
+        items = ((type(k), k, _value_key(v, keep_alive)) for k, v in value.items())
+        return type_, (tuple(items) if type_ is collections.OrderedDict else frozenset(items))
+    if type_ is list:
+        return type_, tuple(_value_key(v, keep_alive) for v in value)
+    if type_ in (str, int, float, bool, type(None)):
+        return type_, value
+    keep_alive.append(value)
+    return 'id', id(value)
 
 
 class ContractMaker:
+    # how many contracts are cached, the least recently used ones are dropped first
+    contract_cache_size = 1024
 
     def __init__(self, sql_type_validators_=None, python_type_validators_=None):
-        self.sql_type_validators_ = {**sql_type_validators, **(sql_type_validators_ or {})}
-        self.python_type_validators_ = {**python_type_validators, **(python_type_validators_ or {})}
+        # merged with the default type tables on first use
+        self._sql_type_validators = sql_type_validators_ or {}
+        self._python_type_validators = python_type_validators_ or {}
+        self._merged = False
+        self._sql_factories = {}
+        self._python_factories = {}
+        self._contracts = collections.OrderedDict()
+        self._contracts_lock = threading.Lock()
+
+    def _merge_type_validators(self):
+        if not self._merged:
+            self._sql_type_validators = {**lazy_attribute('sql_type_validators'), **self._sql_type_validators}
+            self._python_type_validators = {**lazy_attribute('python_type_validators'), **self._python_type_validators}
+            self._merged = True
+
+    @property
+    def sql_type_validators_(self):
+        self._merge_type_validators()
+        return self._sql_type_validators
+
+    @sql_type_validators_.setter
+    def sql_type_validators_(self, value):
+        self._merge_type_validators()  # of the other table
+        self._sql_type_validators = value
+        self.clear_caches()
+
+    @property
+    def python_type_validators_(self):
+        self._merge_type_validators()
+        return self._python_type_validators
+
+    @python_type_validators_.setter
+    def python_type_validators_(self, value):
+        self._merge_type_validators()
+        self._python_type_validators = value
+        self.clear_caches()
+
+    def clear_caches(self):
+        """Has to be called after modifying `sql_type_validators_` or `python_type_validators_` in place (assigning them
+        clears the caches)"""
+        self._sql_factories.clear()
+        self._python_factories.clear()
+        self._contracts.clear()
 
     def make_contract(self, *columns: Union[sa_columns, 'Properties'], type_='object', add_props=None,
                       **top_schema_info):
+        """The contract is cached, keyed by the columns (their identities), the options of `Properties`, `add_props`
+        and `top_schema_info` - the returned contracts are shared and therefore read-only (see `freeze_contract`).
+        Values of `add_props` are copied into the contract"""
+        keep_alive = [columns]
+        key = (_value_key(type_, keep_alive),
+               tuple(self._column_key(col, keep_alive) for col in columns),
+               _value_key(add_props, keep_alive),
+               _value_key(top_schema_info, keep_alive))
+        with self._contracts_lock:
+            if key in self._contracts:
+                self._contracts.move_to_end(key)
+                return self._contracts[key][0]
+
+        contract = freeze_contract(self._build_contract(columns, type_, add_props, top_schema_info))
+
+        with self._contracts_lock:
+            self._contracts[key] = (contract, keep_alive)
+            if len(self._contracts) > self.contract_cache_size:
+                self._contracts.popitem(last=False)
+        return contract
+
+    def _build_contract(self, columns, type_, add_props, top_schema_info):
         properties = collections.OrderedDict()
         for col in columns:
             # if the column is wrapped in OptionalP, then make it optional, otherwise make it required
-            key = col.name if getattr(col, 'required', True) else Optional(col.name)
-            properties[key] = self.get_validator(col)
+            # (reflected tables name their columns with `quoted_name`s, which voluptuous does not accept)
+            key_ = str(col.name) if getattr(col, 'required', True) else Optional(col.name)
+            properties[key_] = self.get_validator(col)
 
         if add_props:
-            for key, value in sorted_dict_items(add_props):
-                properties[key] = value
+            for prop_name, value in sorted_dict_items(add_props):
+                properties[prop_name] = thaw(value)
 
         contract = {'type': type_, 'properties': properties}
 
         calculate_reqs(contract)
         return {**contract, **top_schema_info}
 
+    def make_table_contracts(self, metadata, cache_path=None):
+        """The contracts of all the tables of `metadata` (a `MetaData` or a declarative base), made in one pass, see
+        `TableContracts`. With `cache_path`, the contracts are pickled into that file (one file per `metadata`),
+        keyed by a hash of the table definitions (see `table_definition_hash`), and later calls only make the
+        contracts of the tables whose definitions changed. The cache file has to be trusted, like any pickle"""
+        tables = getattr(metadata, 'metadata', metadata).tables
+        type_tables = self._type_tables_key()
+        hashes = {key: table_definition_hash(table, type_tables) for key, table in tables.items()}
+        cached = {} if cache_path is None else _load_contract_cache(cache_path)
+
+        contracts, pickled = {}, {}
+        for key, table in tables.items():
+            if hashes[key] in cached:
+                pickled[key] = cached[hashes[key]]
+            else:
+                contracts[key] = freeze_contract(self._build_contract(table.columns, 'object', None, {}))
+
+        if cache_path is not None and contracts:
+            entries = {hashes[key]: data for key, data in pickled.items()}
+            for key, contract in contracts.items():
+                try:
+                    entries[hashes[key]] = pickle.dumps(contract, pickle.HIGHEST_PROTOCOL)
+                except (pickle.PicklingError, AttributeError, TypeError):  # e.g. lambdas of custom type validators
+                    pass
+            _dump_contract_cache(cache_path, entries)
+        return TableContracts(list(tables), contracts, pickled)
+
+    def _type_tables_key(self):
+        # the validators of the column types, as far as they can be told apart between processes
+        return [[(_qualified_name(type_), _factory_key(factory)) for type_, factory in type_validators.items()]
+                for type_validators in (self.sql_type_validators_, self.python_type_validators_)]
+
+    @staticmethod
+    def _column_key(column, keep_alive):
+        if isinstance(column, Properties):
+            return (type(column), id(column.column), column.nullable, column.required,
+                    _value_key(column.schema_info, keep_alive))
+        return id(column)
+
+    def _validator_factory(self, sql_type):
+        """The function making the validator of a column of `sql_type`, resolved once per sql type class (and python
+        type) and memoized"""
+        sql_class = type(sql_type)
+        if sql_class not in self._sql_factories:
+            self._sql_factories[sql_class] = next((self.sql_type_validators_[type_] for type_ in sql_class.__mro__
+                                                   if type_ in self.sql_type_validators_), None)
+        factory = self._sql_factories[sql_class]
+        if factory is not None:
+            return factory
+
+        python_type = sql_type.python_type
+        if python_type not in self._python_factories:
+            self._python_factories[python_type] = next((self.python_type_validators_[type_]
+                                                        for type_ in python_type.__mro__
+                                                        if type_ in self.python_type_validators_), None)
+        return self._python_factories[python_type]
+
     def _determine_validator(self, column):
         sql_type = column.type
         try:
-            for type_ in type(sql_type).__mro__:
-                if type_ in self.sql_type_validators_:
-                    return self.sql_type_validators_[type_](column)
-            for type_ in sql_type.python_type.__mro__:
-                if type_ in self.python_type_validators_:
-                    return self.python_type_validators_[type_](column)
+            factory = self._validator_factory(sql_type)
+            if factory is not None:
+                return factory(column)
         except NotImplementedError:
             pass
         raise Exception('Unsupported column type: {}'.format(type(sql_type)))
@@ -190,6 +528,91 @@ class ContractMaker:
         return validator
 
 
+def _qualified_name(obj):
+    return '{}.{}'.format(getattr(obj, '__module__', None), getattr(obj, '__qualname__', repr(obj)))
+
+
+def _code_key(code):
+    # the constants are in the order of their first use, but sets of them in the order of the hashes of the strings
+    return (code.co_code, code.co_names, tuple(
+        _code_key(const) if isinstance(const, types.CodeType) else
+        sorted(map(repr, const)) if isinstance(const, frozenset) else const
+        for const in code.co_consts))
+
+
+def _factory_key(factory):
+    """A key of a validator factory, telling apart the ones of the same name (e.g. lambdas) by their code, the
+    defaults of their arguments and the values they close over"""
+    code = getattr(factory, '__code__', None)
+    if code is None:
+        return _qualified_name(factory)
+    cells = [cell.cell_contents for cell in getattr(factory, '__closure__', None) or ()]
+    return _qualified_name(factory), _code_key(code), repr(getattr(factory, '__defaults__', None)), repr(cells)
+
+
+def table_definition_hash(table: sa.Table, type_tables=()):
+    """A hash of what the contract of `table` depends on: its name, the names, types and nullability of its columns,
+    and `type_tables` (a description of the validators of the column types)"""
+    definition = [
+        CONTRACT_CACHE_FORMAT, __version__, table.key, type_tables,
+        [(col.name, _qualified_name(type(col.type)), repr(col.type), col.nullable) for col in table.columns],
+    ]
+    return hashlib.sha256(repr(definition).encode()).hexdigest()
+
+
+def _load_contract_cache(path):
+    try:
+        with open(path, 'rb') as fp:
+            cache = pickle.load(fp)
+    except Exception:  # a missing or corrupted cache is made anew
+        return {}
+    if not isinstance(cache, dict) or cache.get('format') != CONTRACT_CACHE_FORMAT:
+        return {}
+    return cache['contracts']
+
+
+def _dump_contract_cache(path, entries):
+    # written to a temporary file first, so that concurrent readers never see a partial cache
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'wb') as fp:
+        pickle.dump({'format': CONTRACT_CACHE_FORMAT, 'contracts': entries}, fp, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+class TableContracts(collections.abc.Mapping):
+    """The contracts of the tables of a `MetaData`, by table key (the name, prefixed by the schema if any). The
+    contracts loaded from the disk cache are unpickled on first access, the validators are compiled (with
+    `check_and_convert`) on first use"""
+
+    def __init__(self, keys, contracts, pickled):
+        self._keys = keys
+        self._contracts = contracts
+        self._pickled = pickled
+        self._validators = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        if key not in self._contracts:
+            with self._lock:  # a contract is unpickled once, also when the contracts are shared by threads
+                if key not in self._contracts:
+                    if key not in self._pickled:
+                        raise KeyError(key)
+                    self._contracts[key] = freeze_contract(pickle.loads(self._pickled[key]))
+                    del self._pickled[key]
+        return self._contracts[key]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def validator(self, key):
+        if key not in self._validators:
+            self._validators.setdefault(key, check_and_convert(self[key]))
+        return self._validators[key]
+
+
 class Properties:
     required = True
 
@@ -223,4 +646,5 @@ class OptionalP(Properties):
 
 contract_maker = ContractMaker()
 make_contract = contract_maker.make_contract
+make_table_contracts = contract_maker.make_table_contracts
 get_validator = contract_maker.get_validator
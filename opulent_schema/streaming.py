@@ -0,0 +1,229 @@
+# Incremental validation of big json arrays, item by item, while the document is being read
+import codecs
+import json
+import re
+
+import voluptuous as vol
+
+from opulent_schema.opulent_schema import SchemaConverter, TransformedField, freeze
+
+WHITESPACE = ' \t\n\r'
+NUMBER_TAIL = re.compile(r'[0-9.eE+\-]*')
+
+# keywords of the streamed array's schema that can be checked without holding the whole array
+STREAMABLE_KEYWORDS = {'type', 'items', 'additionalItems', 'minItems', 'maxItems', 'uniqueItems', 'contains', 'title',
+                       'description', 'default', 'examples'}
+
+
+class JsonReader:
+    """A minimal incremental json tokenizer. Only the structure leading to the streamed array is tokenized, every
+    other value is decoded whole with `json.JSONDecoder.raw_decode`"""
+
+    def __init__(self, fp, chunk_size=65536):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.text_decoder = None
+
+    def fill(self, at_least=0):
+        """Reads at least `at_least` more characters (unless the end of file is reached)"""
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        target = len(self.buffer) + max(at_least, 1)
+        while not self.eof and len(self.buffer) < target:
+            chunk = self.fp.read(max(self.chunk_size, at_least))
+            if not chunk:
+                self.eof = True
+            if isinstance(chunk, bytes):
+                if self.text_decoder is None:
+                    self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+                chunk = self.text_decoder.decode(chunk, final=self.eof)
+            self.buffer += chunk
+
+    def peek(self):
+        """Skips whitespace and returns the next character, '' at the end of file"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ''
+            self.fill()
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise self.error('Expecting one of: {}'.format(', '.join(repr(c) for c in chars)))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decodes the next value. If it is incomplete, more data is read - at least as much as is already buffered, so
+        that a big value is re-decoded only a logarithmic number of times"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # errors far enough from the end of the buffer cannot be fixed by reading more
+                if self.eof or (e.pos < len(self.buffer) - 6 and not e.msg.startswith('Unterminated string')):
+                    raise
+            else:
+                # a number at the end of the buffer may continue in the next chunk
+                if self.eof or NUMBER_TAIL.match(self.buffer, end).end() < len(self.buffer):
+                    self.pos = end
+                    return value
+            self.fill(len(self.buffer) - self.pos)
+
+    def error(self, msg):
+        return json.JSONDecodeError(msg, self.buffer, self.pos)
+
+
+def _schema_at(json_schema, path):
+    for key in path:
+        if not isinstance(json_schema, dict):
+            return {}
+        if key in json_schema.get('properties', {}):
+            json_schema = json_schema['properties'][key]
+        elif isinstance(json_schema.get('additionalProperties'), dict):
+            json_schema = json_schema['additionalProperties']
+        else:
+            return {}
+    return json_schema
+
+
+class ArrayState:
+    """Validates the array keywords (`minItems`, `maxItems`, `uniqueItems`, `contains`) item by item, keeping only
+    what these keywords need"""
+
+    def __init__(self, converter, json_schema, path):
+        unsupported = set(json_schema) - STREAMABLE_KEYWORDS
+        if unsupported or isinstance(json_schema, TransformedField):
+            raise ValueError('Keywords that cannot be validated incrementally: {}'.format(
+                ', '.join(sorted(unsupported)) or type(json_schema).__name__))
+        if json_schema.get('type') not in (None, 'array', ['array']):
+            raise ValueError('The streamed value has to be an array')
+
+        self.path = list(path)
+        self.min_items = json_schema.get('minItems')
+        self.max_items = json_schema.get('maxItems')
+        self.unique = json_schema.get('uniqueItems', False)
+        self.seen = set()
+        self.seen_unhashable = []
+        self.contains = vol.Schema(converter.go(json_schema['contains'])) if 'contains' in json_schema else None
+        self.contained = False
+
+        items = json_schema.get('items', {})
+        if isinstance(items, list):
+            self.items = [vol.Schema(converter.go(it)) for it in items]
+            additional = json_schema.get('additionalItems')
+            self.additional_items = vol.Schema(converter.go(additional) if additional else object)
+        else:
+            self.items = []
+            self.additional_items = vol.Schema(converter.go(items))
+        self.count = 0
+
+    def invalid(self, msg, path=()):
+        return vol.Invalid(msg, path=self.path + list(path))
+
+    def add(self, item):
+        ind = self.count
+        self.count += 1
+        if self.max_items is not None and self.count > self.max_items:
+            raise self.invalid('length of value must be at most {}'.format(self.max_items))
+        if self.unique:
+            self._check_unique(item, ind)
+        if self.contains is not None and not self.contained:
+            try:
+                self.contains(item)
+                self.contained = True
+            except vol.Invalid:
+                pass
+
+        validator = self.items[ind] if ind < len(self.items) else self.additional_items
+        try:
+            return validator(item)
+        except vol.Invalid as e:
+            e.prepend(self.path + [ind])
+            raise
+
+    def _check_unique(self, item, ind):
+        try:
+            key = freeze(item)
+            duplicate = key in self.seen
+            self.seen.add(key)
+        except TypeError:
+            duplicate = item in self.seen_unhashable
+            self.seen_unhashable.append(item)
+        if duplicate:
+            raise self.invalid('duplicate value: {}'.format(item), [ind])
+
+    def finish(self):
+        if self.min_items is not None and self.count < self.min_items:
+            raise self.invalid('length of value must be at least {}'.format(self.min_items))
+        if self.contains is not None and not self.contained:
+            raise self.invalid('Empty iterable' if not self.count else 'no item valid against "contains"')
+
+
+def iter_validate(fp, json_schema, path=(), converter=SchemaConverter, chunk_size=65536):
+    """Reads a json document from the file-like object `fp` (text or binary) and yields validated (and transformed)
+    items of the array found at `path` (a sequence of object keys, the document itself by default), as soon as each
+    of them has been read. Raises `vol.MultipleInvalid`, as the validators returned by `convert` do.
+
+    Only the array is validated, against the part of `json_schema` describing it: the enclosing document is not - of
+    the objects leading to the array only their type and the presence of the keys of `path` are checked, the other
+    values are decoded and discarded. The memory used is that of one item plus the state needed by `uniqueItems` and
+    `contains`"""
+    state = ArrayState(converter, _schema_at(json_schema, path), path)
+    reader = JsonReader(fp, chunk_size)
+    try:
+        yield from _walk(reader, state, list(path))
+    except vol.MultipleInvalid:
+        raise
+    except vol.Invalid as e:
+        raise vol.MultipleInvalid([e])
+    if reader.peek():
+        raise reader.error('Extra data')
+
+
+def _walk(reader, state, remaining):
+    if not remaining:
+        if reader.peek() != '[':
+            raise state.invalid('expected list')
+        reader.expect('[')
+        if reader.peek() == ']':
+            reader.expect(']')
+        else:
+            while True:
+                yield state.add(reader.value())
+                if reader.expect(',]') == ']':
+                    break
+        state.finish()
+        return
+
+    depth = len(state.path) - len(remaining)
+    if reader.peek() != '{':
+        raise vol.Invalid('expected dict', path=state.path[:depth])
+    reader.expect('{')
+    found = False
+    if reader.peek() == '}':
+        reader.expect('}')
+    else:
+        while True:
+            if reader.peek() != '"':
+                raise reader.error('Expecting property name enclosed in double quotes')
+            key = reader.value()
+            reader.expect(':')
+            if key == remaining[0] and not found:
+                found = True
+                yield from _walk(reader, state, remaining[1:])
+            else:
+                reader.value()
+            if reader.expect(',}') == '}':
+                break
+    if not found:
+        raise vol.Invalid('required key not provided', path=state.path[:depth + 1])
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import unittest
+
+import voluptuous as vol
+
+import opulent_schema
+from opulent_schema import aio
+
+
+def outcome(validator, instance):
+    try:
+        return validator(instance)
+    except vol.MultipleInvalid as e:
+        return sorted(str(error) for error in e.errors)
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class SlowDouble(opulent_schema.TransformedField):
+    calls = []
+    # set by the tests to a number of transformations, which then wait for each other to start
+    expected = None
+    all_started = None
+
+    async def _transform(self, instance):
+        self.calls.append(('start', instance))
+        if self.expected is None:
+            await asyncio.sleep(0)
+        else:
+            if len(self.calls) == self.expected:
+                self.all_started.set()
+            await asyncio.wait_for(self.all_started.wait(), 5)
+        self.calls.append(('end', instance))
+        return instance * 2
+
+
+async def double(value):
+    await asyncio.sleep(0)
+    return value * 2
+
+
+class Test(unittest.TestCase):
+    schema = {
+        'type': 'object',
+        'properties': {
+            'a': SlowDouble(type='integer'),
+            'b': SlowDouble(type='integer'),
+            'c': {'type': 'array', 'items': SlowDouble(type='integer')},
+            'd': opulent_schema.InLineField(lambda x: x + 1, type='integer'),
+        },
+    }
+
+    def setUp(self):
+        SlowDouble.calls = []
+
+    def test_async_transforms(self):
+        validator = aio.async_convert(self.schema)
+
+        async def validate():
+            # each of the four transformations waits for all of them to start
+            SlowDouble.expected = 4
+            SlowDouble.all_started = asyncio.Event()
+            try:
+                return await validator({'a': 1, 'b': 2, 'c': [3, 4], 'd': 5})
+            finally:
+                SlowDouble.expected = SlowDouble.all_started = None
+
+        self.assertEqual({'a': 2, 'b': 4, 'c': [6, 8], 'd': 6}, run(validate()))
+        self.assertEqual(['start'] * 4 + ['end'] * 4, [call[0] for call in SlowDouble.calls])
+
+    def test_enclosing_keywords_see_transformed_values(self):
+        # the same results as `convert`, for coroutine transformations and the plain ones
+        for allof, instance in [({'properties': {'a': {'type': 'integer'}}}, {'a': 1}),
+                                ({'properties': {'a': {'maximum': 0}}}, {'a': 1}),
+                                ({'properties': {'a': {'maximum': 2}}}, {'a': 1}),
+                                ({'properties': {'a': {'maximum': 2}}}, {'a': 2})]:
+            schema = {'properties': {'a': opulent_schema.InLineField(lambda x: x * 2, type='integer')},
+                      'allOf': [allof]}
+            async_schema = {'properties': {'a': opulent_schema.InLineField(double, type='integer')}, 'allOf': [allof]}
+            with self.subTest(allof=allof, instance=instance):
+                expected = outcome(opulent_schema.convert(schema), instance)
+                self.assertEqual(expected, outcome(lambda value: run(aio.async_convert(schema)(value)), instance))
+                self.assertEqual(expected,
+                                 outcome(lambda value: run(aio.async_convert(async_schema)(value)), instance))
+
+        schema = {'properties': {'a': opulent_schema.InLineField(double, type='integer')},
+                  'dependencies': {'a': {'properties': {'a': {'enum': [2]}}}}}
+        self.assertEqual({'a': 2}, run(aio.async_convert(schema)({'a': 1})))
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            run(aio.async_convert(schema)({'a': 2}))
+        self.assertEqual('Dependency "a" not met', str(exception_info.exception))
+
+    def test_nested_transforms(self):
+        validator = aio.async_convert(opulent_schema.InLineField(
+            lambda x: sum(x['items']),
+            type='object',
+            properties={'items': {'type': 'array', 'items': SlowDouble(type='integer')}}))
+
+        self.assertEqual(12, run(validator({'items': [1, 2, 3]})))
+
+    def test_async_inline_field(self):
+        async def lookup(value):
+            await asyncio.sleep(0)
+            if value != 'x':
+                raise ValueError
+            return 'found'
+
+        validator = aio.async_convert({'type': 'array', 'items': opulent_schema.InLineField(lookup, type='string')})
+        self.assertEqual(['found'], run(validator(['x'])))
+
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            run(validator(['x', 'y']))
+        self.assertEqual("InLineField post_transformation failed @ data[1]", str(exception_info.exception))
+
+    def test_check_and_convert(self):
+        validator = aio.async_check_and_convert({'type': 'array', 'items': SlowDouble(type='integer')})
+        self.assertEqual([2, 4], run(validator([1, 2])))
+
+    def test_sync_validation_errors(self):
+        validator = aio.async_convert(self.schema)
+        with self.assertRaises(vol.Invalid):
+            run(validator({'a': 'not an integer'}))
+        self.assertEqual([], SlowDouble.calls)
+
+    def test_executor_threshold(self):
+        validator = aio.async_convert({'type': 'array', 'items': SlowDouble(type='integer')}, executor_threshold=3)
+        self.assertEqual([2], run(validator([1])))
+        self.assertEqual([2, 4, 6], run(validator([1, 2, 3])))
+
+    def test_exceeds_size(self):
+        self.assertTrue(aio.exceeds_size({'a': [1, 2, {'b': 3}]}, 6))
+        self.assertFalse(aio.exceeds_size({'a': [1, 2, {'b': 3}]}, 7))
+
+    def test_validate_many(self):
+        validator = aio.async_convert({'type': 'integer', 'maximum': 10})
+        self.assertEqual([1, 2, 3], run(validator.validate_many([1, 2, 3], slice_size=2)))
+        with self.assertRaises(vol.Invalid) as exception_info:
+            run(validator.validate_many([1, 20, 3]))
+        self.assertEqual([1], exception_info.exception.path)
+
+    def test_validate_stream(self):
+        validator = aio.async_convert(self.schema)
+        lines = [{'a': ind} for ind in range(5)]
+
+        async def consume(concurrency):
+            reader = asyncio.StreamReader()
+            for line in lines:
+                reader.feed_data(json.dumps(line).encode() + b'\n\n')
+            reader.feed_eof()
+            return [res async for res in validator.validate_stream(reader, concurrency=concurrency)]
+
+        self.assertEqual([{'a': 2 * ind} for ind in range(5)], run(consume(1)))
+        self.assertEqual([{'a': 2 * ind} for ind in range(5)], run(consume(3)))
+
+    def test_validate_stream_backpressure(self):
+        validator = aio.async_convert({'type': 'integer'})
+
+        async def consume():
+            reader = asyncio.StreamReader()
+            for ind in range(10):
+                reader.feed_data(b'%d\n' % ind)
+            reader.feed_eof()
+            stream = validator.validate_stream(reader, concurrency=2)
+            first = await stream.__anext__()
+            # nothing more than the in-flight window has been read
+            remaining = len(reader._buffer)
+            await stream.aclose()
+            return first, remaining
+
+        first, remaining = run(consume())
+        self.assertEqual(0, first)
+        self.assertEqual(len(b''.join(b'%d\n' % ind for ind in range(2, 10))), remaining)
+
+    def test_validate_stream_closed_early(self):
+        cancelled = []
+
+        async def lookup(value):
+            if value:
+                try:
+                    await asyncio.Event().wait()  # never set
+                except asyncio.CancelledError:
+                    cancelled.append(value)
+                    raise
+            return value
+
+        validator = aio.async_convert(opulent_schema.InLineField(lookup, type='integer'))
+
+        async def consume():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'0\n1\n2\n')
+            reader.feed_eof()
+            stream = validator.validate_stream(reader, concurrency=3)
+            first = await stream.__anext__()
+            await stream.aclose()
+            for _ in range(3):
+                await asyncio.sleep(0)
+            return first
+
+        self.assertEqual(0, run(consume()))
+        self.assertEqual([1, 2], sorted(cancelled))
+
+    def test_validate_stream_errors(self):
+        validator = aio.async_convert({'type': 'integer'})
+
+        async def consume():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'1\n"a"\n3\n')
+            reader.feed_eof()
+            return [res async for res in validator.validate_stream(reader)]
+
+        with self.assertRaises(vol.Invalid) as exception_info:
+            run(consume())
+        self.assertEqual([1], exception_info.exception.path)
@@ -0,0 +1,163 @@
+import random
+import unittest
+from unittest import mock
+
+import voluptuous as vol
+
+import opulent_schema
+from opulent_schema import batch
+
+
+class Test(unittest.TestCase):
+    schema = {
+        'type': 'object',
+        'properties': {
+            'int': {'type': 'integer', 'minimum': 0, 'exclusiveMaximum': 100, 'multipleOf': 3},
+            'num': {'type': 'number', 'exclusiveMinimum': -1.5, 'maximum': 1e6},
+            'dec': {'type': 'number', 'multipleOf': 0.01},
+            'enum': {'type': 'integer', 'enum': [1, 2, 5]},
+            'str': {'type': 'string', 'maxLength': 5, 'minLength': 1},
+            'str_enum': {'type': 'string', 'enum': ['a', 'b']},
+            'bool': {'type': 'boolean'},
+            'null': {'type': 'null'},
+            'nested': {'type': 'object', 'properties': {'a': {'type': 'integer'}}},
+            'with_default': {'type': 'integer', 'default': 4},
+        },
+        'required': ['int', 'str'],
+    }
+
+    values = {
+        'int': [0, 3, 99, 100, 4, -3, 6.0, 7.5, 'a', None, 2 ** 60 * 3],
+        'num': [-1.5, -1.4, 0, 1e6, 1e6 + 1, 5, 'x', [1]],
+        'dec': [0.01, 0.1, 1.005, 3, 2.33],
+        'enum': [1, 2, 3, 5.0, '1', True],
+        'str': ['', 'a', 'abcde', 'abcdef', 5, None],
+        'str_enum': ['a', 'b', 'c', 1],
+        'bool': [True, False, 0, 'true'],
+        'null': [None, 0, 'null'],
+        'nested': [{'a': 1}, {'a': 'b'}, 3],
+        'with_default': [1, 'a'],
+    }
+
+    def make_records(self, count, seed):
+        rnd = random.Random(seed)
+        records = []
+        for _ in range(count):
+            record = {}
+            for key, values in self.values.items():
+                if rnd.random() < 0.8:
+                    record[key] = rnd.choice(values)
+            records.append(record)
+        return records
+
+    def expected(self, records, converter=opulent_schema.SchemaConverter):
+        validator = converter.convert(self.schema, lazy=False)
+        results, errors = [], []
+        for ind, record in enumerate(records):
+            try:
+                results.append(validator(record))
+            except vol.MultipleInvalid as e:
+                e.prepend([ind])
+                errors.extend(str(err) for err in e.errors)
+        return results, errors
+
+    def actual(self, records, **kwargs):
+        try:
+            return batch.batch_convert(self.schema, **kwargs)(records), []
+        except vol.MultipleInvalid as e:
+            return None, [str(err) for err in e.errors]
+
+    def test_columns(self):
+        validator = batch.batch_convert(self.schema)
+        self.assertEqual({'int', 'num', 'dec', 'enum', 'str', 'str_enum', 'bool', 'null'},
+                         {column.name for column in validator.columns})
+
+    def test_same_as_per_record(self):
+        for use_numpy in [True, False]:
+            for seed in range(20):
+                records = self.make_records(50, seed)
+                expected, expected_errors = self.expected(records)
+                result, errors = self.actual(records, use_numpy=use_numpy)
+                self.assertEqual(sorted(expected_errors), sorted(errors))
+                if not errors:
+                    self.assertEqual(expected, result)
+
+    def test_valid_batch(self):
+        records = [{'int': 3 * i, 'str': 'abc', 'num': i / 7, 'dec': i / 100, 'enum': 2, 'null': None}
+                   for i in range(30)]
+        for use_numpy in [True, False]:
+            self.assertEqual([{**record, 'with_default': 4} for record in records],
+                             batch.batch_convert(self.schema, use_numpy=use_numpy)(records))
+
+    def test_exact(self):
+        records = [{'int': 3, 'str': 'a', 'extra': 1}]
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            batch.batch_convert(self.schema, opulent_schema.ExactSchemaConverter)(records)
+        self.assertEqual("extra keys not allowed @ data[0]['extra']", str(exception_info.exception))
+
+    def test_without_numpy(self):
+        records = self.make_records(50, 0)
+        expected = self.actual(records, use_numpy=False)
+        with mock.patch.object(batch, 'np', None):
+            self.assertEqual(expected, self.actual(records))
+
+    def test_only_failures_revalidated(self):
+        records = [{'int': 3, 'str': 'a'}, {'int': 4, 'str': 'a'}]
+        validator = batch.batch_convert(self.schema)
+        column = next(column for column in validator.columns if column.name == 'int')
+        with mock.patch.object(column, 'validator', wraps=column.validator) as per_value:
+            with self.assertRaises(vol.MultipleInvalid) as exception_info:
+                validator(records)
+        per_value.assert_called_once_with({'int': 4})
+        self.assertEqual("Not a multiple of 3 for dictionary value @ data[1]['int']", str(exception_info.exception))
+
+    def test_not_an_object_schema(self):
+        self.assertEqual([1, 2], batch.batch_convert({'type': 'integer'})([1, 2]))
+
+    def test_flat_schema(self):
+        schema = {
+            'type': 'object',
+            'properties': {'a': {'type': 'integer', 'maximum': 5}, 'b': {'type': 'string'}},
+            'required': ['a'],
+        }
+        validator = batch.batch_convert(schema)
+        self.assertIsNotNone(validator.required)
+        records = [{'a': 1, 'b': 'x', 'c': None}, {'a': 2}]
+        self.assertEqual(records, validator(records))
+
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            validator([{'a': 1}, {'b': 'x'}, [], {'a': 6}])
+        self.assertEqual([
+            "required key not provided @ data[1]['a']",
+            "expected dict @ data[2]",
+            "value must be at most 5 for dictionary value @ data[3]['a']",
+        ], [str(error) for error in exception_info.exception.errors])
+
+    def test_batch_transformed_property(self):
+        calls = []
+
+        def halve_many(values):
+            calls.append(list(values))
+            return [ValueError(v) if v % 2 else v // 2 for v in values]
+
+        schema = {
+            'type': 'object',
+            'properties': {
+                'a': opulent_schema.InLineField(lambda v: v // 2, batch_transformation=halve_many, type='integer'),
+                'b': {'type': 'string'},
+            },
+        }
+        validator = batch.batch_convert(schema)
+        self.assertEqual(['a'], [name for name, _ in validator.transformed])
+        self.assertEqual([{'a': 1, 'b': 'x'}, {'b': 'y'}, {'a': 2}],
+                         validator([{'a': 2, 'b': 'x'}, {'b': 'y'}, {'a': 4}]))
+        self.assertEqual([[2, 4]], calls)
+
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            validator([{'a': 3}, {'a': 'x'}, {'a': 2, 'b': 1}, {'a': 6}])
+        self.assertEqual([3, 6], calls[-1])
+        self.assertEqual([
+            "InLineField post_transformation failed @ data[0]['a']",
+            "not a valid value for dictionary value @ data[1]['a']",
+            "expected str for dictionary value @ data[2]['b']",
+        ], [str(error) for error in exception_info.exception.errors])
@@ -0,0 +1,122 @@
+import datetime
+import json
+import unittest
+
+import voluptuous as vol
+
+import opulent_schema
+from opulent_schema import caching
+
+
+class Test(unittest.TestCase):
+    schema = {
+        'type': 'object',
+        'properties': {
+            'id': {'type': 'integer'},
+            'tags': {'type': 'array', 'items': {'type': 'string'}},
+            'level': {'type': 'string', 'default': 'info'},
+        },
+        'required': ['id'],
+    }
+
+    def setUp(self):
+        self.calls = []
+        validator = opulent_schema.convert(self.schema)
+
+        def counted(instance):
+            self.calls.append(instance)
+            return validator(instance)
+        self.validator = caching.CachedValidator(counted, maxsize=2)
+
+    def test_hits(self):
+        instance = {'id': 1, 'tags': ['a']}
+        self.assertEqual({'id': 1, 'tags': ['a'], 'level': 'info'}, self.validator(instance))
+        self.assertEqual({'id': 1, 'tags': ['a'], 'level': 'info'}, self.validator(json.loads(json.dumps(instance))))
+        self.assertEqual(1, len(self.calls))
+        self.assertEqual(caching.CacheInfo(1, 1, 0, 2, 1), self.validator.cache_info())
+        self.assertEqual(0.5, self.validator.hit_rate)
+
+    def test_key_order(self):
+        self.assertEqual({'id': 1, 'tags': ['a'], 'level': 'info'}, self.validator({'id': 1, 'tags': ['a']}))
+        result = self.validator({'tags': ['a'], 'id': 1})
+        self.assertEqual({'id': 1, 'tags': ['a'], 'level': 'info'}, result)
+        self.assertEqual(['id', 'tags', 'level'], list(result))  # in the order of the validated instance
+        self.assertEqual(1, len(self.calls))
+        self.assertEqual(caching.instance_key({'d': [{'a': 1, 'b': 2}], 'c': ()}, sort_keys=True),
+                         caching.instance_key({'c': (), 'd': [{'b': 2, 'a': 1}]}, sort_keys=True))
+        self.assertNotEqual(caching.instance_key({'a': [1, 2]}, sort_keys=True),
+                            caching.instance_key({'a': [2, 1]}, sort_keys=True))
+
+    def test_types_told_apart(self):
+        for instance in [{'id': 1}, {'id': 1.0}, {'id': True}, {'id': 1, 'tags': ('a',)}]:
+            try:
+                self.validator(instance)
+            except vol.MultipleInvalid:
+                pass
+        self.assertEqual(4, len(self.calls))
+
+    def test_copy_on_read(self):
+        result = self.validator({'id': 1, 'tags': ['a']})
+        result['tags'].append('b')
+        again = self.validator({'id': 1, 'tags': ['a']})
+        self.assertEqual(['a'], again['tags'])
+        again['tags'].append('c')
+        self.assertEqual(['a'], self.validator({'id': 1, 'tags': ['a']})['tags'])
+
+    def test_transformed_copy_on_read(self):
+        schema = {'properties': {'day': opulent_schema.InLineField(datetime.date.fromordinal, type='integer'),
+                                 'set': opulent_schema.InLineField(set, type='array')}}
+        validator = opulent_schema.convert(schema).cached()
+        result = validator({'day': 730000, 'set': [1]})
+        result['set'].add(2)
+        self.assertEqual({'day': datetime.date.fromordinal(730000), 'set': {1}},
+                         validator({'day': 730000, 'set': [1]}))
+        self.assertEqual(1, validator.cache_info().hits)
+
+    def test_errors_cached(self):
+        with self.assertRaises(vol.MultipleInvalid) as expected:
+            opulent_schema.convert(self.schema)({'tags': [1]})
+        for _ in range(2):
+            with self.assertRaises(vol.MultipleInvalid) as raised:
+                self.validator({'tags': [1]})
+            self.assertEqual([(str(e), e.path) for e in expected.exception.errors],
+                             [(str(e), e.path) for e in raised.exception.errors])
+            raised.exception.errors[0].path.append('modified')
+        self.assertEqual(1, len(self.calls))
+
+    def test_error_types_kept(self):
+        validator = opulent_schema.convert({'items': {'enum': [1]}, 'uniqueItems': True}).cached()
+        for instance in [[2], [1, 1]]:
+            with self.assertRaises(vol.MultipleInvalid) as expected:
+                validator(instance)
+            with self.assertRaises(vol.MultipleInvalid) as raised:
+                validator(instance)
+            self.assertEqual([(type(e), str(e), e.path) for e in expected.exception.errors],
+                             [(type(e), str(e), e.path) for e in raised.exception.errors])
+
+    def test_eviction(self):
+        for id_ in [1, 2, 1, 3, 1, 2]:
+            self.validator({'id': id_})
+        self.assertEqual([{'id': 1}, {'id': 2}, {'id': 3}, {'id': 2}], self.calls)
+        self.validator.clear()
+        self.assertEqual(caching.CacheInfo(0, 0, 0, 2, 0), self.validator.cache_info())
+
+    def test_uncached(self):
+        instance = {'id': 1, 'day': datetime.date(2000, 1, 1)}
+        self.assertEqual(dict(instance, level='info'), self.validator(instance))
+        self.assertEqual(dict(instance, level='info'), self.validator(instance))
+        self.assertEqual(caching.CacheInfo(0, 0, 2, 2, 0), self.validator.cache_info())
+
+    def test_loads(self):
+        for document in ['{"id": 2}', b'{"id": 2}', '{"id": 2}']:
+            self.assertEqual({'id': 2, 'level': 'info'}, self.validator.loads(document))
+        # the same text in the same encoding
+        self.assertEqual(1, len(self.calls))
+        self.assertEqual({'id': 2, 'level': 'info'}, self.validator.loads('{"id":2}'))
+        self.assertEqual(2, len(self.calls))
+        with self.assertRaises(json.JSONDecodeError):
+            self.validator.loads('{')
+
+
+if __name__ == '__main__':
+    unittest.main()
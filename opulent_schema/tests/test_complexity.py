@@ -0,0 +1,140 @@
+import math
+import time
+import unittest
+
+import voluptuous as vol
+
+import opulent_schema
+
+CONSTANT = 0
+LINEAR = 1
+QUADRATIC = 2
+
+
+def measure(func, arg, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            func(arg)
+        except vol.Invalid:
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def growth_exponent(make, sizes):
+    """The exponent `k` of the best fitting `time = c * size ** k`, in the least squares sense on the log-log scale.
+    `make(size)` returns a `(func, arg)` pair, `func(arg)` is timed"""
+    points = []
+    for size in sizes:
+        func, arg = make(size)
+        points.append((math.log(size), math.log(max(measure(func, arg), 1e-9))))
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in points) /
+            sum((x - mean_x) ** 2 for x, _ in points))
+
+
+def validating(json_schema, instance, converter=opulent_schema.SchemaConverter):
+    return converter.convert(json_schema, lazy=False), instance
+
+
+class Test(unittest.TestCase):
+    # how much the measured exponent may exceed the declared one (timing noise, constant overheads)
+    tolerance = 0.5
+
+    def assertComplexity(self, declared, make, sizes):
+        exponent = growth_exponent(make, sizes)
+        if exponent > declared + self.tolerance:
+            # a retry, so that a hiccup of the machine does not fail the test
+            exponent = min(exponent, growth_exponent(make, sizes))
+        self.assertLessEqual(exponent, declared + self.tolerance,
+                             'grows like size ** {:.2f}, declared: size ** {}'.format(exponent, declared))
+
+    def test_harness_detects_quadratic(self):
+        def pairs(value):
+            return sum(1 for a in value for b in value if a == b)
+        self.assertGreater(growth_exponent(lambda n: (pairs, list(range(n))), [100, 200, 400, 800]),
+                           LINEAR + self.tolerance)
+
+    def test_unique_items(self):
+        sizes = [1000, 2000, 4000, 8000]
+        self.assertComplexity(LINEAR, lambda n: validating({'uniqueItems': True}, list(range(n))), sizes)
+        self.assertComplexity(LINEAR, lambda n: validating({'uniqueItems': True}, list(range(n)) + [0]), sizes)
+        self.assertComplexity(LINEAR, lambda n: validating({'uniqueItems': True},
+                                                           [{'a': ind, 'b': [ind]} for ind in range(n)]), sizes)
+
+    def test_array_length(self):
+        sizes = [1000, 2000, 4000, 8000]
+        self.assertComplexity(LINEAR, lambda n: validating({'items': {'type': 'integer'}}, list(range(n))), sizes)
+        self.assertComplexity(LINEAR, lambda n: validating({'items': {'type': 'string'}}, list(range(n))), sizes)
+        self.assertComplexity(LINEAR, lambda n: validating({'contains': {'type': 'string'}}, [0] * n + ['a']), sizes)
+        self.assertComplexity(LINEAR, lambda n: validating({'items': [{}], 'additionalItems': {'type': 'string'}},
+                                                           list(range(n))), sizes)
+
+    def test_key_count(self):
+        sizes = [250, 500, 1000, 2000]
+
+        def properties(n):
+            return validating({'properties': {str(ind): {'type': 'integer'} for ind in range(n)}},
+                              {str(ind): ind for ind in range(n)})
+
+        def full_properties(n):
+            return validating({'patternProperties': {'^a': {'type': 'integer'}, '^b': {'type': 'string'}},
+                               'additionalProperties': {'type': 'boolean'}},
+                              {prefix + str(ind): value for ind in range(n // 3)
+                               for prefix, value in [('a', 1), ('b', 'b'), ('c', True)]})
+
+        def pattern_properties(n):
+            return validating({'patternProperties': {'^a': {'type': 'integer'}, '^b': {'type': 'string'}}},
+                              {prefix + str(ind): value for ind in range(n // 2)
+                               for prefix, value in [('a', 1), ('b', 'b')]})
+
+        for make in [properties, full_properties, pattern_properties]:
+            with self.subTest(make.__name__):
+                self.assertComplexity(LINEAR, make, sizes)
+
+    def test_nesting_depth(self):
+        def nested(depth):
+            schema, instance = {'type': 'integer'}, 1
+            for _ in range(depth):
+                schema, instance = {'properties': {'a': schema}, 'required': ['a']}, {'a': instance}
+            return validating(schema, instance)
+        self.assertComplexity(LINEAR, nested, [10, 20, 40, 80])
+
+    def test_conversion_nesting_depth(self):
+        from opulent_schema import aio, deferred
+
+        def nested(depth):
+            schema = opulent_schema.InLineField(int, type='string')
+            for _ in range(depth):
+                schema = {'properties': {'a': schema, 'b': {'items': {'type': 'integer'}}}, 'required': ['a']}
+            return schema
+        for converter in [deferred.DeferredSchemaConverter, aio.AsyncSchemaConverter]:
+            with self.subTest(converter=converter):
+                self.assertComplexity(LINEAR, lambda n: (lambda schema: converter.convert(schema, lazy=False),
+                                                         nested(n)), [20, 40, 80, 160])
+
+    def test_encoder_nesting_depth(self):
+        from opulent_schema import encoding
+
+        def nested(depth):
+            schema = opulent_schema.InLineField(int, type='string')
+            for _ in range(depth):
+                schema = {'properties': {'a': schema, 'b': {'items': {'type': 'integer'}}}, 'required': ['a']}
+            return schema
+        self.assertComplexity(LINEAR, lambda n: (encoding.SchemaEncoder, nested(n)), [10, 20, 40, 80])
+
+    def test_enum_size(self):
+        sizes = [1000, 2000, 4000, 8000]
+        self.assertComplexity(LINEAR, lambda n: validating({'enum': list(range(n))}, n - 1), sizes)
+        self.assertComplexity(LINEAR, lambda n: validating({'enum': list(range(n))}, -1), sizes)
+
+    def test_errors(self):
+        sizes = [1000, 2000, 4000, 8000]
+        self.assertComplexity(LINEAR, lambda n: validating({'items': {'type': 'string'}}, list(range(n))), sizes)
+        self.assertComplexity(LINEAR, lambda n: validating({'additionalProperties': {'type': 'string'}},
+                                                           {str(ind): ind for ind in range(n)}), sizes)
+        self.assertComplexity(CONSTANT, lambda n: validating({'items': {'type': 'string'}}, list(range(n)),
+                                                             opulent_schema.FailFastSchemaConverter), sizes)
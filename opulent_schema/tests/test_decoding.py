@@ -0,0 +1,136 @@
+import decimal
+import json
+import unittest
+
+import voluptuous as vol
+
+import opulent_schema
+from opulent_schema import decoding
+
+
+class DecimalField(opulent_schema.TransformedField):
+    schema = {'type': 'number'}
+    number_decoder = decimal.Decimal
+
+    def _transform(self, instance):
+        return decimal.Decimal(str(instance))
+
+
+class Test(unittest.TestCase):
+    schema = {
+        'type': 'object',
+        'properties': {
+            'id': {'type': 'integer', 'minimum': 0},
+            'customer': {
+                'type': 'object',
+                'properties': {
+                    'name': {'type': 'string', 'maxLength': 5},
+                    'tier': opulent_schema.InLineField(str.upper, type='string', default='basic'),
+                },
+                'required': ['name'],
+            },
+            'orders': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'price': DecimalField(),
+                        'tags': {'type': 'array', 'items': {'type': 'string'}, 'uniqueItems': True},
+                    },
+                    'required': ['price'],
+                },
+                'minItems': 1,
+            },
+            'meta': {
+                'properties': {'size': {'type': 'integer'}},
+                'additionalProperties': {'type': 'string'},
+                'anyOf': [{'required': ['size']}, {'required': ['name']}],
+            },
+        },
+        'patternProperties': {'^x-': {'type': 'integer'}},
+        'required': ['id', 'customer'],
+    }
+    document = """{
+        "id": 1,
+        "customer": {"name": "ann"},
+        "orders": [{"price": 1.1, "tags": ["a", "b"]}, {"price": 12345678901234567890.5}],
+        "meta": {"size": 3, "color": "red"},
+        "x-a": 1,
+        "other": [null, {"a": true}]
+    }"""
+
+    def assertSameErrors(self, document, decoder):
+        with self.assertRaises(vol.MultipleInvalid) as expected:
+            decoder.converter.convert(decoder.json_schema)(json.loads(document))
+        with self.assertRaises(vol.MultipleInvalid) as decoded:
+            decoder(document)
+        self.assertEqual([(str(e), e.path, e.error_type) for e in expected.exception.errors],
+                         [(str(e), e.path, e.error_type) for e in decoded.exception.errors])
+
+    def test_as_validated(self):
+        decoder = decoding.SchemaDecoder(self.schema)
+        expected = opulent_schema.convert(self.schema)(json.loads(self.document))
+        self.assertEqual(expected, decoder(self.document))
+        self.assertEqual(expected, decoder(self.document.encode('utf-16')))
+        self.assertEqual('BASIC', expected['customer']['tier'])
+        self.assertEqual([decimal.Decimal('1.1'), decimal.Decimal('1.2345678901234567E+19')],
+                         [order['price'] for order in expected['orders']])
+
+    def test_decode_numbers(self):
+        decoded = decoding.SchemaDecoder(self.schema, decode_numbers=True)(self.document)
+        self.assertEqual([decimal.Decimal('1.1'), decimal.Decimal('12345678901234567890.5')],
+                         [order['price'] for order in decoded['orders']])
+        # only the numbers of the fields with a `number_decoder` are decoded with it
+        self.assertEqual(1, decoded['x-a'])
+
+    def test_errors(self):
+        decoder = decoding.SchemaDecoder(self.schema)
+        for instance in [
+            {'id': -1, 'customer': {'name': 'too long'}, 'orders': [{'price': 'a', 'tags': ['a', 'a']}]},
+            {'id': 1, 'customer': {}, 'orders': [], 'x-a': 'a'},
+            {'id': 1, 'customer': {'name': 'ann'}, 'meta': {'color': 1}},
+            {'id': 1, 'customer': {'name': 'ann'}, 'meta': {'color': 'red'}},
+            {'customer': 1, 'orders': {}},
+            [],
+        ]:
+            with self.subTest(instance=instance):
+                self.assertSameErrors(json.dumps(instance), decoder)
+
+    def test_required_default(self):
+        decoder = decoding.SchemaDecoder({'properties': {'a': {'type': 'integer', 'default': 1}}, 'required': ['a']})
+        self.assertSameErrors('{}', decoder)
+
+    def test_exact(self):
+        decoder = decoding.SchemaDecoder({'properties': {'a': {'type': 'integer'}}, 'required': ['b']},
+                                         opulent_schema.ExactSchemaConverter)
+        self.assertEqual({'a': 1, 'b': 2}, decoder('{"a": 1, "b": 2}'))
+        self.assertSameErrors('{"a": 1, "b": 2, "c": 3}', decoder)
+
+    def test_transformed_object(self):
+        schema = opulent_schema.InLineField(lambda x: sorted(x.items()), properties={'a': DecimalField()})
+        self.assertEqual([('a', decimal.Decimal('0.5')), ('b', 1)],
+                         decoding.SchemaDecoder(schema)('{"b": 1, "a": 0.5}'))
+
+    def test_keys_interned(self):
+        first, second = decoding.SchemaDecoder(self.schema)(
+            json.dumps({'id': 1, 'customer': {'name': 'ann'}, 'orders': [{'price': 1}, {'price': 2}]}))['orders']
+        price = next(iter(self.schema['properties']['orders']['items']['properties']))
+        self.assertIs(price, next(iter(first)))
+        self.assertIs(price, next(iter(second)))
+
+    def test_malformed(self):
+        decoder = decoding.SchemaDecoder(self.schema)
+        for document in ['', '{"id": 1', '{"id" 1}', '{"id": 1,}', '{"id": 1} 2', '{"customer": {"name": "a"]}']:
+            with self.subTest(document=document), self.assertRaises(json.JSONDecodeError):
+                decoder(document)
+
+    def test_loads_cached(self):
+        self.assertEqual({'a': 2}, decoding.loads(' {"a": 2} ', {'properties': {'a': {'type': 'integer'}}}))
+        decoder = decoding._decoders[(opulent_schema.SchemaConverter, id(self.schema), False)] = \
+            decoding.SchemaDecoder({})
+        self.assertEqual([], decoding.loads('[]', self.schema))
+        self.assertIs(decoder, decoding._decoders.popitem()[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import datetime
+import decimal
+import unittest
+
+import voluptuous as vol
+
+import opulent_schema
+from opulent_schema import deferred
+
+
+class Counted(opulent_schema.TransformedField):
+    calls = []
+
+    def _transform(self, instance):
+        self.calls.append(instance)
+        return decimal.Decimal(instance)
+
+
+class Test(unittest.TestCase):
+    schema = {
+        'type': 'object',
+        'properties': {
+            'a': Counted(type='string'),
+            'b': {'type': 'array', 'items': Counted(type='string')},
+            'c': opulent_schema.InLineField(lambda x: datetime.date.fromordinal(x), type='integer'),
+            'd': {'type': 'object', 'properties': {'e': Counted(type='string')}},
+            'f': opulent_schema.InLineField(lambda x: sum(x.values()), properties={'g': Counted(type='string')}),
+            'h': {'type': 'integer'},
+        },
+        'required': ['h'],
+    }
+    instance = {'a': '1.5', 'b': ['1', '2'], 'c': 730000, 'd': {'e': '3'}, 'f': {'g': '4'}, 'h': 1}
+
+    def setUp(self):
+        Counted.calls.clear()
+
+    def test_same_result(self):
+        expected = opulent_schema.convert(self.schema)(self.instance)
+        Counted.calls.clear()
+        result = deferred.deferred_convert(self.schema)(self.instance)
+        self.assertEqual([], Counted.calls)
+        self.assertEqual(expected, result)
+        self.assertEqual(expected, result.materialize())
+        self.assertIsInstance(result.materialize()['b'][0], decimal.Decimal)
+
+    def test_on_access(self):
+        result = deferred.deferred_convert(self.schema)(self.instance)
+        self.assertEqual(1, result['h'])
+        self.assertEqual([], Counted.calls)
+        self.assertEqual(decimal.Decimal('2'), result['b'][-1])
+        self.assertEqual(['2'], Counted.calls)
+        self.assertEqual(decimal.Decimal('2'), result['b'][1])
+        self.assertEqual(['2'], Counted.calls)
+        self.assertIsInstance(result['d'], deferred.DeferredMapping)
+        self.assertIsInstance(result['b'], deferred.DeferredSequence)
+        self.assertEqual(decimal.Decimal('4'), result['f'])
+        self.assertEqual(['2', '4'], Counted.calls)
+        self.assertIn('a', result)
+        self.assertEqual(['2', '4'], Counted.calls)
+        self.assertEqual(6, len(result))
+        self.assertEqual([decimal.Decimal('1'), decimal.Decimal('2')], result['b'][:])
+
+    def test_structural_errors_eager(self):
+        validator = deferred.deferred_convert(self.schema)
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            validator({'a': 1, 'b': ['1']})
+        self.assertEqual(sorted(["expected str for dictionary value @ data['a']",
+                                 "required key not provided @ data['h']"]),
+                         sorted(map(str, exception_info.exception.errors)))
+        self.assertEqual([], Counted.calls)
+
+    def test_enclosing_keywords_see_transformed_values(self):
+        field = opulent_schema.InLineField(lambda x: x * 2, type='integer')
+        for schema, instance in [
+            ({'properties': {'a': field}, 'allOf': [{'properties': {'a': {'type': 'integer'}}}]}, {'a': 1}),
+            ({'properties': {'a': field}, 'allOf': [{'properties': {'a': {'maximum': 1}}}]}, {'a': 1}),
+            ({'properties': {'a': field}, 'dependencies': {'a': {'properties': {'a': {'enum': [2]}}}}}, {'a': 1}),
+            ({'properties': {'a': field}, 'dependencies': {'a': {'properties': {'a': {'enum': [2]}}}}}, {'a': 2}),
+        ]:
+            with self.subTest(schema=schema, instance=instance):
+                try:
+                    expected = opulent_schema.convert(schema)(instance)
+                except vol.MultipleInvalid as e:
+                    with self.assertRaises(vol.MultipleInvalid) as exception_info:
+                        deferred.deferred_convert(schema)(instance)
+                    self.assertEqual(list(map(str, e.errors)), list(map(str, exception_info.exception.errors)))
+                else:
+                    self.assertEqual(expected, deferred.deferred_convert(schema)(instance))
+
+    def test_transformations_deferred_outside_enclosing_keywords(self):
+        schema = {**self.schema, 'properties': {
+            **self.schema['properties'],
+            'd': {'type': 'object', 'properties': {'e': Counted(type='string')},
+                  'allOf': [{'properties': {'e': {'multipleOf': 3}}}]},
+        }}
+        result = deferred.deferred_convert(schema)(self.instance)
+        self.assertEqual(['3'], Counted.calls)
+        self.assertEqual(decimal.Decimal('1.5'), result['a'])
+        self.assertEqual(['3', '1.5'], Counted.calls)
+        with self.assertRaises(vol.MultipleInvalid):
+            deferred.deferred_convert(schema)({**self.instance, 'd': {'e': '4'}})
+
+    def test_transformation_errors_on_access(self):
+        result = deferred.deferred_convert(self.schema)({'a': 'x', 'b': ['1', 'y'], 'h': 1})
+        self.assertEqual(decimal.Decimal('1'), result['b'][0])
+        with self.assertRaises(vol.Invalid) as exception_info:
+            result['a']
+        self.assertEqual("Counted post_transformation failed @ data['a']", str(exception_info.exception))
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            result.materialize()
+        self.assertEqual(["Counted post_transformation failed @ data['a']",
+                          "Counted post_transformation failed @ data['b'][1]"],
+                         list(map(str, exception_info.exception.errors)))
+        self.assertNotEqual({'a': 'x', 'b': [decimal.Decimal('1'), 'y'], 'h': 1}, result)
+        self.assertEqual(result, result)
+
+    def test_top_level(self):
+        self.assertEqual(decimal.Decimal('1'), deferred.deferred_convert(Counted(type='string'))('1'))
+        self.assertEqual(2, deferred.deferred_convert({'type': 'integer'})(2))
+        self.assertEqual([decimal.Decimal('1')],
+                         deferred.deferred_convert({'items': Counted(type='string')})(['1']).materialize())
+
+    def test_exact(self):
+        with self.assertRaises(vol.Invalid):
+            deferred.exact_deferred_convert(self.schema)({**self.instance, 'z': 1})
+        with self.assertRaises(vol.Invalid):
+            deferred.deferred_check_and_convert({'type': 'nope'})
+
+    def test_batch_transformations_deferred(self):
+        calls = []
+
+        def many(values):
+            calls.append(values)
+            return values
+
+        result = deferred.deferred_convert({'items': opulent_schema.InLineField(str, batch_transformation=many)})([1])
+        self.assertEqual([], calls)
+        self.assertEqual('1', result[0])
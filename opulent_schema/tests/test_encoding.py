@@ -0,0 +1,89 @@
+import datetime
+import decimal
+import json
+import unittest
+
+import opulent_schema
+from opulent_schema import encoding
+
+
+def to_date(value):
+    return datetime.date.fromordinal(value)
+
+
+Date = opulent_schema.InLineField(to_date, type='integer', inverse_transformation=datetime.date.toordinal)
+Amount = opulent_schema.InLineField(lambda x: decimal.Decimal(str(x)), type='number',
+                                    inverse_transformation=lambda x: x)
+
+
+def default(value):
+    if isinstance(value, (datetime.date, decimal.Decimal)):
+        return str(value)
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+
+class Test(unittest.TestCase):
+    schema = {
+        'type': 'object',
+        'properties': {
+            'id': {'type': 'integer'},
+            'name': {'type': 'string'},
+            'ünï': {'type': 'string'},
+            'day': Date,
+            'orders': {
+                'type': 'array',
+                'items': {'type': 'object', 'properties': {'amount': Amount, 'note': {'type': 'string'}}},
+            },
+            'plain': {'type': 'object', 'properties': {'a': {'type': 'array'}}},
+            'notes': {'additionalProperties': Date},
+        },
+    }
+
+    def test_inverse_transformations(self):
+        instance = {
+            'id': 1,
+            'name': 'ann "the" ünï',
+            'day': 730000,
+            'orders': [{'amount': 1.5, 'note': 'a'}, {'amount': 2}],
+            'plain': {'a': [1, None, True, 1.5]},
+            'notes': {'x': 730001},
+            'ünï': '',
+        }
+        validated = opulent_schema.convert(self.schema)(instance)
+        encoded = encoding.SchemaEncoder(self.schema)(validated)
+        self.assertEqual(json.dumps(instance), encoded)
+        self.assertEqual(validated, opulent_schema.convert(self.schema)(json.loads(encoded)))
+
+    def test_decimals_exact(self):
+        encoder = encoding.SchemaEncoder({'items': Amount})
+        self.assertEqual('[12345678901234567890.5, 1E+2, NaN, -Infinity]', encoder([
+            decimal.Decimal('12345678901234567890.5'), decimal.Decimal('1E+2'), decimal.Decimal('NaN'),
+            decimal.Decimal('-Infinity')]))
+
+    def test_no_inverse_transformation(self):
+        schema = {'properties': {'day': opulent_schema.InLineField(to_date, type='integer'), 'id': {}}}
+        validated = opulent_schema.convert(schema)({'day': 730000, 'id': 1})
+        self.assertEqual(json.dumps(validated, default=default),
+                         encoding.SchemaEncoder(schema, default=default)(validated))
+        with self.assertRaises(TypeError):
+            encoding.SchemaEncoder(schema)(validated)
+
+    def test_unexpected_values(self):
+        # e.g. not validated, or extra properties
+        encoder = encoding.SchemaEncoder(self.schema, default=default)
+        for instance in [
+            {'name': None, 'id': 1.5, 'ünï': 1},
+            {'name': 'a', 'orders': {}, 'other': [decimal.Decimal('1.5')], 1: 2},
+            {'plain': [], 'notes': {1: datetime.date(2000, 1, 1)}},
+            [float('inf')],
+        ]:
+            with self.subTest(instance=instance):
+                self.assertEqual(json.dumps(instance, default=default), encoder(instance))
+
+    def test_dumps_cached(self):
+        self.assertEqual('{"day": 730000}', encoding.dumps({'day': datetime.date.fromordinal(730000)}, self.schema))
+        self.assertIn((opulent_schema.SchemaConverter, id(self.schema), None), encoding._encoders)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+import opulent_schema
+from opulent_schema import explain
+
+
+class Test(unittest.TestCase):
+    schema = {
+        'type': 'object',
+        'properties': {
+            'a': {'type': 'integer', 'minimum': 0, 'multipleOf': 2},
+            'b': {'type': 'array', 'items': {'type': 'string', 'format': 'email'}, 'uniqueItems': True},
+            'c': opulent_schema.InLineField(int, type='string', pattern='^[0-9]+$'),
+            'd': {'oneOf': [{'type': 'string'}, {'enum': list(range(40))}]},
+        },
+        'patternProperties': {'^x': {'type': 'number'}},
+        'additionalProperties': {'type': 'boolean'},
+        'required': ['a'],
+    }
+
+    def test_tree(self):
+        explanation = explain.explain(self.schema)
+        tree = explanation.tree
+        self.assertEqual(('All', '#'), (tree.kind, tree.pointer))
+        self.assertEqual(['type', 'object', 'patternProperties and additionalProperties'],
+                         [node.kind for _, node in tree.children])
+
+        properties = dict(tree.children[1][1].children)
+        self.assertEqual(['required \'a\'', 'optional \'b\'', 'optional \'c\'', 'optional \'d\''], list(properties))
+        self.assertEqual('#/properties/a', properties["required 'a'"].pointer)
+        self.assertEqual(['type', 'Range', 'MultipleOf'],
+                         [node.kind for _, node in properties["required 'a'"].children])
+        self.assertEqual('[0, inf)', properties["required 'a'"].children[1][1].detail)
+        items = properties["optional 'b'"].children[2][1].children[0][1]
+        self.assertEqual('#/properties/b/items', items.pointer)
+        self.assertEqual(('format', 'Email'), (items.children[1][1].kind, items.children[1][1].detail))
+        self.assertEqual(['type', 'regex', 'Coerce'], [node.kind for _, node in properties["optional 'c'"].children])
+        self.assertEqual(('OneOf', 4), (properties["optional 'd'"].kind, properties["optional 'd'"].cost))
+
+        self.assertEqual(2, explanation.regexes)
+        # the root, `properties`, `oneOf`, `patternProperties` with `additionalProperties`
+        self.assertEqual(1 + 1 + 2 + 2, explanation.schemas)
+        self.assertEqual(tree.cost, explanation.cost)
+        self.assertGreater(explanation.compile_time, 0)
+        self.assertGreater(explanation.memory, 0)
+
+    def test_cost(self):
+        cheap = explain.explain({'type': 'string', 'maxLength': 3})
+        expensive = explain.explain({'type': 'string', 'format': 'date-time', 'pattern': '^2'})
+        self.assertEqual(2, cheap.cost)
+        self.assertGreater(expensive.cost, cheap.cost)
+
+    def test_str(self):
+        lines = str(explain.explain(self.schema)).splitlines()
+        self.assertTrue(lines[0].startswith('compile time: '))
+        self.assertEqual('regexes: 2, schemas: 6, estimated cost: 38', lines[1])
+        self.assertIn("    optional 'd': OneOf  <#/properties/d>  [cost 4]", lines)
+
+    def test_exact_converter(self):
+        tree = explain.explain({'type': 'object', 'properties': {'a': {}}}, opulent_schema.ExactSchemaConverter).tree
+        node = tree.children[1][1]
+        self.assertEqual(('object', 'extra=PREVENT_EXTRA'), (node.kind, node.detail))
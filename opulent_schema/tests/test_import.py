@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import opulent_schema
+
+# import time of the package, without its requirements (voluptuous, sqlalchemy)
+IMPORT_BUDGET = 0.1
+
+
+def import_times(module):
+    """Cumulative import times (in seconds) of the modules imported by a fresh interpreter importing `module`"""
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(opulent_schema.__file__)),
+    ).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def imported_modules(code):
+    return set(subprocess.run(
+        [sys.executable, '-c', code + '\nimport sys\nprint(" ".join(sys.modules))'],
+        stdout=subprocess.PIPE, universal_newlines=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(opulent_schema.__file__)),
+    ).stdout.split())
+
+
+class Test(unittest.TestCase):
+    def test_import_time(self):
+        times = import_times('opulent_schema')
+        self.assertLess(times['opulent_schema'] - times['voluptuous'], IMPORT_BUDGET)
+
+    def test_schemalchemy_import_time(self):
+        times = import_times('opulent_schema.schemalchemy')
+        self.assertLess(times['opulent_schema.schemalchemy'] - times['sqlalchemy'] - times.get('opulent_schema', 0),
+                        IMPORT_BUDGET)
+
+    def test_lazy_attributes(self):
+        modules = imported_modules('import opulent_schema\n'
+                                   'assert "schema_schema" not in vars(opulent_schema.opulent_schema)')
+        self.assertNotIn('sqlalchemy', modules)
+
+        modules = imported_modules('import opulent_schema.schemalchemy')
+        self.assertFalse({'delorean', 'sqlalchemy.orm', 'sqlalchemy.dialects.postgresql'} & modules)
+
+    def test_lazy_attributes_access(self):
+        self.assertIs(opulent_schema.schema_schema, opulent_schema.opulent_schema.schema_schema)
+        self.assertIn('email', opulent_schema.format_validators)
+        with self.assertRaises(AttributeError):
+            opulent_schema.missing
+        with self.assertRaises(AttributeError):
+            opulent_schema.opulent_schema.missing
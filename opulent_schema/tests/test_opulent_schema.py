@@ -1,6 +1,7 @@
 import contextlib
 import functools
 import numbers
+import pickle
 import unittest
 from unittest import mock
 
@@ -1235,3 +1236,347 @@ class TestUngettable(unittest.TestCase):
                 pass
 
         Overriden().get_pre_transformation()
+
+
+class TestBatchTransformation(unittest.TestCase):
+    @staticmethod
+    def halve(value):
+        if value % 2:
+            raise ValueError(value)
+        return value // 2
+
+    def make_field(self, calls):
+        def halve_many(values):
+            calls.append(list(values))
+            return [ValueError(v) if v % 2 else v // 2 for v in values]
+        return opulent_schema.InLineField(self.halve, batch_transformation=halve_many, type='integer', minimum=0)
+
+    def test_items(self):
+        calls = []
+        validator = opulent_schema.SchemaConverter.convert({'items': self.make_field(calls)})
+        self.assertEqual([1, 2, 0], validator([2, 4, 0]))
+        self.assertEqual([[2, 4, 0]], calls)
+
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            validator([2, 3, -2, 'a', 6])
+        self.assertEqual([2, 3, 6], calls[-1])
+        self.assertEqual(sorted([
+            'InLineField post_transformation failed @ data[1]',
+            'value must be at least 0 @ data[2]',
+            'not a valid value @ data[3]',
+        ]), sorted(map(str, exception_info.exception.errors)))
+
+    def test_same_as_single(self):
+        calls = []
+        field = self.make_field(calls)
+        single = opulent_schema.InLineField(self.halve, type='integer', minimum=0)
+        for instance in [[], [2, 4], [1, 2, -2, 'a'], [[2], 2]]:
+            with self.subTest(instance=instance):
+                try:
+                    expected = opulent_schema.SchemaConverter.convert({'items': single})(instance)
+                except vol.Invalid as e:
+                    with self.assertRaises(vol.Invalid) as exception_info:
+                        opulent_schema.SchemaConverter.convert({'items': field})(instance)
+                    self.assertEqual(sorted(map(str, e.errors)), sorted(map(str, exception_info.exception.errors)))
+                else:
+                    self.assertEqual(expected, opulent_schema.SchemaConverter.convert({'items': field})(instance))
+
+    def test_additional_items(self):
+        calls = []
+        validator = opulent_schema.SchemaConverter.convert({'items': [{'type': 'string'}],
+                                                            'additionalItems': self.make_field(calls)})
+        self.assertEqual(['a', 1, 2], validator(['a', 2, 4]))
+        self.assertEqual([[2, 4]], calls)
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            validator(['a', 2, 3])
+        self.assertEqual('InLineField post_transformation failed @ data[2]', str(exception_info.exception))
+
+    def test_fail_fast(self):
+        calls = []
+        validator = opulent_schema.FailFastSchemaConverter.convert({'items': self.make_field(calls)})
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            validator([-2, 2, 3, 5])
+        self.assertEqual([], calls)
+        self.assertEqual(1, len(exception_info.exception.errors))
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            validator([2, 3, 5])
+        self.assertEqual(['InLineField post_transformation failed @ data[1]'],
+                         list(map(str, exception_info.exception.errors)))
+
+    def test_transformed_field(self):
+        class Doubled(opulent_schema.TransformedField):
+            calls = 0
+
+            def _transform(self, instance):
+                return instance * 2
+
+            def _transform_many(self, instances):
+                Doubled.calls += 1
+                return [vol.Invalid('too big') if instance > 10 else instance * 2 for instance in instances]
+
+        validator = opulent_schema.SchemaConverter.convert({'properties': {'a': {'items': Doubled()}}})
+        self.assertEqual({'a': [2, 4]}, validator({'a': [1, 2]}))
+        self.assertEqual(1, Doubled.calls)
+        self.assertEqual(4, opulent_schema.SchemaConverter.convert(Doubled())(2))
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            validator({'a': [1, 11]})
+        self.assertEqual("too big @ data['a'][1]", str(exception_info.exception))
+
+    def test_batch_transformation_contract(self):
+        def lookup_many(values):
+            return [KeyError(value) if value > 1 else vol.Invalid('too small') if value < 0 else value
+                    for value in values]
+
+        validator = opulent_schema.SchemaConverter.convert({'items': opulent_schema.InLineField(
+            self.halve, batch_transformation=lookup_many, type='integer')})
+        self.assertEqual([0, 1], validator([0, 1]))
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            validator([0, 2, -1])
+        self.assertEqual(['InLineField post_transformation failed @ data[1]', 'too small @ data[2]'],
+                         list(map(str, exception_info.exception.errors)))
+
+        for wrong in [lambda values: values[1:], lambda values: values * 2]:
+            validator = opulent_schema.SchemaConverter.convert({'items': opulent_schema.InLineField(
+                self.halve, batch_transformation=wrong, type='integer')})
+            with self.subTest(wrong=wrong), self.assertRaises(TypeError):
+                validator([0, 2])
+
+    def test_no_batch_transformation(self):
+        self.assertIsNone(opulent_schema.SchemaConverter.batch_post_transformation(
+            opulent_schema.InLineField(self.halve)))
+        with self.assertRaises(opulent_schema.UnGettableError):
+            opulent_schema.TransformedField().get_batch_post_transformation()
+
+
+class TestMemo(unittest.TestCase):
+    def test_memo(self):
+        calls = []
+
+        def transformation(value):
+            calls.append(value)
+            if value == 'bad':
+                raise ValueError(value)
+            return str(value) * 2
+
+        memo = opulent_schema.Memo(transformation, maxsize=2)
+        self.assertEqual(['aa', 'aa', '11', 'TrueTrue', '11'], [memo(v) for v in ['a', 'a', 1, True, 1]])
+        self.assertEqual(['a', 1, True], calls)
+        self.assertEqual(opulent_schema.MemoInfo(hits=2, misses=3, uncached=0, maxsize=2, currsize=2),
+                         memo.cache_info())
+        self.assertEqual(0.4, memo.hit_rate)
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                memo('bad')
+        self.assertEqual(['bad', 'bad'], calls[-2:])
+
+        self.assertEqual('[1][1]', memo([1]))
+        self.assertEqual(1, memo.cache_info().uncached)
+
+        memo.clear()
+        self.assertEqual(opulent_schema.MemoInfo(0, 0, 0, 2, 0), memo.cache_info())
+        self.assertEqual(0.0, memo.hit_rate)
+
+    def test_key(self):
+        calls = []
+
+        def transformation(value):
+            calls.append(value)
+            return sum(value)
+
+        memo = opulent_schema.Memo(transformation, maxsize=2, key=tuple)
+        self.assertEqual([3, 3, 1, 5, 3], [memo(v) for v in [[1, 2], [1, 2], [1], [5], [1, 2]]])
+        self.assertEqual([[1, 2], [1], [5], [1, 2]], calls)
+        self.assertEqual(opulent_schema.MemoInfo(hits=1, misses=4, uncached=0, maxsize=2, currsize=2),
+                         memo.cache_info())
+
+    def test_transformation_type_error(self):
+        memo = opulent_schema.Memo(lambda value: value + 1)
+        with self.assertRaises(TypeError):
+            memo('a')
+        self.assertEqual(0, memo.cache_info().uncached)
+
+    def test_fields(self):
+        calls = []
+
+        def transformation(value):
+            calls.append(value)
+            return value * 2
+
+        field = opulent_schema.InLineField(transformation, type='integer', memo_size=16)
+        validator = opulent_schema.SchemaConverter.convert({'items': field})
+        self.assertEqual([2, 4, 2, 2], validator([1, 2, 1, 1]))
+        self.assertEqual([4], opulent_schema.SchemaConverter.convert({'items': field})([2]))
+        self.assertEqual([1, 2], calls)
+        self.assertEqual(3, field.get_memoized_post_transformation().cache_info().hits)
+
+        class Upper(opulent_schema.TransformedField):
+            memo_size = 4
+            memo_key = staticmethod(str.lower)
+
+            def _transform(self, instance):
+                calls.append(instance)
+                return instance.upper()
+
+        self.assertEqual(['A', 'A'], opulent_schema.SchemaConverter.convert({'items': Upper()})(['a', 'A']))
+        self.assertEqual(['a'], calls[2:])
+
+        self.assertIs(transformation, opulent_schema.InLineField(transformation).get_memoized_post_transformation())
+
+    def test_coroutine(self):
+        async def transformation(value):
+            return value
+
+        with self.assertRaises(TypeError):
+            opulent_schema.Memo(transformation)
+
+    def test_pickle(self):
+        memo = pickle.loads(pickle.dumps(opulent_schema.Memo(abs, 8)))
+        self.assertEqual(1, memo(-1))
+        self.assertEqual(8, memo.maxsize)
+
+
+class TestMaxErrors(unittest.TestCase):
+    maxDiff = None
+
+    def test_ListSchema_errors(self):
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            opulent_schema.ListSchema(int, 1)(['a', 'b', 2, 'c', 'd'])
+        self.assertEqual([[1], [3], [4]], [e.path for e in exception_info.exception.errors])
+
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            opulent_schema.ListSchema(int, 1, max_errors=2)(['a', 'b', 2, 'c', 'd'])
+        self.assertEqual([[1], [3]], [e.path for e in exception_info.exception.errors])
+
+    def test_ExtendedExactSequence_errors(self):
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            opulent_schema.ExtendedExactSequence([int, str, int])(['a', 'b', 'c'])
+        self.assertEqual([[0], [2]], [e.path for e in exception_info.exception.errors])
+
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            opulent_schema.ExtendedExactSequence([int, str, int], max_errors=1)(['a', 'b', 'c'])
+        self.assertEqual([[0]], [e.path for e in exception_info.exception.errors])
+
+    def test_FullPropertiesSchema_errors(self):
+        validator = opulent_schema.FullPropertiesSchema(
+            opulent_schema.SchemaConverter.go, {'^a': {'type': 'integer'}}, {'type': 'string'}, {'b'})
+        self.assertEqual({'a1': 1, 'b': None, 'c': 'x'}, validator({'a1': 1, 'b': None, 'c': 'x'}))
+
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            validator({'a1': 'x', 'a2': 'y', 'b': None, 'c': 1})
+        self.assertEqual([['a1'], ['a2'], ['c']], [e.path for e in exception_info.exception.errors])
+
+        validator.max_errors = 2
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            validator({'a1': 'x', 'a2': 'y', 'b': None, 'c': 1})
+        self.assertEqual([['a1'], ['a2']], [e.path for e in exception_info.exception.errors])
+
+    def test_fail_fast(self):
+        schema = {'type': 'array', 'items': {'type': 'integer'}}
+        instance = ['x'] * 1000
+
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            opulent_schema.convert(schema)(instance)
+        self.assertEqual(1000, len(exception_info.exception.errors))
+
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            opulent_schema.fail_fast_convert(schema)(instance)
+        self.assertEqual([[0]], [e.path for e in exception_info.exception.errors])
+
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            opulent_schema.SchemaConverter.with_max_errors(5).convert(schema)(instance)
+        self.assertEqual(5, len(exception_info.exception.errors))
+
+    def test_max_errors_properties(self):
+        schemas = [
+            {'additionalProperties': {'type': 'integer'}, 'properties': {'a': {}}},
+            {'patternProperties': {'^x': {'type': 'integer'}}, 'properties': {'a': {}}},
+            {'patternProperties': {'^x': {'type': 'integer'}}, 'additionalProperties': {'type': 'integer'},
+             'properties': {'a': {}}},
+        ]
+        instance = {'a': 's', **{'x{}'.format(ind): 's' for ind in range(100)}}
+        for schema in schemas:
+            self.assertEqual({'a': 's', 'x1': 1}, opulent_schema.fail_fast_convert(schema)({'a': 's', 'x1': 1}))
+            with self.assertRaises(vol.MultipleInvalid) as exception_info:
+                opulent_schema.convert(schema)(instance)
+            self.assertEqual(100, len(exception_info.exception.errors))
+            with self.assertRaises(vol.MultipleInvalid) as exception_info:
+                opulent_schema.fail_fast_convert(schema)(instance)
+            self.assertEqual(1, len(exception_info.exception.errors))
+
+    def test_same_errors_as_default(self):
+        item = {'type': 'object', 'properties': {'c': {'type': 'integer'}}, 'required': ['c']}
+        for schema, instance in [
+            ({'additionalProperties': {'type': 'integer'}, 'properties': {'a': {'type': 'integer', 'default': 's'}},
+              'required': ['r']}, {'x': 's', 'a': 'b', 'y': {}}),
+            ({'patternProperties': {'^x': {'type': 'integer'}, '^y': {'type': 'integer'}},
+              'properties': {'a': {'type': 'integer'}}}, {'y1': 's', 'x1': 'b', 'x2': 'c', 'a': 1}),
+            ({'patternProperties': {'^x': {'type': 'integer'}}, 'additionalProperties': {'type': 'integer'}},
+             {'a': 's', 'x1': 'b'}),
+            ({'items': item}, [5, {'c': 'x'}, 7, {}]),
+            ({'items': item}, [5, 6, {}]),
+            ({'items': {'type': 'integer'}}, ['a', 1, 'b']),
+            ({'items': [{'type': 'integer'}], 'additionalItems': item}, ['a', {}, 1]),
+            ({'properties': {'x': {'additionalProperties': {'items': item}}}}, {'x': {'k': [1, {'c': 's'}]}}),
+        ]:
+            with self.assertRaises(vol.MultipleInvalid) as exception_info:
+                opulent_schema.convert(schema)(instance)
+            expected = [(str(e), e.path) for e in exception_info.exception.errors]
+            for converter, max_errors in [(opulent_schema.FailFastSchemaConverter, 1),
+                                          (opulent_schema.SchemaConverter.with_max_errors(2), 2),
+                                          (opulent_schema.SchemaConverter.with_max_errors(100), 100)]:
+                with self.subTest(schema=schema, max_errors=max_errors):
+                    with self.assertRaises(vol.MultipleInvalid) as exception_info:
+                        converter.convert(schema)(instance)
+                    self.assertEqual(expected[:max_errors],
+                                     [(str(e), e.path) for e in exception_info.exception.errors])
+
+    def test_exact_fail_fast(self):
+        schema = {'patternProperties': {'^x': {'type': 'integer'}}}
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            opulent_schema.exact_convert(schema)({'y': 1})
+        expected = str(exception_info.exception)
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            opulent_schema.exact_fail_fast_convert(schema)({'y': 1})
+        self.assertEqual(expected, str(exception_info.exception))
+
+
+class TestLazyErrors(unittest.TestCase):
+    def test_messages(self):
+        for schema, instance, message in [
+            ({'enum': [1, 'a']}, 2, "2 not in [1, 'a'] @ data[0]"),
+            ({'const': {'a': 1}}, 2, "Value not equal to: {'a': 1} @ data[0]"),
+            ({'dependencies': {'a': ['b']}}, {'a': 1}, 'Dependency "a" not met @ data[0]'),
+            ({'multipleOf': 0.5}, 0.7, 'Not a multiple of 0.5 @ data[0]'),
+            ({'uniqueItems': True}, [[1], [1]], 'duplicate value: [1] @ data[0]'),
+        ]:
+            with self.assertRaises(vol.Invalid) as exception_info:
+                opulent_schema.convert({'items': schema})([instance])
+            self.assertEqual(message, str(exception_info.exception))
+            self.assertEqual([0], exception_info.exception.path)
+
+        with self.assertRaises(vol.InInvalid) as exception_info:
+            opulent_schema.In([1])(2)
+        self.assertEqual(('2 not in [1]',), exception_info.exception.args)
+
+    def test_not_formatted_when_discarded(self):
+        class Value:
+            formatted = 0
+
+            def __repr__(self):
+                Value.formatted += 1
+                return 'Value'
+
+        validator = opulent_schema.convert({'anyOf': [{'enum': [Value()]}, {'const': Value()}, {'type': 'string'}]})
+        self.assertEqual(['a'] * 100, [validator('a') for _ in range(100)])
+        self.assertEqual(0, Value.formatted)
+
+    def test_path(self):
+        error = opulent_schema.LazyInvalid('{} {}', 1, 'a', path=['c'])
+        error.prepend([1])
+        error.prepend(['a', 'b'])
+        self.assertEqual(['a', 'b', 1, 'c'], error.path)
+        error.prepend([0])
+        self.assertEqual("1 a @ data[0]['a']['b'][1]['c']", str(error))
+        self.assertEqual('1 a', error.msg)
+        self.assertEqual('1 a', error.error_message)
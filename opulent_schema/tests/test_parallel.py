@@ -0,0 +1,162 @@
+import concurrent.futures
+import decimal
+import pickle
+import unittest
+from unittest import mock
+
+import voluptuous as vol
+
+import opulent_schema
+from opulent_schema import parallel
+
+
+class CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(2)
+        self.chunks = []
+        self.descriptions = []
+
+    def map(self, func, *iterables):
+        keys, descriptions, chunks = iterables
+        chunks = list(chunks)
+        self.chunks.extend(chunks)
+        self.descriptions.extend(description for description, _ in zip(descriptions, chunks))
+        return super().map(func, keys, self.descriptions[-len(chunks):], chunks)
+
+
+class AmountField(opulent_schema.TransformedField):
+    schema = {'type': 'number'}
+
+    def _transform(self, instance):
+        return decimal.Decimal(str(instance))
+
+
+class CountedField(opulent_schema.TransformedField):
+    calls = 0
+
+    def _transform(self, instance):
+        CountedField.calls += 1
+        return instance
+
+
+class Test(unittest.TestCase):
+    schema = {
+        'type': 'array',
+        'items': {
+            'type': 'object',
+            'properties': {'id': {'type': 'integer', 'minimum': 0}, 'amount': AmountField()},
+            'required': ['id'],
+        },
+        'uniqueItems': True,
+        'maxItems': 100,
+    }
+    instance = [{'id': ind, 'amount': ind / 2} for ind in range(50)]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = concurrent.futures.ProcessPoolExecutor(2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown()
+
+    def assertSameValidation(self, schema, instance, converter, sequential=opulent_schema.SchemaConverter):
+        try:
+            expected = sequential.convert(schema)(instance)
+        except vol.MultipleInvalid as e:
+            with self.assertRaises(vol.MultipleInvalid) as raised:
+                converter.convert(schema)(instance)
+            self.assertEqual([(type(error), str(error), error.path) for error in e.errors],
+                             [(type(error), str(error), error.path) for error in raised.exception.errors])
+        else:
+            self.assertEqual(expected, converter.convert(schema)(instance))
+
+    def test_processes(self):
+        converter = opulent_schema.SchemaConverter.with_parallel_items(self.executor, threshold=10, chunk_size=7)
+        invalid = list(self.instance)
+        invalid[20], invalid[40] = {'id': -1}, {'amount': 'a'}
+        for instance in [self.instance, invalid, self.instance + self.instance[:1], self.instance * 3, {}, []]:
+            with self.subTest(instance=instance):
+                self.assertSameValidation(self.schema, instance, converter)
+        self.assertEqual(decimal.Decimal('24.5'), converter.convert(self.schema)(self.instance)[-1]['amount'])
+
+    def test_chunks(self):
+        executor = CountingExecutor()
+        self.addCleanup(executor.shutdown)
+        converter = opulent_schema.SchemaConverter.with_parallel_items(executor, threshold=40, chunk_size=15)
+        schema = {'items': [{'type': 'string'}], 'additionalItems': {'type': 'integer'}}
+        instance = ['a'] + list(range(45))
+        self.assertEqual(instance, converter.convert(schema)(instance))
+        self.assertEqual([list(range(15)), list(range(15, 30)), list(range(30, 45))], executor.chunks)
+        converter.convert(schema)(instance[:40])
+        self.assertEqual(3, len(executor.chunks))
+
+    def test_fail_fast(self):
+        executor = CountingExecutor()
+        self.addCleanup(executor.shutdown)
+        converter = opulent_schema.FailFastSchemaConverter.with_parallel_items(executor, threshold=1, chunk_size=5)
+        self.assertSameValidation({'items': {'type': 'integer'}}, [1, 'a', 2, 'b'] * 5, converter,
+                                  opulent_schema.FailFastSchemaConverter)
+        self.assertTrue(executor.chunks)
+
+    def test_errors_of_chunks(self):
+        executor = CountingExecutor()
+        self.addCleanup(executor.shutdown)
+        for converter in [opulent_schema.SchemaConverter, opulent_schema.SchemaConverter.with_max_errors(3)]:
+            parallel = converter.with_parallel_items(executor, threshold=1, chunk_size=4)
+            for schema, instance in [
+                ({'items': {'type': 'integer'}}, [1, 'a', 2, 'b', 3, 4, 5, 6, 'c', 7]),
+                ({'items': {'type': 'integer'}}, [1, 2, 3, 4, 'a', 'b', 'c', 'd', 5, 'e']),
+                # an error within an item drops the errors of the items before it
+                ({'items': {'properties': {'a': {'type': 'integer'}}}},
+                 [{'a': 1}, 'x', {'a': 2}, {'a': 3}, {'a': 'y'}, {'a': 'z'}]),
+                ({'items': [{}], 'additionalItems': {'type': 'integer'}}, [None, 1, 'a', 2, 'b', 3, 4, 5, 6, 'c']),
+            ]:
+                with self.subTest(converter=converter, instance=instance):
+                    self.assertSameValidation(schema, instance, parallel, converter)
+
+    def test_failing_chunks_validated_again(self):
+        executor = CountingExecutor()
+        self.addCleanup(executor.shutdown)
+        converter = opulent_schema.SchemaConverter.with_parallel_items(executor, threshold=1, chunk_size=5)
+        instance = list(range(20))
+        instance[7] = 'a'
+        CountedField.calls = 0
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            converter.convert({'items': CountedField(type='integer')})(instance)
+        self.assertEqual([7], exception_info.exception.path)
+        # the 19 valid items once in the processes, the 4 valid ones of the failing chunk again
+        self.assertEqual(19 + 4, CountedField.calls)
+
+    def test_description_sent_once(self):
+        executor = CountingExecutor()
+        self.addCleanup(executor.shutdown)
+        validator = opulent_schema.SchemaConverter.with_parallel_items(executor, threshold=1, chunk_size=5).convert(
+            {'items': {'type': 'integer'}})
+        self.assertEqual(list(range(10)), validator(list(range(10))))
+        self.assertTrue(all(executor.descriptions))
+        del executor.descriptions[:]
+        self.assertEqual(list(range(10)), validator(list(range(10))))
+        self.assertEqual([None, None], executor.descriptions)
+        # processes that have not got it yet get it on request
+        del executor.descriptions[:]
+        with mock.patch.dict(parallel._validators, clear=True):
+            self.assertEqual(list(range(10)), validator(list(range(10))))
+        self.assertEqual([None, None], executor.descriptions[:2])
+        self.assertTrue(all(executor.descriptions[2:]))
+
+    def test_missing_picklable(self):
+        self.assertIs(parallel.MISSING, pickle.loads(pickle.dumps(parallel.MISSING)))
+        self.assertIs(parallel.MISSING, parallel.validate_chunk(b'unknown key', None, [1]))
+
+    def test_not_picklable(self):
+        executor = CountingExecutor()
+        self.addCleanup(executor.shutdown)
+        converter = opulent_schema.SchemaConverter.with_parallel_items(executor, threshold=1)
+        schema = {'items': opulent_schema.InLineField(lambda x: x * 2, type='integer')}
+        self.assertEqual([2, 4], converter.convert(schema)([1, 2]))
+        self.assertFalse(executor.chunks)
+
+
+if __name__ == '__main__':
+    unittest.main()
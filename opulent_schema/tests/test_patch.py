@@ -0,0 +1,197 @@
+import copy
+import random
+import unittest
+
+import voluptuous as vol
+
+import opulent_schema
+from opulent_schema import patch
+
+
+class Test(unittest.TestCase):
+    schema = {
+        'type': 'object',
+        'properties': {
+            'name': {'type': 'string', 'minLength': 1},
+            'count': {'type': 'integer', 'minimum': 0, 'default': 0},
+            'tags': {'type': 'array', 'items': {'type': 'string'}, 'maxItems': 4},
+            'choice': {'anyOf': [{'type': 'integer'}, {'type': 'array', 'maxItems': 1}]},
+            'unique': {'type': 'array', 'uniqueItems': True},
+            'records': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'a': {'type': 'integer', 'maximum': 10},
+                        'b': {'type': 'string', 'default': 'x'},
+                    },
+                    'required': ['a'],
+                    'additionalProperties': False,
+                },
+                'minItems': 1,
+            },
+            'extra': {
+                'type': 'object',
+                'additionalProperties': {'type': 'number'},
+                'maxProperties': 3,
+                'dependencies': {'p': ['q']},
+                'propertyNames': {'maxLength': 2},
+            },
+        },
+        'required': ['name', 'records'],
+    }
+    document = {
+        'name': 'doc',
+        'tags': ['a', 'b'],
+        'choice': 1,
+        'unique': [1, 2],
+        'records': [{'a': 1}, {'a': 2, 'b': 'y'}, {'a': 3}],
+        'extra': {'x': 1.5},
+    }
+
+    def setUp(self):
+        self.full = opulent_schema.convert(self.schema)
+        self.validator = patch.patch_convert(self.schema)
+        self.valid = self.full(copy.deepcopy(self.document))
+
+    def apply_naively(self, document, operations):
+        patched = patch.PatchedDocument(copy.deepcopy(document))
+        for operation in operations:
+            patched.apply(operation)
+        return patched.document
+
+    def check(self, operations):
+        original = copy.deepcopy(self.valid)
+        try:
+            expected = self.full(self.apply_naively(self.valid, operations))
+        except vol.Invalid:
+            with self.assertRaises(vol.Invalid):
+                self.validator(self.valid, operations)
+        else:
+            self.assertEqual(expected, self.validator(self.valid, operations))
+        self.assertEqual(original, self.valid)
+
+    def test_operations(self):
+        for operations in [
+            [{'op': 'replace', 'path': '/name', 'value': 'other'}],
+            [{'op': 'replace', 'path': '/name', 'value': ''}],
+            [{'op': 'add', 'path': '/records/-', 'value': {'a': 4}}],
+            [{'op': 'add', 'path': '/records/0', 'value': {'a': 11}}],
+            [{'op': 'add', 'path': '/records/1/c', 'value': 1}],
+            [{'op': 'remove', 'path': '/records/1/a'}],
+            [{'op': 'remove', 'path': '/records/1/b'}],
+            [{'op': 'remove', 'path': '/name'}],
+            [{'op': 'remove', 'path': '/count'}],
+            [{'op': 'remove', 'path': '/records/0'}, {'op': 'remove', 'path': '/records/0'},
+             {'op': 'remove', 'path': '/records/0'}],
+            [{'op': 'add', 'path': '/tags/0', 'value': 'c'}, {'op': 'add', 'path': '/tags/0', 'value': 'd'},
+             {'op': 'add', 'path': '/tags/0', 'value': 'e'}],
+            [{'op': 'add', 'path': '/tags/0', 'value': 1}, {'op': 'remove', 'path': '/tags/1'}],
+            [{'op': 'add', 'path': '/tags/0', 'value': 1}, {'op': 'remove', 'path': '/tags/0'}],
+            [{'op': 'replace', 'path': '/choice', 'value': [1, 2]}],
+            [{'op': 'add', 'path': '/unique/-', 'value': 1}],
+            [{'op': 'add', 'path': '/extra/p', 'value': 1}],
+            [{'op': 'add', 'path': '/extra/p', 'value': 1}, {'op': 'add', 'path': '/extra/q', 'value': 1}],
+            [{'op': 'add', 'path': '/extra/long', 'value': 1}],
+            [{'op': 'add', 'path': '/extra/y', 'value': 'string'}],
+            [{'op': 'move', 'from': '/records/0', 'path': '/records/2'}],
+            [{'op': 'move', 'from': '/records/0/a', 'path': '/count'}],
+            [{'op': 'copy', 'from': '/records/0/a', 'path': '/records/1/b'}],
+            [{'op': 'test', 'path': '/records/0', 'value': {'a': 1, 'b': 'x'}},
+             {'op': 'replace', 'path': '/records/0/a', 'value': 5}],
+            [{'op': 'replace', 'path': '', 'value': {'name': 'n', 'records': [{'a': 1}]}}],
+            [{'op': 'replace', 'path': '', 'value': {'name': 'n'}}],
+        ]:
+            with self.subTest(operations=operations):
+                self.check(operations)
+
+    def test_random_patches(self):
+        rand = random.Random(0)
+        values = [0, 5, 11, -1, 'x', '', True, None, [], ['a'], {'a': 1}, {'a': 'b'}, {'c': 1}]
+
+        def pointers(value, tokens=()):
+            yield tokens
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    yield from pointers(item, tokens + (key,))
+            elif isinstance(value, list):
+                for ind, item in enumerate(value):
+                    yield from pointers(item, tokens + (str(ind),))
+
+        def pointer(tokens):
+            return ''.join('/' + token for token in tokens)
+
+        for _ in range(300):
+            document = self.valid
+            operations = []
+            for _ in range(rand.randint(1, 4)):
+                existing = [tokens for tokens in pointers(document) if tokens]
+                tokens = rand.choice(existing)
+                op = rand.choice(['add', 'remove', 'replace', 'add_new', 'move'])
+                if op == 'add_new':
+                    container = rand.choice([tokens for tokens in pointers(document)
+                                             if isinstance(patch.PatchedDocument(document).get(list(tokens)),
+                                                           (dict, list))])
+                    is_list = isinstance(patch.PatchedDocument(document).get(list(container)), list)
+                    operation = {'op': 'add', 'path': pointer(container + ('-' if is_list else rand.choice('abpq'),)),
+                                 'value': rand.choice(values)}
+                elif op == 'remove':
+                    operation = {'op': 'remove', 'path': pointer(tokens)}
+                elif op == 'move':
+                    target = rand.choice(existing)
+                    if target[:len(tokens)] == tokens:
+                        continue
+                    operation = {'op': 'move', 'from': pointer(tokens), 'path': pointer(target)}
+                else:
+                    operation = {'op': op, 'path': pointer(tokens), 'value': rand.choice(values)}
+                try:
+                    document = self.apply_naively(document, [operation])
+                except patch.JsonPatchError:
+                    continue
+                operations.append(operation)
+            with self.subTest(operations=operations):
+                self.check(operations)
+
+    def test_error_paths(self):
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            self.validator(self.valid, [{'op': 'replace', 'path': '/records/1/a', 'value': 20},
+                                        {'op': 'add', 'path': '/tags/-', 'value': 3}])
+        self.assertEqual({('records', 1, 'a'), ('tags', 2)},
+                         {tuple(error.path) for error in exception_info.exception.errors})
+
+    def test_only_changed_parts_are_validated(self):
+        calls = []
+        schema = {
+            'type': 'object',
+            'properties': {
+                'records': {'type': 'array', 'items': opulent_schema.InLineField(
+                    lambda x: calls.append(x) or x, type='object')},
+            },
+        }
+        document = {'records': [{'a': ind} for ind in range(100)]}
+        validator = patch.patch_convert(schema)
+        result = validator(document, [{'op': 'replace', 'path': '/records/50/a', 'value': -1},
+                                      {'op': 'add', 'path': '/records/-', 'value': {'b': 1}}])
+        self.assertCountEqual([{'a': -1}, {'b': 1}], calls)
+        self.assertEqual({'a': -1}, result['records'][50])
+        self.assertEqual(101, len(result['records']))
+        self.assertEqual({'a': 50}, document['records'][50])
+        self.assertIs(document['records'][0], result['records'][0])
+
+    def test_invalid_patches(self):
+        for operations in [
+            [{'op': 'remove', 'path': '/missing'}],
+            [{'op': 'replace', 'path': '/records/3', 'value': 1}],
+            [{'op': 'add', 'path': '/records/01', 'value': 1}],
+            [{'op': 'add', 'path': 'records', 'value': 1}],
+            [{'op': 'add', 'path': '/name/a', 'value': 1}],
+            [{'op': 'add', 'path': '/name'}],
+            [{'op': 'test', 'path': '/choice', 'value': True}],
+            [{'op': 'move', 'from': '/records', 'path': '/records/0'}],
+            [{'op': 'frobnicate', 'path': '/name'}],
+        ]:
+            with self.subTest(operations=operations), self.assertRaises(patch.JsonPatchError):
+                self.validator(self.valid, operations)
+
+    def test_pointer_escaping(self):
+        self.assertEqual(['a/b', 'c~d', ''], patch.parse_pointer('/a~1b/c~0d/'))
@@ -0,0 +1,73 @@
+import gc
+import unittest
+from unittest import mock
+
+import voluptuous as vol
+
+import opulent_schema
+from opulent_schema import collector, prefork
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.object(collector, 'schemas', collector.OrderedDict()),
+            mock.patch.object(collector, 'added_keys', []),
+            mock.patch.object(collector, 'validators', {}),
+            mock.patch.object(prefork, '_registered', []),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_prepare(self):
+        collector.add('orders', 'v1', schema={'type': 'integer'})
+        collector.add('users', schema={'type': 'string'})
+        exact = collector.validator('users', converter=opulent_schema.ExactSchemaConverter)
+        registered = prefork.register({'type': 'boolean'})
+        converted = opulent_schema.convert({'type': 'null'})
+        self.assertIs(converted, prefork.register(converted))
+        other = opulent_schema.convert({'type': 'array'})
+        self.assertFalse(any(validator.converted for validator in [exact, registered, converted, other]))
+
+        prepared = prefork.prefork_prepare(other, freeze=False)
+        self.assertEqual(6, len(prepared))
+        self.assertTrue(all(validator.converted for validator in prepared))
+        self.assertIn(collector.validator('orders', 'v1'), prepared)
+        self.assertIn(exact, prepared)
+        self.assertEqual(1, collector.validator('orders', 'v1')(1))
+        with self.assertRaises(vol.MultipleInvalid):
+            collector.validator('users')(1)
+        self.assertIn('schema_schema', vars(opulent_schema.opulent_schema))
+
+    def test_live_lazy_schemas(self):
+        unknown = opulent_schema.convert({'type': 'integer'})
+        failing = opulent_schema.convert({'type': 'no such type'})
+        self.assertEqual([], prefork.prefork_prepare(freeze=False))
+        self.assertTrue(unknown.converted)
+        self.assertIsNone(failing.converted)
+        with self.assertRaises(KeyError):
+            failing(1)
+
+    def test_eager_validators(self):
+        eager = opulent_schema.convert({'type': 'integer'}, lazy=False)
+        self.assertIs(eager, prefork.register(eager))
+        prepared = prefork.prefork_prepare(str.upper, freeze=False)
+        self.assertEqual([eager, str.upper], prepared)
+        self.assertEqual(1, eager(1))
+
+    def test_freeze(self):
+        self.addCleanup(gc.unfreeze)
+        prefork.prefork_prepare()
+        self.assertGreater(gc.get_freeze_count(), 0)
+
+    def test_compile(self):
+        validator = opulent_schema.convert({'type': 'integer'})
+        compiled = validator.compile()
+        self.assertIsInstance(compiled, vol.Schema)
+        self.assertIs(compiled, validator.compile())
+        self.assertEqual(1, validator(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
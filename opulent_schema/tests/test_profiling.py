@@ -0,0 +1,118 @@
+import concurrent.futures
+import io
+import unittest
+
+import voluptuous as vol
+
+import opulent_schema
+from opulent_schema import profiling
+
+
+class Test(unittest.TestCase):
+    schema = {
+        'type': 'object',
+        'properties': {
+            'a': {'type': 'integer', 'minimum': 0},
+            'b': {'type': 'array', 'items': {'type': 'string', 'maxLength': 3}},
+            'c': opulent_schema.InLineField(lambda x: x * 2, type='number'),
+            'd': {'anyOf': [{'type': 'string'}, {'type': 'null'}]},
+            'e~/': {'additionalProperties': {'type': 'boolean'}},
+        },
+        'patternProperties': {'^x': {'type': 'number'}},
+        'additionalProperties': {'type': 'string'},
+        'dependencies': {'a': {'required': ['b']}},
+        'required': ['a'],
+    }
+
+    def test_same_results(self):
+        profile = profiling.Profile()
+        for converter in [opulent_schema.SchemaConverter, opulent_schema.ExactSchemaConverter,
+                          opulent_schema.FailFastSchemaConverter]:
+            plain = converter.convert(self.schema)
+            profiled = profile.convert(self.schema, converter)
+            for instance in [
+                {'a': 1, 'b': ['x', 'yy'], 'c': 1.5, 'd': None, 'e~/': {'t': True}, 'x1': 2, 'y': 'z'},
+                {'a': -1, 'b': ['x', 'long', 1], 'c': 'c', 'd': 1, 'e~/': {'t': 1}, 'x1': 'a', 'y': 2},
+                {'a': 1},
+                {'b': []},
+                [],
+            ]:
+                with self.subTest(converter=converter, instance=instance):
+                    try:
+                        expected = plain(instance)
+                    except vol.Invalid as e:
+                        with self.assertRaises(vol.Invalid) as exception_info:
+                            profiled(instance)
+                        self.assertEqual(sorted(map(str, e.errors)),
+                                         sorted(map(str, exception_info.exception.errors)))
+                    else:
+                        self.assertEqual(expected, profiled(instance))
+
+    def test_stats(self):
+        profile = profiling.Profile()
+        validator = profile.convert(self.schema)
+        validator({'a': 1, 'b': ['x', 'yy', 'z'], 'c': 2})
+        with self.assertRaises(vol.Invalid):
+            validator({'a': 1, 'b': ['x', 'long']})
+
+        stats = profile.stats
+        self.assertEqual(2, stats['#'].calls)
+        self.assertEqual(1, stats['#'].failures)
+        self.assertEqual(5, stats['#/properties/b/items'].calls)
+        self.assertEqual(1, stats['#/properties/b/items'].failures)
+        self.assertEqual(1, stats['#/properties/c'].calls)
+        self.assertEqual(1, stats['#/properties/c (post_transformation)'].calls)
+        self.assertNotIn('#/properties/c (pre_transformation)', stats)
+        self.assertNotIn('#/properties/e~0~1', stats)
+        for node in stats.values():
+            self.assertLessEqual(node.self_time, node.cumulative_time)
+        self.assertLessEqual(stats['#/properties/b'].cumulative_time, stats['#'].cumulative_time)
+
+        report = profile.report(sort_by='calls', limit=2).splitlines()
+        self.assertEqual(3, len(report))
+        self.assertTrue(report[1].endswith('#/properties/b/items'))
+
+        collapsed = io.StringIO()
+        profile.write_collapsed(collapsed)
+        lines = collapsed.getvalue().splitlines()
+        self.assertIn('#;#/properties/b;#/properties/b/items', [line.rsplit(' ', 1)[0] for line in lines])
+        for line in lines:
+            self.assertTrue(line.rsplit(' ', 1)[1].isdigit())
+
+        profile.reset()
+        self.assertEqual({}, profile.stats)
+
+    def test_convert_arguments(self):
+        profile = profiling.Profile()
+        schema = {'type': 'object', 'properties': {'a': {'type': 'integer'}, 'c': self.schema['properties']['c']}}
+        record = profile.converter().convert(schema, records=True)({'a': 1, 'c': 2})
+        self.assertEqual({'a': 1, 'c': 4}, record.to_dict())
+        self.assertEqual(1, profile.stats['#'].calls)
+
+    def test_threads(self):
+        profile = profiling.Profile()
+        validator = profile.convert(self.schema)
+        instance = {'a': 1, 'b': ['x', 'yy', 'z'], 'c': 2}
+        validator(instance)
+        expected = {name: node.calls for name, node in profile.stats.items()}
+        stacks = set(profile.stacks)
+        profile.reset()
+
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            list(executor.map(lambda _: validator(instance), range(200)))
+        self.assertEqual({name: calls * 200 for name, calls in expected.items()},
+                         {name: node.calls for name, node in profile.stats.items()})
+        # the nodes run by other threads are not taken for nested ones
+        self.assertEqual(stacks, set(profile.stacks))
+        for node in profile.stats.values():
+            self.assertLessEqual(node.self_time, node.cumulative_time)
+
+    def test_pointers(self):
+        self.assertEqual(
+            ['#', '#/properties', '#/properties/a~1b~0', '#/items/0'],
+            [pointer for _, pointer in profiling.schema_pointers(
+                {'properties': {'a/b~': {}}, 'items': [{}]}).values()])
+
+    def test_unprofiled_converter_unchanged(self):
+        profiling.Profile().convert(self.schema, lazy=False)
+        self.assertNotIsInstance(opulent_schema.SchemaConverter.go(self.schema), profiling.ProfiledNode)
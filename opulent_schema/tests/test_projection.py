@@ -0,0 +1,108 @@
+import decimal
+import unittest
+
+import voluptuous as vol
+
+import opulent_schema
+from opulent_schema import projection
+
+
+class Test(unittest.TestCase):
+    schema = {
+        'type': 'object',
+        'properties': {
+            'id': {'type': 'integer', 'minimum': 0},
+            'customer': {
+                'type': 'object',
+                'properties': {
+                    'name': {'type': 'string', 'maxLength': 5},
+                    'email': {'type': 'string', 'format': 'email'},
+                    'tier': {'type': 'string', 'default': 'basic'},
+                },
+                'required': ['name'],
+            },
+            'orders': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'price': opulent_schema.InLineField(lambda x: decimal.Decimal(str(x)), type='number'),
+                        'note': {'type': 'string'},
+                    },
+                    'required': ['price'],
+                },
+                'minItems': 1,
+            },
+            'notes': {'type': 'string'},
+        },
+        'patternProperties': {'^x-': {'type': 'integer'}},
+        'required': ['id', 'customer'],
+    }
+    instance = {
+        'id': 1,
+        'customer': {'name': 'ann', 'email': 'not an email'},
+        'orders': [{'price': 1.5, 'note': 1}, {'price': 2}],
+        'notes': 5,
+        'x-a': 1,
+    }
+
+    def test_pruned(self):
+        validator = opulent_schema.convert(self.schema).project(['/id', '/orders/*/price', '/customer/tier'])
+        self.assertEqual({
+            'id': 1,
+            'orders': [{'price': decimal.Decimal('1.5')}, {'price': decimal.Decimal('2')}],
+            'customer': {'tier': 'basic'},
+        }, validator(self.instance))
+
+    def test_requested_subtrees_validated(self):
+        validator = projection.project(self.schema, ['/id', ('customer',), '/x-a'])
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            validator({**self.instance, 'id': -1, 'x-a': 'a'})
+        self.assertEqual(sorted([
+            "value must be at least 0 for dictionary value @ data['id']",
+            "expected an email address for dictionary value @ data['customer']['email']",
+            "not a valid value for dictionary value @ data['x-a']",
+        ]), sorted(map(str, exception_info.exception.errors)))
+
+    def test_ancestors(self):
+        validator = projection.project(self.schema, ['/orders/*/note'])
+        self.assertEqual({'orders': [{}, {}]},
+                         validator({'id': 1, 'customer': 1, 'orders': [{'price': 'a'}, {'price': 1}]}))
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            validator({'orders': [{'note': 'a'}, []]})
+        self.assertEqual(sorted([
+            "required key not provided @ data['customer']",
+            "required key not provided @ data['id']",
+            "required key not provided @ data['orders'][0]['price']",
+            "expected dict @ data['orders'][1]",
+        ]), sorted(map(str, exception_info.exception.errors)))
+        with self.assertRaises(vol.Invalid):
+            validator([])
+
+    def test_same_as_full(self):
+        full = opulent_schema.convert(self.schema)
+        self.assertEqual(full({'id': 2, 'customer': {'name': 'b'}}),
+                         projection.project(self.schema, ['', '/id'])({'id': 2, 'customer': {'name': 'b'}}))
+
+    def test_cached(self):
+        validator = projection.project(self.schema, ['/id', '/notes'])
+        self.assertIs(validator, projection.project(self.schema, [('notes',), '/id']))
+        self.assertIsNot(validator, projection.project(self.schema, ['/id']))
+        self.assertIsNot(validator,
+                         projection.project(self.schema, ['/id', '/notes'], opulent_schema.ExactSchemaConverter))
+
+    def test_paths(self):
+        self.assertEqual(('a/b', 'c~', '*'), projection.parse_path('/a~1b/c~0/*'))
+        self.assertEqual((), projection.parse_path(''))
+        with self.assertRaises(ValueError):
+            projection.parse_path('a')
+        self.assertEqual({'a': None, 'b': {'c': None}}, projection.make_tree(['/a/x', '/a', '/b/c']))
+        self.assertIsNone(projection.make_tree(['/a', '']))
+
+    def test_array_indexes(self):
+        for paths in [['/orders/0/price'], [('orders', 1)], ['/orders/*/price', '/orders/0']]:
+            with self.subTest(paths=paths), self.assertRaises(ValueError):
+                projection.project(self.schema, paths)
+        # objects may have properties made of digits
+        validator = projection.project({'type': 'object', 'properties': {'0': {'type': 'integer'}}}, ['/0'])
+        self.assertEqual({'0': 1}, validator({'0': 1, '1': 2}))
@@ -0,0 +1,101 @@
+import pickle
+import unittest
+
+import voluptuous as vol
+
+import opulent_schema
+from opulent_schema import records
+
+
+class Test(unittest.TestCase):
+    schema = {
+        'title': 'order',
+        'type': 'object',
+        'properties': {
+            'id': {'type': 'integer'},
+            'customer': {
+                'type': 'object',
+                'properties': {'name': {'type': 'string'}, 'tier': {'type': 'string', 'default': 'basic'}},
+            },
+            'lines': {
+                'type': 'array',
+                'items': {'type': 'object', 'properties': {'sku': {'type': 'string'}, 'count': {'type': 'integer'}}},
+            },
+            'total': opulent_schema.InLineField(lambda x: {'cents': x}, type='integer'),
+            'meta': {'properties': {'not an identifier': {}}},
+        },
+        'required': ['id'],
+    }
+    instance = {
+        'id': 1,
+        'customer': {'name': 'ann'},
+        'lines': [{'sku': 'a', 'count': 2}, {'sku': 'b', 'extra': True}],
+        'total': 150,
+        'meta': {'not an identifier': 1},
+        'other': 'x',
+    }
+
+    def test_records(self):
+        order = opulent_schema.convert(self.schema, records=True)(self.instance)
+        self.assertEqual('Order', type(order).__name__)
+        self.assertEqual(1, order.id)
+        self.assertEqual({'other': 'x'}, order._extra)
+        self.assertEqual('OrderCustomer', type(order.customer).__name__)
+        self.assertEqual(('ann', 'basic'), (order.customer.name, order.customer.tier))
+        self.assertEqual(['OrderLines', 'OrderLines'], [type(line).__name__ for line in order.lines])
+        self.assertEqual({'extra': True}, order.lines[1]._extra)
+        self.assertFalse(hasattr(order.lines[1], 'count'))
+        # the values of transformed fields, and objects with properties that cannot be attributes, are left as they are
+        self.assertEqual({'cents': 150}, order.total)
+        self.assertEqual({'not an identifier': 1}, order.meta)
+        self.assertFalse(hasattr(order, '__dict__'))
+
+    def test_to_dict(self):
+        expected = opulent_schema.convert(self.schema)(self.instance)
+        for lazy in [True, False]:
+            with self.subTest(lazy=lazy):
+                validator = opulent_schema.convert(self.schema, lazy=lazy, records=True)
+                order = validator(self.instance)
+                self.assertEqual(expected, order.to_dict())
+                self.assertEqual(validator(self.instance), order)
+                self.assertNotEqual(validator(dict(self.instance, id=2)), order)
+
+    def test_shared_classes(self):
+        order = opulent_schema.convert(self.schema, records=True)(self.instance)
+        other = opulent_schema.convert(dict(self.schema), lazy=False, records=True)(self.instance)
+        self.assertIs(type(order), type(other))
+        self.assertIs(type(order.lines[0]), type(other.lines[0]))
+        self.assertEqual(order, other)
+        # a class of other fields, with the same name
+        self.assertIsNot(type(order), records.record_class('Order', ['id']))
+
+        unpickled = pickle.loads(pickle.dumps(order))
+        self.assertIs(type(order), type(unpickled))
+        self.assertEqual(order, unpickled)
+        self.assertEqual({'extra': True}, unpickled.lines[1]._extra)
+        self.assertFalse(hasattr(unpickled.lines[1], 'count'))
+
+    def test_check_and_convert(self):
+        schema = {'properties': {'id': {'type': 'integer'}}}
+        validator = opulent_schema.SchemaConverter.check_and_convert(schema, records=True)
+        self.assertEqual(1, validator({'id': 1}).id)
+        with self.assertRaises(vol.MultipleInvalid):
+            validator({'id': 'a'})
+
+    def test_no_records(self):
+        for schema, instance in [
+            ({'type': 'array', 'items': {'type': 'integer'}}, [1, 2]),
+            ({'type': 'object', 'properties': {'_private': {}}}, {'_private': 1}),
+            ({'properties': {'to_dict': {}}}, {'to_dict': 1}),
+        ]:
+            with self.subTest(schema=schema):
+                self.assertEqual(instance, opulent_schema.convert(schema, records=True)(instance))
+
+    def test_repr(self):
+        builder = records.make_builder({'properties': {'a': {'properties': {'b': {}}}, 'c': {}}})
+        record = builder({'a': {'b': 1}, 'd': 2})
+        self.assertEqual('Record(a=RecordA(b=1), d=2)', repr(record))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,11 @@
+import collections
+import copy
 import datetime
 import decimal
 import enum
+import json
+import os
+import tempfile
 import unittest
 
 import sqlalchemy
@@ -666,3 +671,242 @@ class Test(unittest.TestCase):
                 },
             }
         )
+
+    def test_contract_cache(self):
+        maker = schemalchemy.ContractMaker()
+        res = maker.make_contract(TestTableOrm.integer, schemalchemy.OptionalP(TestTableOrm.uuid, title='nah'))
+        self.assertIs(res, maker.make_contract(TestTableOrm.integer,
+                                               schemalchemy.OptionalP(TestTableOrm.uuid, title='nah')))
+        self.assertIsNot(res, maker.make_contract(TestTableOrm.integer,
+                                                  schemalchemy.OptionalP(TestTableOrm.uuid, title='meh')))
+        self.assertIsNot(res, maker.make_contract(TestTableOrm.integer,
+                                                  schemalchemy.RequiredP(TestTableOrm.uuid, title='nah')))
+        self.assertIsNot(res, maker.make_contract(TestTableOrm.integer,
+                                                  schemalchemy.OptionalP(TestTableOrm.uuid, title='nah'),
+                                                  add_props={'a': {'type': 'string'}}))
+
+        with self.assertRaises(TypeError):
+            res['title'] = 'a'
+        with self.assertRaises(TypeError):
+            res['properties']['uuid']['type'].append('integer')
+        with self.assertRaises(TypeError):
+            res['required'].append('uuid')
+
+        copied = copy.deepcopy(res)
+        self.assertEqual(res, copied)
+        self.assertIs(type(copied), dict)
+        self.assertIs(type(copied['properties']), collections.OrderedDict)
+        copied['properties']['uuid']['type'].append('integer')
+        self.assertEqual(['null', 'string'], res['properties']['uuid']['type'])
+
+        self.assertEqual({'integer': 1, 'uuid': None},
+                         opulent_schema.check_and_convert(res)({'integer': 1, 'uuid': None}))
+
+        maker.clear_caches()
+        self.assertIsNot(res, maker.make_contract(TestTableOrm.integer,
+                                                  schemalchemy.OptionalP(TestTableOrm.uuid, title='nah')))
+
+    def test_assigned_type_validators(self):
+        maker = schemalchemy.ContractMaker()
+        self.assertEqual('integer', maker.make_contract(TestTableOrm.integer)['properties']['integer']['type'])
+        maker.python_type_validators_ = {**maker.python_type_validators_, int: lambda col: {'type': 'string'}}
+        self.assertEqual('string', maker.make_contract(TestTableOrm.integer)['properties']['integer']['type'])
+        self.assertIn(sqlalchemy.sql.sqltypes.Numeric, maker.sql_type_validators_)
+
+        maker.sql_type_validators_ = {}
+        self.assertEqual({}, maker.sql_type_validators_)
+        self.assertEqual('string', maker.make_contract(TestTableOrm.integer)['properties']['integer']['type'])
+
+    def test_contract_cache_size(self):
+        maker = schemalchemy.ContractMaker()
+        maker.contract_cache_size = 2
+        first = maker.make_contract(TestTableOrm.integer)
+        maker.make_contract(TestTableOrm.varchar)
+        self.assertIs(first, maker.make_contract(TestTableOrm.integer))
+        maker.make_contract(TestTableOrm.date)
+        maker.make_contract(TestTableOrm.varchar)
+        self.assertIsNot(first, maker.make_contract(TestTableOrm.integer))
+
+    def test_transformed_fields_frozen(self):
+        res = schemalchemy.ContractMaker().make_contract(TestTableOrm.numeric, TestTableOrm.date)
+        self.assertIsInstance(res['properties']['numeric'], schemalchemy.AnyDecimal)
+        self.assertEqual(
+            {'numeric': decimal.Decimal('1.5'), 'date': datetime.date(1970, 1, 1)},
+            opulent_schema.check_and_convert(res)({'numeric': 1.5, 'date': 1}))
+        thawed = copy.deepcopy(res['properties']['numeric'])
+        self.assertIs(type(thawed), schemalchemy.AnyDecimal)
+        thawed['minimum'] = 0
+
+    def test_validator_factories_memoized(self):
+        maker = schemalchemy.ContractMaker()
+        maker.make_contract(TestTableOrm.varchar, TestTableOrm.varchar_len)
+        self.assertEqual({sqlalchemy.VARCHAR}, set(maker._sql_factories))
+        self.assertEqual({str}, set(maker._python_factories))
+
+
+SqliteBase = declarative_base()
+
+
+class Account(SqliteBase):
+    __tablename__ = 'account'
+
+    id = sqlalchemy.Column(sqlalchemy.INTEGER, primary_key=True)
+    name = sqlalchemy.Column(sqlalchemy.VARCHAR(20), nullable=False)
+    balance = sqlalchemy.Column(sqlalchemy.Numeric(20, 6), nullable=False)
+    kind = sqlalchemy.Column(sqlalchemy.Enum(SomeEnum), nullable=False)
+
+
+class Transfer(SqliteBase):
+    __tablename__ = 'transfer'
+
+    id = sqlalchemy.Column(sqlalchemy.INTEGER, primary_key=True)
+    account_id = sqlalchemy.Column(sqlalchemy.INTEGER, sqlalchemy.ForeignKey('account.id'), nullable=False)
+    amount = sqlalchemy.Column(sqlalchemy.Numeric(20, 6), nullable=False)
+    created = sqlalchemy.Column(sqlalchemy.TIMESTAMP)
+    note = sqlalchemy.Column(sqlalchemy.VARCHAR())
+
+
+class TestTableContracts(unittest.TestCase):
+    def setUp(self):
+        self.engine = sqlalchemy.create_engine('sqlite://')
+        SqliteBase.metadata.create_all(self.engine)
+        self.engine.execute(Account.__table__.insert(), {
+            'id': 1, 'name': 'a', 'balance': decimal.Decimal('1.5'), 'kind': SomeEnum.one})
+        self.engine.execute(Transfer.__table__.insert(), {
+            'id': 1, 'account_id': 1, 'amount': 2, 'created': datetime.datetime(2015, 3, 4, 12, 37), 'note': None})
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.cache_dir.name, 'contracts.pickle')
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def reflected(self):
+        metadata = sqlalchemy.MetaData()
+        metadata.reflect(self.engine)
+        return metadata
+
+    def test_declarative_base(self):
+        contracts = schemalchemy.ContractMaker().make_table_contracts(SqliteBase)
+        self.assertEqual(['account', 'transfer'], sorted(contracts))
+        self.assertEqual(schemalchemy.make_contract(*Transfer.__table__.columns), contracts['transfer'])
+        with self.assertRaises(TypeError):
+            contracts['transfer']['type'] = 'array'
+
+        row = dict(self.engine.execute(Account.__table__.select()).first())
+        self.assertEqual({'id': 1, 'name': 'a', 'balance': decimal.Decimal('1.5'), 'kind': 1},
+                         contracts.validator('account')({**row, 'balance': 1.5, 'kind': row['kind'].value}))
+        self.assertIs(contracts.validator('account'), contracts.validator('account'))
+
+    def test_reflected(self):
+        contracts = schemalchemy.ContractMaker().make_table_contracts(self.reflected())
+        self.assertEqual({'type': 'integer'}, contracts['transfer']['properties']['account_id'])
+        self.assertEqual({'type': 'string', 'maxLength': 20}, contracts['account']['properties']['name'])
+        res = contracts.validator('transfer')({'id': 1, 'account_id': 1, 'amount': 2, 'created': 0, 'note': None})
+        self.assertEqual(datetime.datetime(1970, 1, 1), res['created'])
+
+    def test_disk_cache(self):
+        made = schemalchemy.ContractMaker().make_table_contracts(self.reflected(), self.cache_path)
+        self.assertTrue(os.path.exists(self.cache_path))
+
+        maker = schemalchemy.ContractMaker()
+        maker._build_contract = None  # the contracts have to come from the cache
+        loaded = maker.make_table_contracts(self.reflected(), self.cache_path)
+        self.assertEqual({}, loaded._contracts)
+        self.assertEqual(made['transfer'], loaded['transfer'])
+        self.assertEqual(['transfer'], list(loaded._contracts))
+        with self.assertRaises(TypeError):
+            loaded['transfer']['required'].append('a')
+        # sqlite stores the enum as a VARCHAR
+        self.assertEqual(decimal.Decimal(2), loaded.validator('account')({'id': 1, 'name': 'a', 'balance': 2,
+                                                                          'kind': 'two'})['balance'])
+
+    def test_disk_cache_invalidated(self):
+        schemalchemy.ContractMaker().make_table_contracts(self.reflected(), self.cache_path)
+        metadata = self.reflected()
+        metadata.tables['transfer'].append_column(sqlalchemy.Column('other', sqlalchemy.INTEGER))
+        contracts = schemalchemy.ContractMaker().make_table_contracts(metadata, self.cache_path)
+        self.assertEqual(['transfer'], list(contracts._contracts))
+        self.assertIn('other', contracts['transfer']['properties'])
+
+        with open(self.cache_path, 'wb') as fp:
+            fp.write(b'garbage')
+        contracts = schemalchemy.ContractMaker().make_table_contracts(self.reflected(), self.cache_path)
+        self.assertEqual(['account', 'transfer'], sorted(contracts._contracts))
+        self.assertNotIn('other', contracts['transfer']['properties'])
+
+    def test_disk_cache_lambda_factories(self):
+        maker = schemalchemy.ContractMaker()
+        maker.python_type_validators_ = {**maker.python_type_validators_, int: lambda col: {'type': 'string'}}
+        made = maker.make_table_contracts(self.reflected(), self.cache_path)
+        self.assertEqual({'type': 'string'}, made['transfer']['properties']['account_id'])
+
+        for factory in [lambda col: {'type': 'number'}, lambda col, type_='integer': {'type': type_}]:
+            maker = schemalchemy.ContractMaker()
+            maker.python_type_validators_ = {**maker.python_type_validators_, int: factory}
+            contracts = maker.make_table_contracts(self.reflected(), self.cache_path)
+            self.assertEqual(factory(None), contracts['transfer']['properties']['account_id'])
+
+        for length in [1, 2]:
+            maker = schemalchemy.ContractMaker()
+            maker.python_type_validators_ = {**maker.python_type_validators_,
+                                             int: lambda col: {'type': 'string', 'maxLength': length}}
+            contracts = maker.make_table_contracts(self.reflected(), self.cache_path)
+            self.assertEqual(length, contracts['transfer']['properties']['account_id']['maxLength'])
+
+
+class TestTimeStamps(unittest.TestCase):
+    def test_fast_path_same_as_flexible_parser(self):
+        for value in ['2015-03-04 12:37:43.103', '2015-03-04', '2015-03-04T12:37', '2015-03-04T12:37:43Z',
+                      '2015-03-04T12:37:43.123456+05:30', '2015-03-04T12:37:43-0800', '2015-03-04T23:37:43-08',
+                      '2015-12-31T23:59:59.9-01:00', '2015-03-04T24:00:00']:
+            with self.subTest(value=value):
+                self.assertEqual(schemalchemy.parse_any_time_stamp(value), schemalchemy.any_time_stamp(value))
+
+    def test_any_time_stamp(self):
+        self.assertEqual(datetime.datetime(2015, 3, 4, 20, 37, 43),
+                         schemalchemy.any_time_stamp('2015-03-04T12:37:43-08:00'))
+        self.assertEqual(datetime.datetime(2015, 4, 3), schemalchemy.any_time_stamp('04/03/2015'))
+        self.assertEqual(datetime.datetime(2001, 9, 9, 1, 46, 40), schemalchemy.any_time_stamp('1e9'))
+        self.assertEqual(datetime.datetime(1970, 1, 1, 0, 0, 1, 500000), schemalchemy.any_time_stamp(1.5))
+        for value in [float('inf'), 'Infinity']:
+            self.assertEqual('infinity', schemalchemy.any_time_stamp(value))
+        for value in [float('-inf'), '-infinity']:
+            self.assertEqual('-infinity', schemalchemy.any_time_stamp(value))
+        for value in ['2015-13-01', '2015-02-29', 'nan', 'a']:
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                schemalchemy.any_time_stamp(value)
+
+    def test_cache(self):
+        schemalchemy.parse_time_stamp.cache_clear()
+        for _ in range(3):
+            schemalchemy.any_time_stamp('2015-03-04 12:37:43')
+        self.assertEqual(2, schemalchemy.parse_time_stamp.cache_info().hits)
+        self.assertEqual(schemalchemy.TIME_STAMP_CACHE_SIZE, schemalchemy.parse_time_stamp.cache_info().maxsize)
+
+    def test_transform_many(self):
+        validator = opulent_schema.SchemaConverter.convert({'items': schemalchemy.AnyDecimal(type='number')})
+        self.assertEqual([decimal.Decimal('1.5'), decimal.Decimal('2')], validator([1.5, 2]))
+        self.assertEqual([datetime.date(2015, 3, 4), datetime.date(1970, 1, 1)],
+                         opulent_schema.SchemaConverter.convert({'items': schemalchemy.AnyDate()})(['2015-03-04', 1]))
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            opulent_schema.SchemaConverter.convert({'items': schemalchemy.AnyTimeStamp()})([1, 'a', '2015-13-01'])
+        self.assertEqual(['AnyTimeStamp post_transformation failed @ data[1]',
+                          'AnyTimeStamp post_transformation failed @ data[2]'],
+                         [str(error) for error in exception_info.exception.errors])
+
+    def test_inverse_transformations(self):
+        from opulent_schema.encoding import SchemaEncoder
+
+        schema = {'properties': {
+            'amount': schemalchemy.AnyDecimal(type='number'),
+            'created': schemalchemy.AnyTimeStamp(),
+            'ended': schemalchemy.AnyTimeStamp(),
+            'day': schemalchemy.AnyDate(),
+        }}
+        validator = opulent_schema.SchemaConverter.convert(schema)
+        validated = validator({'amount': 1.5, 'created': '2015-03-04T12:37:43.103+01:00', 'ended': 'infinity',
+                               'day': 1425472663})
+        encoded = SchemaEncoder(schema)(validated)
+        self.assertEqual('{"amount": 1.5, "created": "2015-03-04T11:37:43.103000", "ended": "infinity", '
+                         '"day": "2015-03-04"}', encoded)
+        self.assertEqual(validated, validator(json.loads(encoded)))
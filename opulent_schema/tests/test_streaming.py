@@ -0,0 +1,108 @@
+import io
+import json
+import unittest
+
+import voluptuous as vol
+
+import opulent_schema
+from opulent_schema import streaming
+
+
+class Test(unittest.TestCase):
+    item_schema = {
+        'type': 'object',
+        'properties': {
+            'a': {'type': 'integer'},
+            'b': {'type': 'string', 'default': 'x'},
+            'c': opulent_schema.InLineField(lambda x: x * 10, type='number'),
+        },
+        'required': ['a'],
+    }
+
+    def stream(self, document, schema, path=(), chunk_size=7, binary=False):
+        text = json.dumps(document)
+        fp = io.BytesIO(text.encode()) if binary else io.StringIO(text)
+        return list(streaming.iter_validate(fp, schema, path, chunk_size=chunk_size))
+
+    def test_top_level_array(self):
+        document = [{'a': ind, 'c': ind / 2, 'b': 'żółw' * ind} for ind in range(50)]
+        expected = opulent_schema.convert({'type': 'array', 'items': self.item_schema})(document)
+        self.assertEqual(expected, self.stream(document, {'type': 'array', 'items': self.item_schema}))
+        self.assertEqual(expected, self.stream(document, {'type': 'array', 'items': self.item_schema}, binary=True))
+        self.assertEqual(expected, self.stream(document, {'items': self.item_schema}, chunk_size=65536))
+
+    def test_path(self):
+        document = {
+            'before': {'big': list(range(100))},
+            'data': {'x': 1, 'records': [{'a': 1}, {'a': 2, 'c': 3}], 'y': [2]},
+            'after': 'string with ] and " and \\"',
+        }
+        schema = {'properties': {'data': {'properties': {'records': {'items': self.item_schema}}}}}
+        self.assertEqual([{'a': 1, 'b': 'x'}, {'a': 2, 'b': 'x', 'c': 30}],
+                         self.stream(document, schema, ['data', 'records']))
+
+    def test_path_not_found(self):
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            self.stream({'data': {'x': []}}, {}, ['data', 'records'])
+        self.assertEqual(['data', 'records'], exception_info.exception.path)
+
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            self.stream({'data': []}, {}, ['data', 'records'])
+        self.assertEqual("expected dict @ data['data']", str(exception_info.exception))
+
+    def test_item_errors(self):
+        items = streaming.iter_validate(io.StringIO(json.dumps({'data': [{'a': 1}, {'a': 'b'}]})),
+                                        {'properties': {'data': {'items': self.item_schema}}}, ['data'])
+        self.assertEqual({'a': 1, 'b': 'x'}, next(items))
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            next(items)
+        self.assertEqual(['data', 1, 'a'], exception_info.exception.path)
+
+    def test_array_keywords(self):
+        schema = {'type': 'array', 'maxItems': 3, 'minItems': 2, 'uniqueItems': True, 'contains': {'type': 'string'}}
+        self.assertEqual([1, 'a', {'b': [1]}], self.stream([1, 'a', {'b': [1]}], schema))
+
+        for document, message in [
+            ([1, 'a', 2, 3], 'length of value must be at most 3'),
+            (['a'], 'length of value must be at least 2'),
+            ([1, 'a', 1.0], 'duplicate value: 1.0 @ data[2]'),
+            ([{'b': [1]}, 'a', {'b': [1]}], "duplicate value: {'b': [1]} @ data[2]"),
+            ([1, 2, 3], 'no item valid against "contains"'),
+        ]:
+            with self.assertRaises(vol.MultipleInvalid) as exception_info:
+                self.stream(document, schema)
+            self.assertEqual(message, str(exception_info.exception))
+
+    def test_tuple_items(self):
+        schema = {'items': [{'type': 'integer'}, {'type': 'string'}], 'additionalItems': {'type': 'boolean'}}
+        self.assertEqual([1, 'a', True, False], self.stream([1, 'a', True, False], schema))
+        with self.assertRaises(vol.MultipleInvalid) as exception_info:
+            self.stream([1, 'a', 1], schema)
+        self.assertEqual([2], exception_info.exception.path)
+
+    def test_not_streamable(self):
+        with self.assertRaises(ValueError):
+            self.stream([], {'type': 'array', 'anyOf': [{}]})
+        with self.assertRaises(ValueError):
+            self.stream([], {'type': 'object'})
+
+    def test_malformed(self):
+        for text in ['[1, 2', '[1 2]', '[1, 2] 3', '{"a": [1]']:
+            with self.assertRaises(ValueError):
+                list(streaming.iter_validate(io.StringIO(text), {}, ['a'] if text.startswith('{') else ()))
+
+    def test_numbers_split_between_chunks(self):
+        self.assertEqual([123456789, 1.5e+300], self.stream([123456789, 1.5e300], {}, chunk_size=1))
+
+    def test_lazy(self):
+        class Reader(io.StringIO):
+            reads = 0
+
+            def read(self, size=-1):
+                self.reads += 1
+                return super().read(size)
+
+        fp = Reader(json.dumps(list(range(1000))))
+        items = streaming.iter_validate(fp, {'items': {'type': 'integer'}}, chunk_size=100)
+        self.assertEqual([0, 1, 2], [next(items) for _ in range(3)])
+        self.assertEqual(1, fp.reads)
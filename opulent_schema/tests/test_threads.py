@@ -0,0 +1,164 @@
+import concurrent.futures
+import json
+import pickle
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+import voluptuous as vol
+
+import opulent_schema
+from opulent_schema import caching, decoding, encoding, projection
+
+THREADS = 8
+
+
+def hammer(func, arguments, threads=THREADS):
+    """The results of `func` called with every argument, from `threads` threads starting at once"""
+    barrier = threading.Barrier(threads)
+
+    def call(argument):
+        try:
+            barrier.wait(timeout=0.5)
+        except threading.BrokenBarrierError:  # not all the threads got a task, or the rest are already past it
+            pass
+        return func(argument)
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        return list(executor.map(call, arguments))
+
+
+def outcome(validator, instance):
+    try:
+        return validator(instance)
+    except vol.MultipleInvalid as e:
+        return sorted(str(error) for error in e.errors)
+
+
+class SlowConverter(opulent_schema.SchemaConverter):
+    conversions = []
+
+    @classmethod
+    def convert(cls, json_schema, lazy=True, records=False):
+        if not lazy:
+            cls.conversions.append(json_schema)
+            time.sleep(0.01)  # for the other threads to call the validator meanwhile
+        return super().convert(json_schema, lazy, records)
+
+
+class Test(unittest.TestCase):
+    schema = {
+        'type': 'object',
+        'properties': {
+            'id': {'type': 'integer', 'minimum': 0},
+            'tags': {'type': 'array', 'items': {'type': 'string'}, 'uniqueItems': True},
+            'code': opulent_schema.InLineField(str.upper, type='string', memo_size=4, memo_key=str.lower),
+            'owner': {'type': 'object', 'properties': {'name': {'type': 'string'}}, 'required': ['name']},
+        },
+        'required': ['id'],
+    }
+    instances = [
+        {'id': ind, 'tags': ['a', str(ind % 5)], 'code': 'c{}'.format(ind % 7), 'owner': {'name': 'n'}}
+        if ind % 4 else {'id': -ind, 'tags': ['a', 'a'], 'owner': {}}
+        for ind in range(400)
+    ]
+
+    def setUp(self):
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switching threads as often as possible, for the races to show up
+        self.addCleanup(sys.setswitchinterval, interval)
+
+    def assertSameOutcomes(self, validator, instances):
+        expected = [outcome(validator, instance) for instance in instances]
+        self.assertEqual(expected, hammer(lambda instance: outcome(validator, instance), instances))
+
+    def test_lazy_schema_converted_once(self):
+        SlowConverter.conversions = []
+        validator = SlowConverter.convert(self.schema)
+        results = hammer(lambda instance: outcome(validator, instance), self.instances[:THREADS * 2])
+        self.assertEqual([outcome(opulent_schema.convert(self.schema), instance)
+                          for instance in self.instances[:THREADS * 2]], results)
+        self.assertEqual([self.schema], SlowConverter.conversions)
+
+    def test_shared_validators(self):
+        for validator in [
+            opulent_schema.convert(self.schema),
+            opulent_schema.FailFastSchemaConverter.convert(self.schema),
+            opulent_schema.convert(self.schema).project(['/id', '/owner/name']),
+            opulent_schema.convert(self.schema).cached(maxsize=8),
+        ]:
+            with self.subTest(validator=validator):
+                self.assertSameOutcomes(validator, self.instances)
+
+    def test_records(self):
+        validator = opulent_schema.convert(self.schema, records=True)
+        results = hammer(lambda instance: outcome(validator, instance), self.instances)
+        self.assertEqual([outcome(opulent_schema.convert(self.schema), instance) for instance in self.instances],
+                         [result.to_dict() if hasattr(result, 'to_dict') else result for result in results])
+
+    def test_decoding_encoding(self):
+        decoder = decoding.SchemaDecoder(self.schema)
+        self.assertSameOutcomes(decoder, [json.dumps(instance) for instance in self.instances])
+        encoder = encoding.SchemaEncoder(self.schema)
+        valid = [opulent_schema.convert(self.schema)(instance) for instance in self.instances if instance['id'] > 0]
+        self.assertEqual([encoder(instance) for instance in valid], hammer(encoder, valid))
+
+    def test_module_caches(self):
+        # a few schemas, in caches of 2, evicted all the time
+        schemas = [{'properties': {'a': {'type': 'integer', 'minimum': ind}}} for ind in range(5)]
+        arguments = [(schemas[ind % 5], {'a': ind % 3}) for ind in range(500)]
+        with mock.patch.object(decoding, 'DECODER_CACHE_SIZE', 2), \
+                mock.patch.object(encoding, 'ENCODER_CACHE_SIZE', 2), \
+                mock.patch.object(projection, 'PROJECTION_CACHE_SIZE', 2):
+            for func in [
+                lambda args: outcome(lambda document: decoding.loads(document, args[0]), json.dumps(args[1])),
+                lambda args: encoding.dumps(args[1], args[0]),
+                lambda args: outcome(projection.project(args[0], ['/a']), args[1]),
+            ]:
+                with self.subTest(func=func):
+                    self.assertEqual([func(args) for args in arguments], hammer(func, arguments))
+
+    def test_memos(self):
+        memo = opulent_schema.Memo(str.upper, maxsize=2, key=str.lower)
+        arguments = ['k{}'.format(ind % 9) for ind in range(2000)]
+        self.assertEqual([argument.upper() for argument in arguments], hammer(memo, arguments))
+        info = memo.cache_info()
+        self.assertEqual(len(arguments), info.hits + info.misses)
+
+        cached = caching.CachedValidator(opulent_schema.convert(self.schema), maxsize=2)
+        self.assertSameOutcomes(cached, self.instances)
+        info = cached.cache_info()
+        self.assertEqual(2 * len(self.instances), info.hits + info.misses)
+
+    def test_transformed_field_memo_shared(self):
+        field = opulent_schema.InLineField(str.upper, type='string', memo_size=4)
+        memos = hammer(lambda _: field.get_memoized_post_transformation(), range(THREADS * 4))
+        self.assertTrue(all(memo is memos[0] for memo in memos))
+
+    def test_lazy_attributes_built_once(self):
+        module = opulent_schema.opulent_schema
+        builds = []
+
+        def build():
+            builds.append(None)
+            time.sleep(0.01)
+            return object()
+        self.addCleanup(vars(module).pop, 'stress_test_attribute', None)
+        with mock.patch.dict(module._lazy_attributes, stress_test_attribute=build):
+            values = hammer(lambda _: module.stress_test_attribute, range(THREADS))
+        self.assertEqual(1, len(builds))
+        self.assertTrue(all(value is values[0] for value in values))
+
+    def test_table_contracts(self):
+        from opulent_schema import schemalchemy
+
+        schema = {'type': 'object', 'properties': {'a': {'type': 'integer'}}}
+        contracts = schemalchemy.TableContracts(['a', 'b'], {}, {key: pickle.dumps(schema) for key in 'ab'})
+        results = hammer(lambda key: contracts.validator(key)({'a': 1}), 'ab' * THREADS * 4)
+        self.assertEqual([{'a': 1}] * len(results), results)
+        self.assertEqual(schema, contracts['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
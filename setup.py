@@ -8,15 +8,22 @@ setup(
     version=version,
     license='BSD',
     platforms=['any'],
-    python_requires=">=3.5",
+    python_requires=">=3.7",
     packages=['opulent_schema'],
     install_requires=[
-        "voluptuous>=0.9.3",
+        # `vol.Schema(...)._compiled(path, value)`, voluptuous' internal form of a compiled validator, is called by
+        # `pending`, `profiling` and `decoding`: it raises the very errors of the validator (not wrapped in a
+        # `vol.MultipleInvalid`, as `vol.Schema.__call__` does), so that the validators wrapping others raise the
+        # same errors as `convert` - bounded to the versions it is known to work with
+        "voluptuous>=0.9.3,<0.17",
     ],
     extras_require={
         'schemalchemy': [
             'Delorean>=0.5.0',
             'sqlalchemy>=1.1.9,<1.3.0',
         ],
+        'numpy': [
+            'numpy',
+        ],
     },
 )